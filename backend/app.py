@@ -1,25 +1,87 @@
-from flask import Flask
+import time
+
+from flask import Flask, Response, g, request
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 
+# Before the imports below, which read their configuration from the environment
+load_dotenv()
+
 from blueprints.auth import auth_bp
 from blueprints.algorithms import algorithms_bp
 from blueprints.visualization import visualization_bp
+from services.metrics import registry, REQUEST_SECONDS, CONTENT_TYPE
+from services.token_auth import signing_keys, token_cache, user_id_from_header
 
-load_dotenv()
 print("SUPABASE_URL:", os.getenv("SUPABASE_URL"))
 print("SUPABASE_KEY:", os.getenv("SUPABASE_KEY"))
 
+# 'lazy' (default): Docker, Supabase and matplotlib are set up by the first
+# request that needs them. 'eager': set up in create_app, before serving.
+STARTUP_MODE = os.getenv('STARTUP_MODE', 'lazy')
+
+registry.gauge('daalab_token_cache_hit_ratio', 'Verified-token cache hit rate since startup',
+               lambda: token_cache.stats()['hit_rate'])
+
+def warm_up():
+    """Create the shared clients, the sandbox pool and the plotting backend now"""
+    from blueprints.algorithms import docker_ready
+    from services.clients import get_client
+    from services.storage import get_storage
+    from services.plots import load_matplotlib
+
+    docker_ready()
+    for name, setup in (('storage', get_storage), ('auth client', lambda: get_client('supabase_auth'))):
+        try:
+            setup()
+        except Exception as e:
+            print(f"Warm-up: {name} not available: {e}")
+    load_matplotlib()
+
 def create_app():
     app = Flask(__name__)
     CORS(app)
     
+    # Without a key every request would be unauthenticated: refuse to start
+    signing_keys.check()
+    
+    if STARTUP_MODE == 'eager':
+        warm_up()
+    
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(algorithms_bp, url_prefix='/api/algorithms')
     app.register_blueprint(visualization_bp, url_prefix='/api/visualization')
     
+    # Request latency for every endpoint
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+    
+    # The caller's user id (None when unauthenticated) for every blueprint,
+    # from a signature-verified bearer token
+    @app.before_request
+    def authenticate():
+        g.user_id = user_id_from_header(request.headers.get('Authorization'))
+    
+    @app.after_request
+    def record_latency(response):
+        start = g.pop('request_start', None)
+        if start is not None:
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                endpoint=request.url_rule.rule if request.url_rule else 'unmatched',
+                method=request.method,
+                status=response.status_code
+            )
+        return response
+    
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus text exposition of all backend metrics"""
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+    
     return app
 
 if __name__ == '__main__':
@@ -0,0 +1,279 @@
+"""Local stand-ins for the Supabase and Docker clients, used by the load test.
+
+FakeSupabase keeps tables in memory and implements the subset of the
+PostgREST query builder the backend uses. FakeDocker "runs" containers on
+the local machine: exec'd commands are executed directly, with the
+container's bind mounts translated back to host paths, so the Docker code
+path (pool, exec, timeouts) runs against the real local gcc.
+"""
+import copy
+import itertools
+import os
+import re
+import subprocess
+import threading
+import uuid
+from datetime import datetime
+
+from services.container_pool import REAP_COMMAND
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+def _parse_value(text):
+    if text.startswith('"') and text.endswith('"'):
+        return text[1:-1]
+    return text
+
+
+def _split_top_level(text):
+    """Split 'a,and(b,c),d' on the commas outside parentheses"""
+    parts, depth, current = [], 0, ''
+    for char in text:
+        if char == ',' and depth == 0:
+            parts.append(current)
+            current = ''
+            continue
+        depth += (char == '(') - (char == ')')
+        current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _compare(op, value, target):
+    if value is None:
+        return False
+    value, target = str(value), str(target)
+    return {'eq': value == target, 'lt': value < target, 'gt': value > target,
+            'lte': value <= target, 'gte': value >= target}[op]
+
+
+def _or_filter(expression):
+    """Row predicate for a PostgREST or=(...) expression of col.op.value terms and and(...) groups"""
+    def term(text):
+        if text.startswith('and(') and text.endswith(')'):
+            terms = [term(part) for part in _split_top_level(text[4:-1])]
+            return lambda row: all(t(row) for t in terms)
+        column, op, value = re.match(r'([^.]+)\.([a-z]+)\.(.*)$', text).groups()
+        value = _parse_value(value)
+        return lambda row: _compare(op, row.get(column), value)
+
+    terms = [term(part) for part in _split_top_level(expression)]
+    return lambda row: any(t(row) for t in terms)
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.columns = None
+        self.filters = []
+        self.orders = []
+        self.limit_count = None
+        self.write = None
+
+    def select(self, columns='*'):
+        if columns != '*':
+            self.columns = [column.strip() for column in columns.split(',')]
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = list(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def is_(self, column, value):
+        expected = None if value == 'null' else value
+        self.filters.append(lambda row: row.get(column) is expected)
+        return self
+
+    def or_(self, expression):
+        self.filters.append(_or_filter(expression))
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def insert(self, rows):
+        self.write = ('insert', rows if isinstance(rows, list) else [rows], None)
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False):
+        self.write = ('insert_new' if ignore_duplicates else 'upsert',
+                      rows if isinstance(rows, list) else [rows], on_conflict)
+        return self
+
+    def execute(self):
+        return FakeResponse(self.db.execute(self))
+
+
+class FakeSupabase:
+    """In-memory Supabase client (tables only)"""
+
+    def __init__(self):
+        self.tables = {}
+        self._lock = threading.Lock()
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def execute(self, query):
+        with self._lock:
+            rows = self.tables.setdefault(query.table, [])
+            if query.write:
+                return self._write(rows, *query.write)
+
+            result = [row for row in rows if all(f(row) for f in query.filters)]
+            # Stable sorts applied last-key-first give a multi-column ORDER BY
+            for column, desc in reversed(query.orders):
+                result.sort(key=lambda row: (row.get(column) is None, row.get(column) or 0), reverse=desc)
+            if query.limit_count is not None:
+                result = result[:query.limit_count]
+            if query.columns:
+                result = [{column: row.get(column) for column in query.columns} for row in result]
+            return copy.deepcopy(result)
+
+    def _write(self, rows, kind, new_rows, on_conflict):
+        # PostgREST rejects bulk writes whose objects have different keys
+        if any(set(row) != set(new_rows[0]) for row in new_rows):
+            raise RuntimeError('All object keys must match')
+        written = []
+        for row in new_rows:
+            row = {'id': str(uuid.uuid4()), 'created_at': datetime.utcnow().isoformat(), **copy.deepcopy(row)}
+            if kind != 'insert' and on_conflict:
+                key = on_conflict.split(',')
+                existing = next((r for r in rows if all(r.get(k) == row.get(k) for k in key)), None)
+                if existing is not None and kind == 'insert_new':
+                    continue
+                if existing is not None:
+                    existing.update(row)
+                    written.append(existing)
+                    continue
+            rows.append(row)
+            written.append(row)
+        return copy.deepcopy(written)
+
+
+class FakeContainer:
+    """A 'container' whose commands run on the local machine"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, client, volumes, working_dir, labels=None):
+        self.client = client
+        self.labels = labels or {}
+        self.id = f"fake{next(self._ids):060d}"
+        self.short_id = self.id[:12]
+        # Longest mount first so nested mounts translate correctly
+        self.mounts = sorted(
+            ((spec['bind'], host) for host, spec in (volumes or {}).items()),
+            key=lambda mount: -len(mount[0])
+        )
+        self.working_dir = working_dir
+
+    def host_path(self, text):
+        for mount, host in self.mounts:
+            text = re.sub(rf'(?<![\w/]){re.escape(mount)}(?=/|$|\s)', host, text)
+        return text
+
+    def command(self, cmd, workdir, environment):
+        cmd = [self.host_path(arg) for arg in cmd]
+        env = {'PATH': os.environ.get('PATH', '/usr/bin:/bin'),
+               **{key: self.host_path(str(value)) for key, value in (environment or {}).items()}}
+        return cmd, self.host_path(workdir or self.working_dir), env
+
+    def exec_run(self, cmd, workdir=None, environment=None, demux=False):
+        if cmd == REAP_COMMAND:
+            # The "container's" processes are the load test's own
+            return 0, (None, None) if demux else b''
+        cmd, cwd, env = self.command(cmd, workdir, environment)
+        process = subprocess.run(cmd, cwd=cwd, env=env, capture_output=True)
+        output = (process.stdout or None, process.stderr or None)
+        return process.returncode, output if demux else b''.join(part or b'' for part in output)
+
+    def update(self, **kwargs):
+        pass
+
+    def remove(self, force=False):
+        self.client.removed += 1
+        self.client.containers_by_id.pop(self.id, None)
+
+
+class FakeContainers:
+    def __init__(self, client):
+        self.client = client
+
+    def run(self, image, command=None, volumes=None, working_dir=None, labels=None, **kwargs):
+        self.client.started += 1
+        container = FakeContainer(self.client, volumes, working_dir, labels)
+        self.client.containers_by_id[container.id] = container
+        return container
+
+    def list(self, all=False, filters=None):
+        label = (filters or {}).get('label')
+        return [container for container in self.client.containers_by_id.values()
+                if label is None or label in container.labels]
+
+
+class FakeAPI:
+    """Low-level exec API used for streaming"""
+
+    def __init__(self, client):
+        self.client = client
+        self._execs = {}
+
+    def exec_create(self, container_id, cmd, workdir=None, environment=None):
+        container = self.client.containers_by_id[container_id]
+        exec_id = uuid.uuid4().hex
+        self._execs[exec_id] = {'command': container.command(cmd, workdir, environment), 'exit_code': None}
+        return {'Id': exec_id}
+
+    def exec_start(self, exec_id, stream=False, demux=False):
+        record = self._execs[exec_id]
+        cmd, cwd, env = record['command']
+        process = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        finished = False
+        try:
+            for chunk in iter(lambda: process.stdout.read1(65536), b''):
+                yield chunk, None
+            stderr = process.stderr.read()
+            if stderr:
+                yield None, stderr
+            finished = True
+        finally:
+            # Stopped early by the caller: the exec is abandoned
+            if not finished and process.poll() is None:
+                process.kill()
+            record['exit_code'] = process.wait()
+            process.stdout.close()
+            process.stderr.close()
+
+    def exec_inspect(self, exec_id):
+        return {'ExitCode': self._execs.pop(exec_id)['exit_code']}
+
+
+class FakeDocker:
+    """Docker client stand-in: containers are local processes"""
+
+    def __init__(self):
+        self.containers_by_id = {}
+        self.started = 0
+        self.removed = 0
+        self.containers = FakeContainers(self)
+        self.api = FakeAPI(self)
+
+    def info(self):
+        return {'NCPU': os.cpu_count() or 1}
@@ -0,0 +1,324 @@
+"""Load test for the backend API.
+
+Runs the Flask app from create_app() in-process, against in-memory Supabase
+and local-process Docker stand-ins (benchmarks/fakes.py) and the real local
+gcc. A fixed-seed mix of requests is driven from concurrent workers. The
+report has requests/sec, latency percentiles and per-endpoint breakdowns, as
+JSON so runs can be compared between commits.
+
+Usage (from backend/):
+    python benchmarks/load_test.py [--duration 30 | --requests N] [--concurrency 8]
+        [--mix run=3,run_cached=3,benchmark=1,list=4,runtimes=3,executions=2,plot=1,stats=2]
+        [--executor docker|local] [--output report.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# The backend is configured to verify tokens with this secret
+TOKEN_SECRET = 'load-test-secret-0123456789abcdef0123'
+
+DEFAULT_MIX = 'run=3,run_cached=3,benchmark=1,list=4,runtimes=3,executions=2,plot=1,stats=2'
+
+PROGRAM = '''#include <stdio.h>
+#include <stdlib.h>
+/* %s */
+int main(int argc, char **argv) {
+    long n = argc > 1 ? atol(argv[1]) : 1000;
+    volatile long sum = 0;
+    for (long i = 0; i < n * 100; i++)
+        sum += i %% 7;
+    printf("%%ld\\n", sum);
+    return 0;
+}
+'''
+
+
+def percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'p50_ms': pick(0.50),
+        'p90_ms': pick(0.90),
+        'p95_ms': pick(0.95),
+        'p99_ms': pick(0.99),
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        if name not in WORKLOADS:
+            raise SystemExit(f"unknown workload '{name}' (choose from {', '.join(WORKLOADS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Session:
+    """One simulated user: a Flask test client plus the algorithms it created"""
+
+    def __init__(self, app, user_id, rng):
+        import jwt
+        claims = {'sub': user_id, 'aud': 'authenticated', 'exp': int(time.time()) + 86400}
+        token = jwt.encode(claims, TOKEN_SECRET, algorithm='HS256')
+        self.client = app.test_client()
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.rng = rng
+        self.user_id = user_id
+        self.algorithms = {}  # name -> id
+        self.unique = 0
+
+    def post(self, path, body):
+        return self.client.post(path, json=body, headers=self.headers)
+
+    def get(self, path):
+        return self.client.get(path, headers=self.headers)
+
+    def run(self, name, code, **extra):
+        response = self.post('/api/algorithms/run', {'name': name, 'language': 'c', 'code': code, **extra})
+        data = response.get_json(silent=True) or {}
+        if data.get('algorithm_id'):
+            self.algorithms[name] = data['algorithm_id']
+        return response
+
+    def pick_algorithm(self):
+        name = self.rng.choice(sorted(self.algorithms))
+        return name, self.algorithms[name]
+
+
+# Workload name -> (endpoint label, request function)
+def _run_new(session):
+    # A new source every time: compile cache miss
+    session.unique += 1
+    return session.run('fresh', PROGRAM % f'{session.user_id} {session.unique} {session.rng.random()}')
+
+
+def _run_cached(session):
+    return session.run('cached', PROGRAM % 'shared')
+
+
+def _benchmark(session):
+    return session.run('bench', PROGRAM % 'bench', sizes=[100, 200, 400], trials=3, warmup=0)
+
+
+def _list(session):
+    return session.get('/api/algorithms/list')
+
+
+def _runtimes(session):
+    name, _ = session.pick_algorithm()
+    return session.get(f'/api/visualization/runtimes?algorithm_name={name}&max_points=500')
+
+
+def _executions(session):
+    _, algorithm_id = session.pick_algorithm()
+    return session.get(f'/api/visualization/executions?algorithm_id={algorithm_id}')
+
+
+def _plot(session):
+    name, _ = session.pick_algorithm()
+    return session.get(f'/api/visualization/plot?algorithm_name={name}&format=json')
+
+
+def _stats(session):
+    name, _ = session.pick_algorithm()
+    return session.get(f'/api/visualization/stats?algorithm_name={name}')
+
+
+WORKLOADS = {
+    'run': ('POST /api/algorithms/run (compile)', _run_new),
+    'run_cached': ('POST /api/algorithms/run (cached)', _run_cached),
+    'benchmark': ('POST /api/algorithms/run (sizes)', _benchmark),
+    'list': ('GET /api/algorithms/list', _list),
+    'runtimes': ('GET /api/visualization/runtimes', _runtimes),
+    'executions': ('GET /api/visualization/executions', _executions),
+    'plot': ('GET /api/visualization/plot', _plot),
+    'stats': ('GET /api/visualization/stats', _stats),
+}
+
+
+def setup_app(executor):
+    """create_app() wired to the stand-ins; returns (app, fakes)"""
+    os.environ['STORAGE_BACKEND'] = 'supabase'
+    os.environ['STARTUP_MODE'] = 'lazy'
+    os.environ['SUPABASE_JWT_SECRET'] = TOKEN_SECRET
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+
+    from fakes import FakeDocker, FakeSupabase
+    from services import clients
+
+    supabase = FakeSupabase()
+    clients.set_client('supabase', supabase)
+    clients.set_client('supabase_auth', supabase)
+    docker = None
+    if executor == 'docker':
+        docker = FakeDocker()
+        clients.set_client('docker', docker)
+    else:
+        def no_docker():
+            raise RuntimeError('Docker disabled for this load test')
+        clients.register('docker', no_docker)
+
+    import app as app_module
+    return app_module.create_app(), {'supabase': supabase, 'docker': docker}
+
+
+def seed(sessions):
+    """Give every user one algorithm of each kind so the read endpoints have data"""
+    for session in sessions:
+        for response in (_run_cached(session), _run_new(session), _benchmark(session)):
+            if response.status_code != 200:
+                raise SystemExit(f"seeding failed: {response.status_code} {response.get_data(as_text=True)[:500]}")
+    # Execution logs are written behind; make the seeded ones readable
+    import blueprints.algorithms as algorithms
+    algorithms.write_buffer.flush()
+
+
+def worker(session, mix, deadline, budget, records, lock):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    local = []
+    while time.perf_counter() < deadline:
+        if budget is not None:
+            with lock:
+                if budget[0] <= 0:
+                    break
+                budget[0] -= 1
+        name = session.rng.choices(names, weights)[0]
+        endpoint, request = WORKLOADS[name]
+        start = time.perf_counter()
+        try:
+            status = request(session).status_code
+        except Exception as e:
+            status = f'exception: {type(e).__name__}'
+        local.append((endpoint, status, time.perf_counter() - start))
+    with lock:
+        records.extend(local)
+
+
+def summarize(records, elapsed):
+    def block(rows):
+        errors = sum(1 for _, status, _ in rows if not (isinstance(status, int) and status < 400))
+        codes = {}
+        for _, status, _ in rows:
+            codes[str(status)] = codes.get(str(status), 0) + 1
+        return {
+            'requests': len(rows),
+            'errors': errors,
+            'status_codes': codes,
+            'requests_per_sec': len(rows) / elapsed if elapsed else None,
+            'latency': percentiles([seconds for _, _, seconds in rows]),
+        }
+
+    endpoints = {}
+    for record in records:
+        endpoints.setdefault(record[0], []).append(record)
+    return {
+        'total': block(records),
+        'endpoints': {endpoint: block(rows) for endpoint, rows in sorted(endpoints.items())},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run (default 30)')
+    parser.add_argument('--requests', type=int, help='stop after this many requests instead')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent workers (default 8)')
+    parser.add_argument('--users', type=int, default=4, help='distinct users (default 4)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'workload weights (default {DEFAULT_MIX})')
+    parser.add_argument('--executor', choices=('docker', 'local'), default='docker',
+                        help='run through the fake Docker pool or the local fallback (default docker)')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for the request mix')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    app, fakes = setup_app(args.executor)
+    users = [f'load-user-{index}' for index in range(max(1, args.users))]
+    sessions = [Session(app, users[index % len(users)], random.Random(args.seed * 1000 + index))
+                for index in range(max(1, args.concurrency))]
+
+    print('Seeding...', file=sys.stderr)
+    seed(sessions[:len(users)])
+    for session in sessions[len(users):]:
+        session.algorithms = dict(sessions[users.index(session.user_id)].algorithms)
+
+    print(f'Running {args.concurrency} workers...', file=sys.stderr)
+    records, lock = [], threading.Lock()
+    budget = [args.requests] if args.requests else None
+    duration = float('inf') if args.requests else args.duration
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(session, mix, start + duration, budget, records, lock))
+               for session in sessions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    import blueprints.algorithms as algorithms
+    report = {
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': {
+            'duration_s': elapsed,
+            'concurrency': args.concurrency,
+            'users': len(users),
+            'mix': mix,
+            'executor': args.executor,
+            'seed': args.seed,
+        },
+        **summarize(records, elapsed),
+        'backend': {
+            'compile_cache': algorithms.compile_cache.stats(),
+            'sandbox_pool': algorithms.sandbox_pool.stats() if algorithms.sandbox_pool else None,
+            'write_behind': algorithms.write_buffer.stats(),
+            'auth': algorithms.auth_stats(),
+            'executors': {name: breaker.stats() for name, breaker in algorithms.breakers.items()},
+            'fake_docker': {'started': fakes['docker'].started, 'removed': fakes['docker'].removed}
+            if fakes['docker'] else None,
+        },
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    total = report['total']
+    print(f"{total['requests']} requests in {elapsed:.1f}s: {total['requests_per_sec']:.1f} req/s, "
+          f"p50 {total['latency']['p50_ms']:.1f} ms, p99 {total['latency']['p99_ms']:.1f} ms, "
+          f"{total['errors']} errors", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
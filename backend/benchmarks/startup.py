@@ -0,0 +1,119 @@
+"""Startup-time benchmark for the backend.
+
+Every measurement runs in a fresh interpreter so nothing is already imported.
+For each blueprint it reports the cost of importing the module (on top of
+Flask) and of initializing what it creates on first use (Docker probe and
+sandbox pool, Supabase clients, matplotlib). For the whole app it reports
+`import app` plus `create_app()` in lazy and eager startup mode.
+
+Usage (from backend/):
+    python benchmarks/startup.py [--repeat 5] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# blueprint -> (module, code that performs its first-use initialization)
+BLUEPRINTS = {
+    'auth': ('blueprints.auth', "from services.clients import get_client; get_client('supabase_auth')"),
+    'algorithms': ('blueprints.algorithms', "module.docker_ready(); from services.storage import get_storage; get_storage()"),
+    'visualization': ('blueprints.visualization', "from services.plots import load_matplotlib; load_matplotlib()"),
+}
+
+BLUEPRINT_PROBE = '''
+import importlib, json, time
+import flask
+start = time.perf_counter()
+module = importlib.import_module({module!r})
+imported = time.perf_counter()
+error = None
+try:
+    {init}
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+done = time.perf_counter()
+print(json.dumps({{"import_ms": (imported - start) * 1000, "init_ms": (done - imported) * 1000, "init_error": error}}))
+'''
+
+APP_PROBE = '''
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+done = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "create_app_ms": (done - imported) * 1000}))
+'''
+
+
+def probe(code, env=None):
+    process = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+        timeout=300
+    )
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1] if process.stderr.strip() else 'probe failed')
+    # The modules print configuration on import; the measurement is the last line
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def median_of(samples, key):
+    return statistics.median(sample[key] for sample in samples)
+
+
+def run(repeat):
+    report = {'python': sys.version.split()[0], 'repeat': repeat, 'blueprints': {}, 'app': {}}
+    for name, (module, init) in BLUEPRINTS.items():
+        code = BLUEPRINT_PROBE.format(module=module, init=init)
+        samples = [probe(code) for _ in range(repeat)]
+        report['blueprints'][name] = {
+            'import_ms': median_of(samples, 'import_ms'),
+            'init_ms': median_of(samples, 'init_ms'),
+            'init_error': samples[-1]['init_error'],
+        }
+    for mode in ('lazy', 'eager'):
+        samples = [probe(APP_PROBE, {'STARTUP_MODE': mode}) for _ in range(repeat)]
+        report['app'][mode] = {
+            'import_ms': median_of(samples, 'import_ms'),
+            'create_app_ms': median_of(samples, 'create_app_ms'),
+        }
+    return report
+
+
+def print_report(report):
+    print(f"Python {report['python']}, median of {report['repeat']} runs")
+    print()
+    print(f"{'blueprint':<15}{'import ms':>12}{'first-use ms':>15}")
+    for name, row in report['blueprints'].items():
+        note = f"  ({row['init_error']})" if row['init_error'] else ''
+        print(f"{name:<15}{row['import_ms']:>12.1f}{row['init_ms']:>15.1f}{note}")
+    print()
+    print(f"{'app':<15}{'import ms':>12}{'create_app ms':>15}")
+    for mode, row in report['app'].items():
+        print(f"{mode:<15}{row['import_ms']:>12.1f}{row['create_app_ms']:>15.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per measurement')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    report = run(max(1, args.repeat))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,11 +2,16 @@ import os
 from dotenv import load_dotenv
 import platform
 import json
-import docker
 import time
 import uuid
-import tempfile
 import subprocess
+import threading
+import signal
+import random
+import selectors
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager, nullcontext
 
 # Load .env from the project root
 dotenv_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '.env'))
@@ -16,119 +21,436 @@ load_dotenv(dotenv_path=dotenv_path, override=True)
 print("SUPABASE_URL:", os.getenv("SUPABASE_URL"))
 print("SUPABASE_KEY:", os.getenv("SUPABASE_KEY"))
 
-from flask import Blueprint, request, jsonify
-from supabase import create_client
-import jwt
+from flask import Blueprint, Response, g, request, jsonify, stream_with_context
+import numpy as np
+
+from services.container_pool import ContainerPool, SandboxError, TIMEOUT_EXIT_CODE, COMMAND_NOT_RUN_EXIT_CODES
+from services.compile_cache import CompileCache, COMPILE_CACHE_MOUNT
+from services.job_queue import JobQueue, QueueFullError
+from services.complexity import summarize_samples, fit_complexity
+from services.datasets import DATASET_ROOT, DATASET_MOUNT, DatasetError, validate_spec, dataset_path, release_dataset, container_dataset_path, dataset_stats
+from services.storage import UNIQUE_KEYS, UPSERT_KEYS, get_storage, iter_execution_logs
+from services.rolling_stats import RunningStats, StatsCache
+from services.regression import REGRESSION_HISTORY, detect_change
+from services.streaming import OUTPUT_PREFIX_BYTES, BoundedOutput, output_digest, sse_event
+from services.metrics import registry, PHASE_SECONDS, FALLBACKS, TIMEOUTS, COMPILE_ERRORS
+from services.write_behind import WriteBehindBuffer
+from services.algorithm_cache import algorithm_id_cache
+from services.comparison import speedup_interval, mann_whitney_u
+from services.harness import HARNESS_HASH, HARNESS_ROOT, HARNESS_MOUNT, uses_harness, harness_dir, ensure_pch, parse_timings
+from services.workspace import WorkspaceManager, WorkspaceError
+from services.clients import get_client, stats as client_stats
+from services.token_auth import stats as auth_stats
+from services.circuit_breaker import CircuitBreaker, OPEN
+from services.isolation import (
+    CALIBRATION_RUNS, CALIBRATION_SOURCE, CORES, NOISE_DEFER_SECONDS, NOISE_MAX_DEFERRALS,
+    IsolationError, cpu_list, isolated_cores, noise_figure, reserve_host_cores, robust_cv
+)
 
 algorithms_bp = Blueprint('algorithms', __name__)
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
-
-# Initialize Docker client with error handling
-try:
-    docker_client = docker.from_env()
-    docker_available = True
-    print("Docker client initialized successfully")
-except Exception as e:
-    print(f"Docker not available: {e}")
-    docker_available = False
-
-def execute_code_docker(code, language):
-    """Execute code using Docker containers"""
+
+# Warm pool of sandbox containers; jobs are dispatched to them with exec.
+# Docker is probed and the pool started by the first job that needs it
+# (or by warm_up()), not at import time.
+sandbox_pool = None
+docker_available = False
+_docker_probed = False
+_docker_lock = threading.Lock()
+
+def docker_ready():
+    """True once the sandbox pool is running; probes Docker on the first call"""
+    global sandbox_pool, docker_available, _docker_probed
+    if _docker_probed:
+        return docker_available
+    with _docker_lock:
+        if _docker_probed:
+            return docker_available
+        try:
+            docker_client = get_client('docker')
+            print("Docker client initialized successfully")
+        except Exception as e:
+            print(f"Docker not available: {e}")
+            docker_client = None
+        if docker_client is not None:
+            try:
+                os.makedirs(DATASET_ROOT, exist_ok=True)
+                os.makedirs(HARNESS_ROOT, exist_ok=True)
+                sandbox_pool = ContainerPool(
+                    docker_client,
+                    workspaces,
+                    # Shared directories are read-only: builds are moved into
+                    # the cache from the host, and the harness is written by
+                    # the toolchain container only
+                    extra_volumes={
+                        compile_cache.root: {'bind': COMPILE_CACHE_MOUNT, 'mode': 'ro'},
+                        HARNESS_ROOT: {'bind': HARNESS_MOUNT, 'mode': 'ro'},
+                        DATASET_ROOT: {'bind': DATASET_MOUNT, 'mode': 'ro'},
+                    },
+                    builder_volumes={HARNESS_ROOT: {'bind': HARNESS_MOUNT, 'mode': 'rw'}},
+                    # Keep the pool off the reserved benchmark CPUs
+                    cpuset=cpu_list(CORES['shared']) if CORES['reserved'] else None
+                )
+                sandbox_pool.start()
+                docker_available = True
+            except Exception as e:
+                print(f"Sandbox pool not available: {e}")
+        _docker_probed = True
+    return docker_available
+
+# Built binaries keyed by source, language, compiler version and flags
+compile_cache = CompileCache()
+
+# Per-job directories for sources, binaries and launcher reports
+workspaces = WorkspaceManager()
+
+# Keep the backend's own threads and unpinned runs off the isolated CPUs
+reserve_host_cores()
+
+# One circuit breaker per execution backend (see route())
+breakers = {backend: CircuitBreaker(backend) for backend in ('docker', 'local')}
+
+# Background workers for job-submission mode on /run
+job_queue = JobQueue()
+
+# Upper bounds for benchmark mode on /run
+BENCHMARK_MAX_SIZES = 20
+BENCHMARK_MAX_WARMUP = 10
+BENCHMARK_MAX_TRIALS = 50
+
+# Batch execution limits for /run_batch
+BATCH_MAX_ENTRIES = int(os.getenv('BATCH_MAX_ENTRIES', '10'))
+BATCH_COMPILE_WORKERS = os.cpu_count() or 1
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '2'))
+
+# Defaults for interleaved comparisons
+COMPARE_DEFAULT_TRIALS = 10
+COMPARE_ALPHA = 0.05
+
+# Optimization profiles for flag-matrix runs: name -> (compiler, flags).
+# The compiler picks the language frontend, so C code can also be built as C++.
+OPTIMIZATION_LEVELS = {
+    'O0': ['-O0'],
+    'O2': ['-O2'],
+    'O3': ['-O3'],
+    'O3-native': ['-O3', '-march=native'],
+}
+OPTIMIZATION_PROFILES = {
+    f"{compiler}-{level}": (compiler, flags)
+    for compiler in ('gcc', 'g++')
+    for level, flags in OPTIMIZATION_LEVELS.items()
+}
+# C is not a subset of C++ (e.g. malloc without a cast), so C code only gets
+# g++ profiles when they are asked for explicitly
+DEFAULT_PROFILES = {
+    'c': ['gcc-O0', 'gcc-O2', 'gcc-O3', 'gcc-O3-native'],
+    'cpp': ['g++-O0', 'g++-O2', 'g++-O3', 'g++-O3-native'],
+}
+
+# Extra compiler flags applied to every build (part of the cache key)
+COMPILE_FLAGS = []
+
+# Launcher that times the user's program from inside the sandbox (see sandbox/measure.c)
+LAUNCHER_SOURCE = os.path.join(os.path.dirname(__file__), '..', 'sandbox', 'measure.c')
+LAUNCHER_FLAGS = ['-O2']
+_launchers = {}
+
+_compiler_versions = {}
+_compiler_versions_lock = threading.Lock()
+
+@contextmanager
+def acquire_sandbox():
+    """Borrow a pooled container, recording how long we waited for it and
+    how long handing it back (emptying its job directory) took"""
+    start = time.perf_counter()
+    released = None
     try:
-        # Create a temporary directory for this execution
-        temp_dir = tempfile.mkdtemp()
-        
-        # Create a temporary file for the code
-        extension = '.cpp' if language == 'cpp' else '.c'
-        filename = f"code_{uuid.uuid4()}{extension}"
-        filepath = os.path.join(temp_dir, filename)
-        output_path = os.path.join(temp_dir, "a.out")
-        
-        with open(filepath, 'w') as f:
-            f.write(code)
-        
-        # Prepare compiler command
+        with sandbox_pool.acquire() as sandbox:
+            PHASE_SECONDS.observe(time.perf_counter() - start, phase='container_acquire', backend='docker')
+            try:
+                yield sandbox
+            finally:
+                released = time.perf_counter()
+    finally:
+        if released is not None:
+            PHASE_SECONDS.observe(time.perf_counter() - released, phase='cleanup', backend='docker')
+
+def get_compiler_version(compiler, backend):
+    """First line of `<compiler> --version` for the given backend, cached per process"""
+    cache_key = (backend, compiler)
+    with _compiler_versions_lock:
+        if cache_key in _compiler_versions:
+            return _compiler_versions[cache_key]
+
+    if backend == 'docker':
+        with acquire_sandbox() as sandbox:
+            exit_code, stdout, _ = sandbox.exec([compiler, '--version'], timeout=10, user_code=False)
+        version = stdout.decode(errors='replace').splitlines()[0] if exit_code == 0 and stdout else 'unknown'
+        version = f"docker:{sandbox_pool.image}:{version}"
+    else:
+        try:
+            process = subprocess.run([compiler, '--version'], capture_output=True, text=True, timeout=10)
+            version = process.stdout.splitlines()[0] if process.stdout else 'unknown'
+        except (OSError, subprocess.TimeoutExpired):
+            version = 'unknown'
+        version = f"local:{platform.machine()}:{version}"
+
+    with _compiler_versions_lock:
+        _compiler_versions[cache_key] = version
+    return version
+
+def pch_builder_docker(language, flags):
+    """Build the harness precompiled header in the toolchain container"""
+    def build(header_path, output_path):
         compiler = 'g++' if language == 'cpp' else 'gcc'
-        compile_cmd = f"{compiler} /tmp/{filename} -o /tmp/a.out"
-        
-        # Run GCC container to compile
+        header_kind = 'c++-header' if language == 'cpp' else 'c-header'
+        with sandbox_pool.builder() as builder:
+            exit_code, _, stderr = builder.exec(
+                [compiler, *flags, '-x', header_kind, builder.path(header_path), '-o', builder.path(output_path)],
+                timeout=60,
+                user_code=False
+            )
+        if exit_code != 0:
+            print(f"Precompiled header build failed: {stderr.decode(errors='replace')}")
+            return False
+        return True
+    return build
+
+def pch_builder_local(language, flags):
+    """Build the harness precompiled header with the local toolchain"""
+    def build(header_path, output_path):
+        compiler = 'g++' if language == 'cpp' else 'gcc'
+        header_kind = 'c++-header' if language == 'cpp' else 'c-header'
         try:
-            compile_result = docker_client.containers.run(
-                'gcc:latest',
-                compile_cmd,
-                volumes={temp_dir: {'bind': '/tmp', 'mode': 'rw'}},
-                remove=True,
-                mem_limit='256m',
-                timeout=30,
-                network_disabled=True,
-                stderr=True,
-                stdout=True
+            process = subprocess.run(
+                [compiler, *flags, '-x', header_kind, header_path, '-o', output_path],
+                capture_output=True,
+                text=True,
+                timeout=60
             )
-            print("Compilation successful")
-        except docker.errors.ContainerError as e:
-            error_msg = e.stderr.decode() if e.stderr else str(e)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Precompiled header build failed: {e}")
+            return False
+        if process.returncode != 0:
+            print(f"Precompiled header build failed: {process.stderr}")
+            return False
+        return True
+    return build
+
+def compile_code_docker(code, language, flags=None, trusted=False):
+    """Compile code inside a pooled sandbox, reusing a cached binary when possible.
+
+    trusted=True builds our own tools (launcher, calibration workload) in the
+    toolchain container instead, cached apart from anything built in the pool.
+    """
+    flags = COMPILE_FLAGS if flags is None else flags
+    compiler = 'g++' if language == 'cpp' else 'gcc'
+    try:
+        toolchain = f"{get_compiler_version(compiler, 'docker')} harness:{HARNESS_HASH}"
+        if trusted:
+            toolchain += ' trusted'
+        cache_key = compile_cache.make_key(code, language, toolchain, flags)
+        cached = compile_cache.lookup(cache_key)
+        if cached:
+            return {'success': True, 'binary': cached, 'cache': 'hit', 'cache_key': cache_key}
+
+        # The timing harness header is always on the include path; its
+        # precompiled form is only built once someone actually includes it
+        if uses_harness(code):
+            ensure_pch('docker', language, flags, pch_builder_docker(language, flags))
+        
+        binary = None
+        with (sandbox_pool.builder() if trusted else acquire_sandbox()) as sandbox:
+            # The container's own job directory, emptied when it is handed back
+            extension = '.cpp' if language == 'cpp' else '.c'
+            filepath = os.path.join(sandbox.workdir, f"code{extension}")
+            output_path = os.path.join(sandbox.workdir, "a.out")
+            with open(filepath, 'w') as f:
+                f.write(code)
+            
+            # Paths as seen from inside the sandbox
+            compile_cmd = [compiler, *flags, '-I', sandbox.path(harness_dir('docker')),
+                           sandbox.path(filepath), '-o', sandbox.path(output_path)]
+            with PHASE_SECONDS.time(phase='compile', backend='docker'):
+                exit_code, _, stderr = sandbox.exec(compile_cmd, timeout=30, user_code=False)
+            if exit_code == 0 and os.path.exists(output_path):
+                binary = compile_cache.store(cache_key, output_path)
+        
+        if exit_code == TIMEOUT_EXIT_CODE:
+            TIMEOUTS.inc(stage='compile', backend='docker')
             return {
                 'success': False,
-                'error': f"Compilation error: {error_msg}"
+                'error': 'Compilation timeout (30 seconds)'
             }
-        
-        # Check if compilation produced an executable
-        if not os.path.exists(output_path):
+        if exit_code in COMMAND_NOT_RUN_EXIT_CODES:
+            return infra_error(f"Compiler unavailable in sandbox: {stderr.decode(errors='replace')}")
+        if exit_code != 0:
+            COMPILE_ERRORS.inc(backend='docker')
             return {
                 'success': False,
-                'error': "Compilation failed: No executable produced"
+                'error': f"Compilation error: {stderr.decode(errors='replace')}"
             }
         
-        # Run the compiled program
-        start_time = time.time()
-        try:
-            result = docker_client.containers.run(
-                'gcc:latest',
-                '/tmp/a.out',
-                volumes={temp_dir: {'bind': '/tmp', 'mode': 'ro'}},
-                remove=True,
-                mem_limit='256m',
-                timeout=10,
-                network_disabled=True,
-                stderr=True,
-                stdout=True
-            )
-            end_time = time.time()
-            
-            output = result.decode('utf-8') if result else ""
-            
-        except docker.errors.ContainerError as e:
+        # Check if compilation produced an executable
+        if not binary:
+            return infra_error("Compilation failed: No executable produced")
+        print("Compilation successful")
+        
+        return {
+            'success': True,
+            'binary': binary,
+            'cache': 'miss',
+            'cache_key': cache_key
+        }
+        
+    except SandboxError as e:
+        return infra_error(f'Sandbox unavailable: {str(e)}')
+    except Exception as e:
+        return infra_error(f'Execution error: {str(e)}')
+
+def release_binary(compiled):
+    """Unpin the cached binary of a compile_code-style result so it can be evicted again"""
+    cache_key = compiled.pop('cache_key', None)
+    if cache_key:
+        compile_cache.release(cache_key)
+
+def get_launcher(backend):
+    """Path of the measuring launcher built for `backend`, or None if it can't be built.
+
+    The launcher stays pinned in the compile cache while it is remembered here.
+    """
+    compiled = _launchers.get(backend)
+    if compiled and os.path.exists(compiled['binary']):
+        return compiled['binary']
+    
+    with open(LAUNCHER_SOURCE) as f:
+        source = f.read()
+    if backend == 'docker':
+        compiled = compile_code_docker(source, 'c', LAUNCHER_FLAGS, trusted=True)
+    else:
+        compiled = compile_code_local(source, 'c', LAUNCHER_FLAGS)
+    if not compiled['success']:
+        print(f"Measuring launcher unavailable for {backend}: {compiled['error']}")
+        return None
+    
+    previous = _launchers.get(backend)
+    _launchers[backend] = compiled
+    if previous:
+        release_binary(previous)
+    return compiled['binary']
+
+def read_measurement(report_path):
+    """Parse the launcher's JSON report into the fields stored in execution_logs"""
+    try:
+        with open(report_path) as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    return {
+        'wall_ms': report['wall_ms'],
+        'cpu_user_ms': report['user_ms'],
+        'cpu_sys_ms': report['sys_ms'],
+        'peak_rss_kb': report['max_rss_kb'],
+        'exit_status': report['exit_code'] if not report['signal'] else -report['signal']
+    }
+
+def describe_exit(exit_code, metrics):
+    if metrics and metrics['exit_status'] < 0:
+        return f"killed by signal {-metrics['exit_status']}"
+    return f"exit code {exit_code}"
+
+def docker_run_command(sandbox, launcher, binary, args=(), env=None, stdin_path=None):
+    """Command and environment that run `binary` in `sandbox` through the measuring launcher.
+
+    The launcher report and harness timings go to the container's job directory.
+    """
+    cmd = [sandbox.path(binary), *args]
+    if launcher:
+        stdin_args = ['-i', container_dataset_path(stdin_path)] if stdin_path else []
+        report_path = os.path.join(sandbox.workdir, 'report.json')
+        cmd = [sandbox.path(launcher), *stdin_args, sandbox.path(report_path), *cmd]
+    elif stdin_path:
+        cmd = ['sh', '-c', f'exec "$@" < {container_dataset_path(stdin_path)}', 'sh', *cmd]
+    timings_path = os.path.join(sandbox.workdir, 'timings.tsv')
+    return cmd, {'DAALAB_TIMINGS_FILE': sandbox.path(timings_path), **(env or {})}
+
+def run_binary_docker(binary, timeout=10, args=(), env=None, stdin_path=None, cpus=None):
+    """Run an already compiled binary inside a pooled sandbox through the measuring launcher.
+
+    With `cpus`, the container is moved to that cpuset for the run.
+    """
+    try:
+        # Built (or found) before borrowing a container: building it needs one too
+        launcher = get_launcher('docker')
+        with acquire_sandbox() as sandbox:
+            cmd, run_env = docker_run_command(sandbox, launcher, binary, args, env, stdin_path)
+            pinning = sandbox.pinned(cpu_list(cpus), sandbox_pool.default_cpuset()) if cpus else nullcontext()
+            with pinning:
+                start_time = time.time()
+                with PHASE_SECONDS.time(phase='execute', backend='docker'):
+                    exit_code, stdout, stderr = sandbox.exec(cmd, timeout=timeout, environment=run_env)
             end_time = time.time()
-            error_msg = e.stderr.decode() if e.stderr else str(e)
+            # Read before the job directory is emptied
+            metrics = read_measurement(os.path.join(sandbox.workdir, 'report.json'))
+            timings = parse_timings(os.path.join(sandbox.workdir, 'timings.tsv'))
+        
+        if exit_code == TIMEOUT_EXIT_CODE:
+            TIMEOUTS.inc(stage='run', backend='docker')
             return {
                 'success': False,
-                'error': f"Runtime error: {error_msg}"
+                'error': f'Execution timeout ({timeout} seconds)'
             }
         
-        # Clean up
-        try:
-            import shutil
-            shutil.rmtree(temp_dir)
-        except Exception as cleanup_error:
-            print(f"Cleanup warning: {cleanup_error}")
+        if exit_code != 0:
+            error_msg = stderr.decode(errors='replace') or describe_exit(exit_code, metrics)
+            return {
+                'success': False,
+                'error': f"Runtime error: {error_msg}",
+                'metrics': metrics
+            }
         
         return {
             'success': True,
-            'output': output.strip(),
-            'runtime_ms': (end_time - start_time) * 1000
+            'output': stdout.decode('utf-8', errors='replace').strip(),
+            **output_digest(stdout),
+            # Prefer the in-sandbox measurement; the exec round trip is only a fallback
+            'runtime_ms': metrics['wall_ms'] if metrics else (end_time - start_time) * 1000,
+            'metrics': metrics,
+            'timings': timings
         }
         
+    except SandboxError as e:
+        return infra_error(f'Sandbox unavailable: {str(e)}')
     except Exception as e:
-        return {
-            'success': False,
-            'error': f'Execution error: {str(e)}'
-        }
+        return infra_error(f'Execution error: {str(e)}')
 
-def execute_code_local(code, language):
-    """Fallback: Execute code using local system (less secure but functional)"""
+def execute_code_docker(code, language, args=(), env=None, stdin_path=None):
+    """Execute code inside containers borrowed from the sandbox pool"""
+    compiled = compile_code_docker(code, language)
+    if not compiled['success']:
+        return compiled
+    
     try:
-        # Create a temporary directory
-        temp_dir = tempfile.mkdtemp()
+        result = run_binary_docker(compiled['binary'], args=args, env=env, stdin_path=stdin_path)
+    finally:
+        release_binary(compiled)
+    result['compile_cache'] = compiled['cache']
+    return result
+
+def compile_code_local(code, language, flags=None):
+    """Compile code with the local toolchain, reusing a cached binary when possible"""
+    flags = COMPILE_FLAGS if flags is None else flags
+    compiler = 'g++' if language == 'cpp' else 'gcc'
+    temp_dir = None
+    try:
+        toolchain = f"{get_compiler_version(compiler, 'local')} harness:{HARNESS_HASH}"
+        cache_key = compile_cache.make_key(code, language, toolchain, flags)
+        cached = compile_cache.lookup(cache_key)
+        if cached:
+            return {'success': True, 'binary': cached, 'cache': 'hit', 'cache_key': cache_key}
+
+        # Create a job directory
+        temp_dir = workspaces.take()
         
         # Create temporary file for code
         extension = '.cpp' if language == 'cpp' else '.c'
@@ -138,85 +460,1320 @@ def execute_code_local(code, language):
         with open(code_file, 'w') as f:
             f.write(code)
         
+        if uses_harness(code):
+            ensure_pch('local', language, flags, pch_builder_local(language, flags))
+        
         # Compile
-        compiler = 'g++' if language == 'cpp' else 'gcc'
-        compile_process = subprocess.run(
-            [compiler, code_file, '-o', exe_file],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        with PHASE_SECONDS.time(phase='compile', backend='local'):
+            compile_process = subprocess.run(
+                [compiler, *flags, '-I', harness_dir('local'), code_file, '-o', exe_file],
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
         
         if compile_process.returncode != 0:
+            COMPILE_ERRORS.inc(backend='local')
             return {
                 'success': False,
                 'error': f"Compilation error: {compile_process.stderr}"
             }
         
-        # Execute
-        start_time = time.time()
-        exec_process = subprocess.run(
-            [exe_file],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        end_time = time.time()
+        return {
+            'success': True,
+            'binary': compile_cache.store(cache_key, exe_file),
+            'cache': 'miss',
+            'cache_key': cache_key
+        }
         
+    except subprocess.TimeoutExpired:
+        TIMEOUTS.inc(stage='compile', backend='local')
+        return {
+            'success': False,
+            'error': 'Compilation timeout (30 seconds)'
+        }
+    except Exception as e:
+        return infra_error(f'Execution error: {str(e)}')
+    finally:
         # Clean up
-        try:
-            import shutil
-            shutil.rmtree(temp_dir)
-        except:
-            pass
+        if temp_dir:
+            with PHASE_SECONDS.time(phase='cleanup', backend='local'):
+                workspaces.release(temp_dir)
+
+def local_run_command(binary, report_dir, args=(), env=None, stdin_path=None, cpus=None):
+    """Command, stdin and environment that run `binary` locally through the measuring launcher.
+
+    With `cpus`, the launcher pins the program to them (sched_setaffinity).
+    """
+    launcher = get_launcher('local')
+    cmd = [binary, *args]
+    stdin = subprocess.DEVNULL
+    if launcher:
+        stdin_args = ['-i', stdin_path] if stdin_path else []
+        cpu_args = ['-c', cpu_list(cpus)] if cpus else []
+        cmd = [launcher, *stdin_args, *cpu_args, os.path.join(report_dir, 'report.json'), *cmd]
+    elif stdin_path:
+        stdin = open(stdin_path, 'rb')
+    
+    # Don't leak the backend's environment (database keys) into user programs
+    run_env = {
+        'PATH': os.environ.get('PATH', '/usr/bin:/bin'),
+        'DAALAB_TIMINGS_FILE': os.path.join(report_dir, 'timings.tsv'),
+        **(env or {})
+    }
+    return cmd, stdin, run_env
+
+def run_binary_local(binary, timeout=5, args=(), env=None, stdin_path=None, cpus=None):
+    """Run an already compiled binary on the local system through the measuring launcher"""
+    report_dir = None
+    try:
+        report_dir = workspaces.take()
+        report_path = os.path.join(report_dir, 'report.json')
+        timings_path = os.path.join(report_dir, 'timings.tsv')
+        cmd, stdin, run_env = local_run_command(binary, report_dir, args, env, stdin_path, cpus)
         
+        start_time = time.time()
+        with PHASE_SECONDS.time(phase='execute', backend='local'):
+            # New session so a timeout can kill the launcher and the program together
+            exec_process = subprocess.Popen(
+                cmd,
+                stdin=stdin,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                env=run_env,
+                start_new_session=True
+            )
+            try:
+                stdout, stderr = exec_process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                os.killpg(exec_process.pid, signal.SIGKILL)
+                exec_process.communicate()
+                raise
+            finally:
+                if stdin is not subprocess.DEVNULL:
+                    stdin.close()
+        end_time = time.time()
+        
+        metrics = read_measurement(report_path)
         if exec_process.returncode != 0:
             return {
                 'success': False,
-                'error': f"Runtime error: {exec_process.stderr}"
+                'error': f"Runtime error: {stderr or describe_exit(exec_process.returncode, metrics)}",
+                'metrics': metrics
             }
         
         return {
             'success': True,
-            'output': exec_process.stdout.strip(),
-            'runtime_ms': (end_time - start_time) * 1000
+            'output': stdout.strip(),
+            **output_digest(stdout.encode('utf-8')),
+            'runtime_ms': metrics['wall_ms'] if metrics else (end_time - start_time) * 1000,
+            'metrics': metrics,
+            'timings': parse_timings(timings_path)
         }
         
     except subprocess.TimeoutExpired:
+        TIMEOUTS.inc(stage='run', backend='local')
         return {
             'success': False,
-            'error': 'Execution timeout (5 seconds)'
+            'error': f'Execution timeout ({timeout} seconds)'
         }
     except Exception as e:
+        return infra_error(f'Execution error: {str(e)}')
+    finally:
+        if report_dir:
+            with PHASE_SECONDS.time(phase='cleanup', backend='local'):
+                workspaces.release(report_dir)
+
+def execute_code_local(code, language, args=(), env=None, stdin_path=None):
+    """Fallback: Execute code using local system (less secure but functional)"""
+    compiled = compile_code_local(code, language)
+    if not compiled['success']:
+        return compiled
+    
+    try:
+        result = run_binary_local(compiled['binary'], args=args, env=env, stdin_path=stdin_path)
+    finally:
+        release_binary(compiled)
+    result['compile_cache'] = compiled['cache']
+    return result
+
+def infra_error(message):
+    """Error result for a failure of the execution backend itself, not of the user's code"""
+    return {'success': False, 'error': message, 'error_kind': 'infra'}
+
+def is_infra_error(result):
+    return not result['success'] and result.get('error_kind') == 'infra'
+
+def _record_outcome(breaker, operation, start, result):
+    # Errors in the user's code mean the backend worked
+    if result is None:
+        breaker.abandon()
+    elif is_infra_error(result):
+        breaker.record_failure(result['error'])
+    else:
+        breaker.record_success(operation, time.perf_counter() - start)
+
+def call_backend(backend, operation, fn, *args, **kwargs):
+    """Call `fn` on `backend` through its circuit breaker; None if the circuit is open"""
+    breaker = breakers[backend]
+    if not breaker.allow():
+        return None
+    start = time.perf_counter()
+    result = None
+    try:
+        result = fn(*args, **kwargs)
+    except Exception as e:
+        result = infra_error(str(e))
+        raise
+    finally:
+        _record_outcome(breaker, operation, start, result)
+    return result
+
+def route(operation, attempts):
+    """Run `operation` on the first usable backend.
+
+    `attempts` maps backend names, in order of preference, to callables.
+    Fails over to the next backend only on infrastructure errors (sandbox or
+    toolchain failures, open circuits); errors in the user's code are
+    returned as they are.
+    """
+    result = None
+    for index, (backend, attempt) in enumerate(attempts.items()):
+        fallback = index < len(attempts) - 1
+        if backend == 'docker' and not docker_ready():
+            FALLBACKS.inc(reason='docker_unavailable')
+            continue
+        outcome = call_backend(backend, operation, attempt)
+        if outcome is None:
+            if fallback:
+                FALLBACKS.inc(reason=f'{backend}_circuit_open')
+            result = infra_error(f'{backend} backend unavailable (circuit open)')
+            continue
+        outcome['backend'] = backend
+        if not is_infra_error(outcome):
+            return outcome
+        print(f"{backend} {operation} failed: {outcome['error']}")
+        if fallback:
+            FALLBACKS.inc(reason=f'{backend}_failed')
+        result = outcome
+    return result or infra_error('No execution backend available')
+
+def execute_code(code, language, args=(), env=None, stdin_path=None):
+    """Compile and run on the preferred healthy backend"""
+    return route('execute', {
+        'docker': lambda: execute_code_docker(code, language, args, env, stdin_path),
+        'local': lambda: execute_code_local(code, language, args, env, stdin_path),
+    })
+
+def compile_code(code, language, flags=None):
+    """Compile once for repeated runs, preferring Docker and falling back to local.
+
+    The binary stays pinned in the compile cache until release_binary().
+    """
+    return route('compile', {
+        'docker': lambda: compile_code_docker(code, language, flags),
+        'local': lambda: compile_code_local(code, language, flags),
+    })
+
+def run_binary(compiled, args=(), env=None, stdin_path=None, cpus=None):
+    """Run a binary produced by compile_code on the backend that built it, optionally pinned to `cpus`"""
+    backend = compiled['backend']
+    run = run_binary_docker if backend == 'docker' else run_binary_local
+    result = call_backend(backend, 'run', run, compiled['binary'], args=args, env=env, stdin_path=stdin_path, cpus=cpus)
+    if result is None:
+        return infra_error(f'{backend} backend unavailable (circuit open)')
+    return result
+
+def stream_binary_docker(binary, output, timeout=10, args=(), env=None, stdin_path=None):
+    """Run a compiled binary in a sandbox, yielding (stream, text) as it writes.
+
+    The last item is ('result', result). The run is cut short (and the
+    container recycled) once `output` reaches its byte cap.
+    """
+    try:
+        launcher = get_launcher('docker')
+        exit_code = None
+        with acquire_sandbox() as sandbox:
+            cmd, run_env = docker_run_command(sandbox, launcher, binary, args, env, stdin_path)
+            start_time = time.time()
+            with PHASE_SECONDS.time(phase='execute', backend='docker'):
+                chunks = sandbox.exec_stream(cmd, timeout=timeout, environment=run_env)
+                try:
+                    while True:
+                        stream, chunk = next(chunks)
+                        text = output.feed(stream, chunk)
+                        if text:
+                            yield stream, text
+                        if output.truncated:
+                            chunks.close()
+                            break
+                except StopIteration as done:
+                    exit_code = done.value
+            elapsed_ms = (time.time() - start_time) * 1000
+            result = finish_stream(exit_code, output, timeout, sandbox.workdir, 'docker', elapsed_ms)
+        
+        yield 'result', result
+    except SandboxError as e:
+        yield 'result', infra_error(f'Sandbox unavailable: {str(e)}')
+
+def stream_binary_local(binary, output, timeout=5, args=(), env=None, stdin_path=None):
+    """Run a compiled binary locally, yielding (stream, text) as it writes.
+
+    Same protocol as stream_binary_docker. The pipes are read as data
+    arrives, so memory stays bounded by the byte cap whatever the program
+    prints, and the process group is killed if the client goes away.
+    """
+    report_dir = None
+    process = None
+    stdin = subprocess.DEVNULL
+    try:
+        report_dir = workspaces.take()
+        cmd, stdin, run_env = local_run_command(binary, report_dir, args, env, stdin_path)
+        start_time = time.time()
+        with PHASE_SECONDS.time(phase='execute', backend='local'):
+            process = subprocess.Popen(
+                cmd,
+                stdin=stdin,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=run_env,
+                start_new_session=True
+            )
+            selector = selectors.DefaultSelector()
+            selector.register(process.stdout, selectors.EVENT_READ, 'stdout')
+            selector.register(process.stderr, selectors.EVENT_READ, 'stderr')
+            deadline = time.monotonic() + timeout
+            timed_out = False
+            while selector.get_map() and not output.truncated:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                for key, _ in selector.select(remaining):
+                    chunk = os.read(key.fd, 65536)
+                    if not chunk:
+                        selector.unregister(key.fileobj)
+                        continue
+                    text = output.feed(key.data, chunk)
+                    if text:
+                        yield key.data, text
+                    if output.truncated:
+                        break
+            selector.close()
+            if timed_out or output.truncated:
+                os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+        
+        elapsed_ms = (time.time() - start_time) * 1000
+        
+        exit_code = TIMEOUT_EXIT_CODE if timed_out else process.returncode
+        yield 'result', finish_stream(exit_code, output, timeout, report_dir, 'local', elapsed_ms)
+    except WorkspaceError as e:
+        yield 'result', infra_error(f'Execution error: {str(e)}')
+    finally:
+        # Also reached when the client disconnects mid-stream
+        if process and process.poll() is None:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+        if process:
+            process.stdout.close()
+            process.stderr.close()
+        if stdin is not subprocess.DEVNULL:
+            stdin.close()
+        if report_dir:
+            with PHASE_SECONDS.time(phase='cleanup', backend='local'):
+                workspaces.release(report_dir)
+
+def finish_stream(exit_code, output, timeout, report_dir, backend, elapsed_ms):
+    """Result of a streamed run, in the shape returned by run_binary"""
+    if output.truncated:
+        return {
+            'success': False,
+            'error': f'Output limit exceeded ({output.max_bytes} bytes); program stopped',
+            **output.summary()
+        }
+    if exit_code == TIMEOUT_EXIT_CODE:
+        TIMEOUTS.inc(stage='run', backend=backend)
+        return {
+            'success': False,
+            'error': f'Execution timeout ({timeout} seconds)'
+        }
+    metrics = read_measurement(os.path.join(report_dir, 'report.json'))
+    if exit_code != 0:
         return {
             'success': False,
-            'error': f'Execution error: {str(e)}'
+            'error': f"Runtime error: {output.stderr or describe_exit(exit_code, metrics)}",
+            'metrics': metrics
         }
+    return {
+        'success': True,
+        'runtime_ms': metrics['wall_ms'] if metrics else elapsed_ms,
+        'metrics': metrics,
+        'timings': parse_timings(os.path.join(report_dir, 'timings.tsv')),
+        **output.summary()
+    }
+
+def stream_binary(compiled, output, args=(), env=None, stdin_path=None):
+    """Streaming counterpart of run_binary"""
+    backend = compiled['backend']
+    breaker = breakers[backend]
+    if not breaker.allow():
+        yield 'result', infra_error(f'{backend} backend unavailable (circuit open)')
+        return
+    stream_run = stream_binary_docker if backend == 'docker' else stream_binary_local
+    start = time.perf_counter()
+    result = None
+    try:
+        with closing(stream_run(compiled['binary'], output, args=args, env=env, stdin_path=stdin_path)) as chunks:
+            for stream, payload in chunks:
+                if stream == 'result':
+                    result = payload
+                yield stream, payload
+    except Exception as e:
+        result = infra_error(str(e))
+        raise
+    finally:
+        # No result if the client went away mid-run
+        _record_outcome(breaker, 'run', start, result)
 
-def execute_code(code, language):
-    """Main execution function with fallback"""
-    if docker_available:
-        print("Attempting Docker execution...")
-        result = execute_code_docker(code, language)
+_calibrators = {}
+
+def get_calibrator(backend):
+    """The calibration workload built for `backend` (a compile_code-style result).
+
+    Like the launcher, it stays pinned in the compile cache while remembered.
+    """
+    compiled = _calibrators.get(backend)
+    if compiled and os.path.exists(compiled['binary']):
+        return compiled
+    
+    with open(CALIBRATION_SOURCE) as f:
+        source = f.read()
+    if backend == 'docker':
+        compiled = compile_code_docker(source, 'c', LAUNCHER_FLAGS, trusted=True)
+    else:
+        compiled = compile_code_local(source, 'c', LAUNCHER_FLAGS)
+    if not compiled['success']:
+        return compiled
+    compiled['backend'] = backend
+    previous = _calibrators.get(backend)
+    _calibrators[backend] = compiled
+    if previous:
+        release_binary(previous)
+    return compiled
+
+def measure_noise(backend, cpus):
+    """Calibrate on `cpus`, deferring while the host is noisy.
+
+    Re-calibrates up to NOISE_MAX_DEFERRALS times, NOISE_DEFER_SECONDS
+    apart, and returns the last noise figure (status 'noisy' if the host
+    never settled), or an error result if the workload could not run.
+    """
+    calibrator = get_calibrator(backend)
+    if not calibrator['success']:
+        return calibrator
+    
+    for attempt in range(NOISE_MAX_DEFERRALS + 1):
+        if attempt:
+            time.sleep(NOISE_DEFER_SECONDS)
+        samples = []
+        for _ in range(CALIBRATION_RUNS):
+            result = run_binary(calibrator, cpus=cpus)
+            if not result['success']:
+                return result
+            samples.append(result['runtime_ms'])
+        noise = noise_figure(samples)
+        noise['deferrals'] = attempt
+        if noise['status'] == 'ok':
+            break
+    return {'success': True, **noise}
+
+def run_benchmark(compiled, sizes, warmup, trials, input_spec=None, cpus=None):
+    """Run a compiled binary `warmup + trials` times for every input size.
+
+    The size is passed to the program as argv[1] and as DAALAB_N. With an
+    input spec, a dataset of that kind and size is generated (or taken from
+    the cache) and fed to stdin. Every run is pinned to `cpus` if given.
+    Returns per-size summaries (including the trials' robust coefficient of
+    variation) plus a complexity fit over the per-size medians.
+    """
+    series = []
+    for n in sizes:
+        args = [str(n)]
+        env = {'DAALAB_N': str(n)}
+        stdin_path = dataset_path(input_spec['kind'], n, input_spec['seed']) if input_spec else None
+        try:
+            for _ in range(warmup):
+                result = run_binary(compiled, args=args, env=env, stdin_path=stdin_path, cpus=cpus)
+                if not result['success']:
+                    return {**result, 'input_size': n}
+            
+            samples = []
+            measurements = []
+            timings = {}
+            for _ in range(trials):
+                result = run_binary(compiled, args=args, env=env, stdin_path=stdin_path, cpus=cpus)
+                if not result['success']:
+                    return {**result, 'input_size': n}
+                samples.append(result['runtime_ms'])
+                if result.get('metrics'):
+                    measurements.append(result['metrics'])
+                for name, values in (result.get('timings') or {}).items():
+                    timings.setdefault(name, []).extend(values)
+        finally:
+            if stdin_path:
+                release_dataset(stdin_path)
+        
+        series.append({
+            'input_size': n,
+            'samples_ms': samples,
+            'output': result['output'],
+            'metrics': summarize_measurements(measurements),
+            'timings': {name: summarize_samples(values) for name, values in timings.items()} or None,
+            'noise_cv': robust_cv(samples),
+            **summarize_samples(samples)
+        })
+
+    return {
+        'success': True,
+        'series': series,
+        'complexity': fit_complexity(
+            [point['input_size'] for point in series],
+            [point['median_ms'] for point in series]
+        )
+    }
+
+def summarize_measurements(measurements):
+    """Collapse per-trial launcher measurements into one row (medians, worst-case RSS)"""
+    if not measurements:
+        return None
+    
+    def median(field):
+        return float(np.median([m[field] for m in measurements]))
+    
+    return {
+        'wall_ms': median('wall_ms'),
+        'cpu_user_ms': median('cpu_user_ms'),
+        'cpu_sys_ms': median('cpu_sys_ms'),
+        'peak_rss_kb': max(m['peak_rss_kb'] for m in measurements),
+        'exit_status': 0
+    }
+
+def parse_benchmark_options(data):
+    """Validate benchmark parameters from a /run body, returning (options, error)"""
+    sizes = data.get('sizes')
+    isolated = data.get('isolated', False)
+    if not isinstance(isolated, bool):
+        return None, 'isolated must be a boolean'
+    if sizes is None:
+        return None, 'isolated requires sizes' if isolated else None
+    
+    if not isinstance(sizes, list) or not sizes or len(sizes) > BENCHMARK_MAX_SIZES:
+        return None, f'sizes must be a list of 1 to {BENCHMARK_MAX_SIZES} input sizes'
+    if not all(isinstance(n, int) and not isinstance(n, bool) and n > 0 for n in sizes):
+        return None, 'sizes must contain positive integers'
+    
+    warmup = data.get('warmup', 1)
+    trials = data.get('trials', 5)
+    if not isinstance(warmup, int) or not 0 <= warmup <= BENCHMARK_MAX_WARMUP:
+        return None, f'warmup must be between 0 and {BENCHMARK_MAX_WARMUP}'
+    if not isinstance(trials, int) or not 1 <= trials <= BENCHMARK_MAX_TRIALS:
+        return None, f'trials must be between 1 and {BENCHMARK_MAX_TRIALS}'
+    
+    return {'sizes': sorted(set(sizes)), 'warmup': warmup, 'trials': trials, 'isolated': isolated}, None
+
+def parse_input_spec(data, benchmark):
+    """Validate the generated-input spec from a /run body, returning (spec, error).
+
+    In benchmark mode `n` comes from each entry of `sizes`, so only the kind
+    and seed are taken from the spec.
+    """
+    spec = data.get('input')
+    if spec is None:
+        return None, None
+    
+    if benchmark and isinstance(spec, dict):
+        # Validate against the largest size that will be generated
+        spec = {**spec, 'n': max(benchmark['sizes'])}
+    try:
+        kind, n, seed = validate_spec(spec)
+    except DatasetError as e:
+        return None, str(e)
+    
+    if benchmark:
+        return {'kind': kind, 'seed': seed}, None
+    return {'kind': kind, 'n': n, 'seed': seed}, None
+
+def _log_row(algorithm_id, log, created_at):
+    # Runs report the digest of their full stdout; older callers only have the output
+    digest = log if 'output_sha256' in log else output_digest(log['output'].encode('utf-8'))
+    return {
+        'id': str(uuid.uuid4()),
+        'algorithm_id': algorithm_id,
+        'runtime_ms': log['runtime_ms'],
+        'input_size': log.get('input_size'),
+        'profile': log.get('profile'),
+        **(log.get('metrics') or {}),
+        # Bounded prefix (in bytes, without splitting a character); the hash covers the rest
+        'output': log['output'].encode('utf-8')[:OUTPUT_PREFIX_BYTES].decode('utf-8', errors='ignore'),
+        'output_bytes': digest['output_bytes'],
+        'output_sha256': digest['output_sha256'],
+        'created_at': created_at
+    }
+
+def _write_rows(table, rows):
+    """Bulk insert (or upsert, for snapshot tables) used by the write-behind buffer"""
+    storage = get_storage()
+    with PHASE_SECONDS.time(phase='db_write', backend=storage.name):
+        if table in UPSERT_KEYS:
+            # Only the newest snapshot per key matters, and Postgres rejects
+            # an upsert that touches the same row twice
+            latest = {row[UPSERT_KEYS[table]]: row for row in rows}
+            storage.upsert(table, list(latest.values()))
+        elif table in UNIQUE_KEYS:
+            storage.insert_new(table, rows)
+        else:
+            storage.insert(table, rows)
+
+# Algorithms registered in this process whose insert has not been flushed yet,
+# so a second run of a brand-new name reuses the id instead of creating another
+_pending_algorithms = {}
+_pending_algorithms_lock = threading.Lock()
+
+def _forget_flushed_algorithms(table, rows):
+    if table != 'algorithms':
+        return
+    # Another process may have registered the same name first, in which case
+    # our insert was skipped: adopt its id for everything still queued
+    by_user = {}
+    for row in rows:
+        by_user.setdefault(row['user_id'], []).append(row)
+    storage = get_storage()
+    replaced = {}
+    for user_id, user_rows in by_user.items():
+        with PHASE_SECONDS.time(phase='db_lookup', backend=storage.name):
+            found = storage.find_algorithm_ids(user_id, [row['name'] for row in user_rows])
+        for row in user_rows:
+            winner = found.get(row['name'])
+            if winner and winner != row['id']:
+                replaced[row['id']] = winner
+                algorithm_id_cache.put(user_id, row['name'], winner)
+    if replaced:
+        print(f"Merged {len(replaced)} algorithms registered concurrently elsewhere")
+        write_buffer.rewrite('algorithm_id', replaced, drop_tables=UPSERT_KEYS)
+    with _pending_algorithms_lock:
+        for row in rows:
+            _pending_algorithms.pop((row['user_id'], row['name']), None)
+
+def _forget_dropped_algorithms(table, rows):
+    """Algorithms whose insert was given up never exist: stop handing out their ids"""
+    if table != 'algorithms':
+        return
+    with _pending_algorithms_lock:
+        for row in rows:
+            _pending_algorithms.pop((row['user_id'], row['name']), None)
+            algorithm_id_cache.invalidate(row['user_id'], row['name'])
+
+# Persistence happens off the request path, in bulk
+write_buffer = WriteBehindBuffer(
+    _write_rows,
+    ['algorithms', 'execution_logs', 'algorithm_stats', 'performance_markers'],
+    on_flushed=_forget_flushed_algorithms,
+    on_dropped=_forget_dropped_algorithms
+)
+
+def resolve_algorithm_ids(user_id, names, languages=None):
+    """Map algorithm names of `user_id` to ids: the single lookup/register path.
+
+    Names are answered from the id cache (or from registrations still in the
+    write-behind buffer) first; the rest cost one select, whose results are
+    cached. When `languages` ({name: language}) is given, names that still
+    do not exist are registered with a client-side UUID and cached right
+    away, so a first-time name is never looked up twice. (user_id, name) is
+    unique in the database: if another process registers the same name
+    first, our insert is skipped and its id replaces ours once the buffer
+    flushes (see _forget_flushed_algorithms).
+    """
+    algorithm_ids = {}
+    lookup = []
+    for name in dict.fromkeys(names):
+        algorithm_id = algorithm_id_cache.get(user_id, name)
+        if not algorithm_id:
+            with _pending_algorithms_lock:
+                algorithm_id = _pending_algorithms.get((user_id, name))
+        if algorithm_id:
+            algorithm_ids[name] = algorithm_id
+        else:
+            lookup.append(name)
+    
+    if lookup:
+        storage = get_storage()
+        with PHASE_SECONDS.time(phase='db_lookup', backend=storage.name):
+            found = storage.find_algorithm_ids(user_id, lookup)
+        for name, algorithm_id in found.items():
+            if name not in algorithm_ids:
+                algorithm_ids[name] = algorithm_id
+                algorithm_id_cache.put(user_id, name, algorithm_id)
+    
+    if languages is None:
+        return algorithm_ids
+    
+    created_at = datetime.utcnow().isoformat()
+    new_algorithms = []
+    with _pending_algorithms_lock:
+        for name in lookup:
+            if name in algorithm_ids:
+                continue
+            # Another request may have registered it since our lookup
+            algorithm_id = _pending_algorithms.get((user_id, name))
+            if not algorithm_id:
+                algorithm_id = str(uuid.uuid4())
+                _pending_algorithms[(user_id, name)] = algorithm_id
+                new_algorithms.append({
+                    'id': algorithm_id,
+                    'name': name,
+                    'description': f'Algorithm: {name}',
+                    'user_id': user_id,
+                    'language': languages[name],
+                    'created_at': created_at
+                })
+            algorithm_ids[name] = algorithm_id
+            algorithm_id_cache.put(user_id, name, algorithm_id)
+    if new_algorithms:
+        write_buffer.enqueue('algorithms', new_algorithms)
+    return algorithm_ids
+
+def lookup_algorithm_id(user_id, algorithm_name):
+    """Id of an existing algorithm, or None"""
+    return resolve_algorithm_ids(user_id, [algorithm_name]).get(algorithm_name)
+
+# Rolling runtime statistics per algorithm, kept in memory and snapshotted to
+# algorithm_stats through the write-behind buffer
+stats_cache = StatsCache()
+
+def load_algorithm_stats(algorithm_ids):
+    """{algorithm_id: RunningStats}, from memory, the stored snapshot, or (once,
+    for algorithms logged before statistics existed) a scan of their history"""
+    found = {}
+    missing = []
+    for algorithm_id in dict.fromkeys(algorithm_ids):
+        stats = stats_cache.get(algorithm_id)
+        if stats is not None:
+            found[algorithm_id] = stats
+        else:
+            missing.append(algorithm_id)
+    if not missing:
+        return found
+    
+    storage = get_storage()
+    with PHASE_SECONDS.time(phase='db_read', backend=storage.name):
+        snapshots = storage.get_algorithm_stats(missing)
+    for algorithm_id in missing:
+        if algorithm_id in snapshots:
+            stats = RunningStats(snapshots[algorithm_id])
+        else:
+            stats = RunningStats()
+            with PHASE_SECONDS.time(phase='db_read', backend=storage.name):
+                for row in iter_execution_logs(storage, algorithm_id, columns=('id', 'created_at', 'runtime_ms')):
+                    stats.add(row['runtime_ms'])
+            if stats.count:
+                write_buffer.enqueue('algorithm_stats', [_stats_row(algorithm_id, stats.state())])
+        found[algorithm_id] = stats_cache.add(algorithm_id, stats)
+    return found
+
+def _stats_row(algorithm_id, state):
+    return {'algorithm_id': algorithm_id, **state, 'updated_at': datetime.utcnow().isoformat()}
+
+def update_algorithm_stats(runtimes_by_algorithm):
+    """Fold new runtimes ({algorithm_id: [ms, ...]}) into the rolling statistics"""
+    loaded = load_algorithm_stats(list(runtimes_by_algorithm))
+    rows = []
+    for algorithm_id, runtimes in runtimes_by_algorithm.items():
+        state, _ = stats_cache.update(algorithm_id, loaded[algorithm_id], runtimes)
+        rows.append(_stats_row(algorithm_id, state))
+    write_buffer.enqueue('algorithm_stats', rows)
+
+def store_executions(user_id, submissions):
+    """Register algorithms and queue execution logs for many submissions at once.
+
+    `submissions` is a list of (algorithm_name, language, logs). Ids come
+    from resolve_algorithm_ids, and all log rows go through the write-behind
+    buffer without waiting for the database. Returns {algorithm_name: algorithm_id}.
+    """
+    algorithm_ids = {}
+    try:
+        languages = {name: language for name, language, _ in submissions}
+        algorithm_ids = resolve_algorithm_ids(user_id, list(languages), languages)
+        
+        runtimes = {}
+        for name, _, logs in submissions:
+            runtimes.setdefault(algorithm_ids[name], []).extend(log['runtime_ms'] for log in logs)
+        try:
+            # Before the logs are queued, so a first-time backfill can't count them twice
+            update_algorithm_stats(runtimes)
+        except Exception as e:
+            print(f"Error updating algorithm statistics: {e}")
+        
+        created_at = datetime.utcnow().isoformat()
+        write_buffer.enqueue('execution_logs', [
+            _log_row(algorithm_ids[name], log, created_at)
+            for name, _, logs in submissions
+            for log in logs
+        ])
+        
+    except Exception as db_error:
+        print(f"Database error: {db_error}")
+        # Continue execution even if database logging fails
+    return algorithm_ids
+
+def check_performance(user_id, algorithm_name, logs):
+    """Compare each new log with the algorithm's history at the same input size
+    and profile, before the new rows are stored.
+
+    Logs may carry `samples_ms` (benchmark trials); otherwise their single
+    runtime is tested. Every regression or improvement is stored as a
+    performance marker for the visualizer. Returns one result per log.
+    """
+    try:
+        algorithm_id = lookup_algorithm_id(user_id, algorithm_name)
+        storage = get_storage()
+        results = []
+        markers = []
+        for log in logs:
+            history = []
+            if algorithm_id:
+                with PHASE_SECONDS.time(phase='db_read', backend=storage.name):
+                    history = storage.recent_runtimes(algorithm_id, log.get('input_size'), log.get('profile'), REGRESSION_HISTORY)
+            result = detect_change(history, log.get('samples_ms') or [log['runtime_ms']])
+            results.append(result)
+            if result['status'] in ('regression', 'improvement'):
+                markers.append({
+                    'id': str(uuid.uuid4()),
+                    'algorithm_id': algorithm_id,
+                    'kind': result['status'],
+                    'input_size': log.get('input_size'),
+                    'profile': log.get('profile'),
+                    'change': result['change'],
+                    'p_value': result['p_value'],
+                    'baseline_median_ms': result['baseline_median_ms'],
+                    'median_ms': result['median_ms'],
+                    'created_at': datetime.utcnow().isoformat()
+                })
+        if markers:
+            write_buffer.enqueue('performance_markers', markers)
+        return results
+    except Exception as e:
+        print(f"Error checking for regressions: {e}")
+        return [None] * len(logs)
+
+def store_execution(user_id, algorithm_name, language, logs):
+    """Register the algorithm if needed and log the execution rows, returning the algorithm id"""
+    return store_executions(user_id, [(algorithm_name, language, logs)]).get(algorithm_name)
+
+def process_benchmark(user_id, algorithm_name, code, language, benchmark, input_spec=None):
+    """Compile once, benchmark across input sizes and log one row per size"""
+    print(f"Benchmarking {language} code for algorithm: {algorithm_name} (sizes={benchmark['sizes']})")
+    compiled = compile_code(code, language)
+    if not compiled['success']:
+        return compiled, 400
+    
+    noise = None
+    try:
+        if benchmark['isolated']:
+            # Calibrate and measure on the dedicated cores, one isolated benchmark at a time
+            try:
+                with isolated_cores() as cpus:
+                    noise = measure_noise(compiled['backend'], cpus)
+                    if not noise.pop('success'):
+                        return {**noise, 'success': False, 'error': f"Calibration failed: {noise['error']}"}, 500
+                    result = run_benchmark(compiled, benchmark['sizes'], benchmark['warmup'], benchmark['trials'],
+                                           input_spec, cpus)
+            except IsolationError as e:
+                return {'success': False, 'error': str(e)}, 503
+            noise['isolated_cpus'] = cpus
+            noise['pinned'] = bool(cpus)
+        else:
+            result = run_benchmark(compiled, benchmark['sizes'], benchmark['warmup'], benchmark['trials'], input_spec)
+    finally:
+        release_binary(compiled)
+    if not result['success']:
+        return result, 400
+
+    # One row per input size (median of the trials) so runtime can be charted against n
+    logs = [{
+        'runtime_ms': point['median_ms'],
+        'input_size': point['input_size'],
+        'samples_ms': point['samples_ms'],
+        'metrics': point['metrics'],
+        'output': point['output']
+    } for point in result['series']]
+    if noise and noise['status'] == 'noisy':
+        # Not trustworthy enough to compare against the history
+        checks = [{'status': 'skipped', 'reason': 'noisy host'}] * len(logs)
+    else:
+        checks = check_performance(user_id, algorithm_name, logs)
+    for point, check in zip(result['series'], checks):
+        point['regression'] = check
+    algorithm_id = store_execution(user_id, algorithm_name, language, logs)
+
+    return {
+        'success': True,
+        'mode': 'benchmark',
+        'warmup': benchmark['warmup'],
+        'trials': benchmark['trials'],
+        'input': input_spec,
+        'series': result['series'],
+        'complexity': result['complexity'],
+        'noise': noise,
+        'compile_cache': compiled['cache'],
+        'algorithm_id': algorithm_id
+    }, 200
+
+def process_run(user_id, algorithm_name, code, language, benchmark=None, input_spec=None, matrix=None):
+    """Compile, run and log one submission, returning (payload, status_code)"""
+    if matrix:
+        return process_profiles(user_id, algorithm_name, code, language, matrix, input_spec)
+    if benchmark:
+        return process_benchmark(user_id, algorithm_name, code, language, benchmark, input_spec)
+    
+    print(f"Executing {language} code for algorithm: {algorithm_name}")
+    with input_run_kwargs(input_spec) as run_kwargs:
+        result = execute_code(code, language, **run_kwargs)
+    if input_spec:
+        result['input_size'] = input_spec['n']
+    
+    if not result['success']:
+        return result, 400
+
+    [regression] = check_performance(user_id, algorithm_name, [result])
+    algorithm_id = store_execution(user_id, algorithm_name, language, [result])
+
+    return {
+        'success': True,
+        'runtime_ms': result['runtime_ms'],
+        'regression': regression,
+        'input': input_spec,
+        'metrics': result.get('metrics'),
+        'timings': result.get('timings'),
+        'output': result['output'],
+        'compile_cache': result.get('compile_cache'),
+        'algorithm_id': algorithm_id
+    }, 200
+
+def validate_submission(code, algorithm_name, language):
+    """Return an error message for an invalid submission, or None"""
+    if not code or not code.strip():
+        return 'No code provided'
+    if not algorithm_name or not algorithm_name.strip():
+        return 'No algorithm name provided'
+    if language not in ['c', 'cpp']:
+        return 'Invalid language. Must be "c" or "cpp"'
+    return None
+
+def process_batch(user_id, entries, input_spec=None):
+    """Compile all entries in parallel, run them with bounded concurrency, log in bulk"""
+    print(f"Executing batch of {len(entries)} submissions")
+    
+    # Compilers are separate processes, so threads are enough to use every core
+    with ThreadPoolExecutor(max_workers=min(len(entries), BATCH_COMPILE_WORKERS)) as pool:
+        compiled = list(pool.map(lambda entry: compile_code(entry['code'], entry['language']), entries))
+    
+    def run_entry(index):
+        if not compiled[index]['success']:
+            return compiled[index]
+        result = run_binary(compiled[index], **run_kwargs)
+        result['compile_cache'] = compiled[index]['cache']
+        return result
+    
+    try:
+        with input_run_kwargs(input_spec) as run_kwargs, \
+                ThreadPoolExecutor(max_workers=min(len(entries), BATCH_CONCURRENCY)) as pool:
+            results = list(pool.map(run_entry, range(len(entries))))
+    finally:
+        for result in compiled:
+            release_binary(result)
+    
+    submissions = []
+    for entry, result in zip(entries, results):
+        if result['success']:
+            if input_spec:
+                result['input_size'] = input_spec['n']
+            submissions.append((entry['name'], entry['language'], [result]))
+    algorithm_ids = store_executions(user_id, submissions) if submissions else {}
+    
+    payload = []
+    for entry, result in zip(entries, results):
+        item = {'name': entry['name'], 'language': entry['language'], **result}
         if result['success']:
-            return result
+            item['algorithm_id'] = algorithm_ids.get(entry['name'])
+        payload.append(item)
+    
+    return {
+        'success': True,
+        'input': input_spec,
+        'results': payload
+    }, 200
+
+@algorithms_bp.route('/run_batch', methods=['POST'])
+def run_batch():
+    try:
+        data = request.json
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': 'No JSON data provided'
+            }), 400
+        
+        user_id = g.user_id
+        if not user_id:
+            return jsonify({
+                'success': False,
+                'error': 'User not authenticated'
+            }), 401
+        
+        entries = data.get('entries')
+        if not isinstance(entries, list) or not entries or len(entries) > BATCH_MAX_ENTRIES:
+            return jsonify({
+                'success': False,
+                'error': f'entries must be a list of 1 to {BATCH_MAX_ENTRIES} submissions'
+            }), 400
+        
+        normalized = []
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                return jsonify({
+                    'success': False,
+                    'error': f'Entry {index}: must be an object with name, language and code'
+                }), 400
+            language = entry.get('language', 'c')
+            error = validate_submission(entry.get('code'), entry.get('name'), language)
+            if error:
+                return jsonify({
+                    'success': False,
+                    'error': f'Entry {index}: {error}'
+                }), 400
+            normalized.append({'name': entry['name'], 'language': language, 'code': entry['code']})
+        
+        input_spec, input_error = parse_input_spec(data, None)
+        if input_error:
+            return jsonify({
+                'success': False,
+                'error': input_error
+            }), 400
+        
+        if data.get('async'):
+            try:
+                job_id = job_queue.submit(user_id, process_batch, user_id, normalized, input_spec)
+            except QueueFullError as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 429
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued'
+            }), 202
+        
+        payload, status_code = process_batch(user_id, normalized, input_spec)
+        return jsonify(payload), status_code
+
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+@contextmanager
+def input_run_kwargs(input_spec):
+    """run_binary/execute_code keyword arguments for a single-size input spec.
+
+    The dataset stays pinned in the cache until the block exits.
+    """
+    if not input_spec:
+        yield {}
+        return
+    n = input_spec['n']
+    stdin_path = dataset_path(input_spec['kind'], n, input_spec['seed'])
+    try:
+        yield {
+            'args': [str(n)],
+            'env': {'DAALAB_N': str(n)},
+            'stdin_path': stdin_path
+        }
+    finally:
+        release_dataset(stdin_path)
+
+def run_interleaved(compiled, names, trials, warmup, run_kwargs, seed):
+    """Run several compiled binaries round by round in a seeded random order.
+
+    Returns per-binary runtime samples and launcher measurements (warmup
+    rounds excluded) plus the measured execution order.
+    """
+    rng = random.Random(seed)
+    samples = [[] for _ in compiled]
+    measurements = [[] for _ in compiled]
+    schedule = []
+    for round_index in range(warmup + trials):
+        order = list(range(len(compiled)))
+        rng.shuffle(order)
+        for index in order:
+            result = run_binary(compiled[index], **run_kwargs)
+            if not result['success']:
+                return {**result, 'error': f"{names[index]}: {result['error']}"}
+            if round_index >= warmup:
+                samples[index].append(result['runtime_ms'])
+                if result.get('metrics'):
+                    measurements[index].append(result['metrics'])
+                schedule.append(names[index])
+    
+    return {
+        'success': True,
+        'samples': samples,
+        'measurements': measurements,
+        'schedule': schedule,
+        'output': result['output']
+    }
+
+def run_comparison(candidates, trials, warmup, input_spec=None, seed=None):
+    """Compile every candidate, then interleave their trials in random order.
+
+    Each round runs every candidate once on the same input, in a freshly
+    shuffled order, so machine drift and noisy neighbours hit all candidates
+    alike. The first candidate is the baseline for the speedup figures.
+    """
+    with ThreadPoolExecutor(max_workers=min(len(candidates), BATCH_COMPILE_WORKERS)) as pool:
+        compiled = list(pool.map(lambda entry: compile_code(entry['code'], entry['language']), candidates))
+    try:
+        for entry, result in zip(candidates, compiled):
+            if not result['success']:
+                return {**result, 'error': f"{entry['name']}: {result['error']}"}
+        
+        seed = random.randrange(2 ** 32) if seed is None else seed
+        with input_run_kwargs(input_spec) as run_kwargs:
+            runs = run_interleaved(compiled, [entry['name'] for entry in candidates], trials, warmup, run_kwargs, seed)
+    finally:
+        for result in compiled:
+            release_binary(result)
+    if not runs['success']:
+        return runs
+    samples = runs['samples']
+    schedule = runs['schedule']
+    
+    baseline = samples[0]
+    results = []
+    for index, entry in enumerate(candidates):
+        item = {
+            'name': entry['name'],
+            'language': entry['language'],
+            'samples_ms': samples[index],
+            'compile_cache': compiled[index]['cache'],
+            **summarize_samples(samples[index])
+        }
+        if index > 0:
+            test = mann_whitney_u(baseline, samples[index])
+            item['vs_baseline'] = {
+                **speedup_interval(baseline, samples[index], seed=seed),
+                **test,
+                'significant': test['p_value'] < COMPARE_ALPHA
+            }
+        results.append(item)
+    
+    return {
+        'success': True,
+        'baseline': candidates[0]['name'],
+        'trials': trials,
+        'warmup': warmup,
+        'seed': seed,
+        'alpha': COMPARE_ALPHA,
+        'input': input_spec,
+        'schedule': schedule,
+        'candidates': results
+    }
+
+def parse_profile_options(data, language):
+    """Validate flag-matrix parameters from a /run body, returning (options, error)"""
+    profiles = data.get('profiles')
+    if profiles is None or profiles is False:
+        return None, None
+    
+    if profiles is True:
+        profiles = DEFAULT_PROFILES[language]
+    if not isinstance(profiles, list) or not profiles:
+        return None, 'profiles must be true or a list of profile names'
+    unknown = [name for name in profiles if name not in OPTIMIZATION_PROFILES]
+    if unknown:
+        return None, f"Unknown profiles: {', '.join(map(str, unknown))}. Available: {', '.join(OPTIMIZATION_PROFILES)}"
+    if language == 'cpp' and any(OPTIMIZATION_PROFILES[name][0] == 'gcc' for name in profiles):
+        return None, 'C++ code can only be built with g++ profiles'
+    
+    warmup = data.get('warmup', 1)
+    trials = data.get('trials', 5)
+    if not isinstance(warmup, int) or not 0 <= warmup <= BENCHMARK_MAX_WARMUP:
+        return None, f'warmup must be between 0 and {BENCHMARK_MAX_WARMUP}'
+    if not isinstance(trials, int) or not 1 <= trials <= BENCHMARK_MAX_TRIALS:
+        return None, f'trials must be between 1 and {BENCHMARK_MAX_TRIALS}'
+    
+    return {'profiles': list(dict.fromkeys(profiles)), 'warmup': warmup, 'trials': trials}, None
+
+def process_profiles(user_id, algorithm_name, code, language, matrix, input_spec=None):
+    """Build one submission under several optimization profiles and benchmark each binary.
+
+    Profiles that fail to compile are reported under `failed`; the others are
+    still benchmarked. Only when none compiles is the request an error.
+    """
+    requested = matrix['profiles']
+    print(f"Profiling {language} code for algorithm: {algorithm_name} (profiles={requested})")
+    
+    def build(name):
+        compiler, flags = OPTIMIZATION_PROFILES[name]
+        return compile_code(code, 'cpp' if compiler == 'g++' else 'c', flags)
+    
+    with ThreadPoolExecutor(max_workers=min(len(requested), BATCH_COMPILE_WORKERS)) as pool:
+        built = list(pool.map(build, requested))
+    profiles, compiled, failed = [], [], []
+    for name, result in zip(requested, built):
+        if result['success']:
+            profiles.append(name)
+            compiled.append(result)
         else:
-            print(f"Docker execution failed: {result['error']}")
+            compiler, flags = OPTIMIZATION_PROFILES[name]
+            failed.append({'profile': name, 'compiler': compiler, 'flags': flags, 'error': result['error']})
+    if not compiled:
+        first = built[0]
+        return {**first, 'error': f"{requested[0]}: {first['error']}", 'failed': failed}, 400
+    
+    try:
+        # Interleave the profiles so drift affects them all alike
+        with input_run_kwargs(input_spec) as run_kwargs:
+            runs = run_interleaved(
+                compiled, profiles, matrix['trials'], matrix['warmup'],
+                run_kwargs, random.randrange(2 ** 32)
+            )
+        binary_sizes = [os.path.getsize(result['binary']) for result in compiled]
+    finally:
+        for result in compiled:
+            release_binary(result)
+    if not runs['success']:
+        return runs, 400
+    
+    results = []
+    logs = []
+    for index, name in enumerate(profiles):
+        compiler, flags = OPTIMIZATION_PROFILES[name]
+        summary = summarize_samples(runs['samples'][index])
+        results.append({
+            'profile': name,
+            'compiler': compiler,
+            'flags': flags,
+            'binary_size': binary_sizes[index],
+            'compile_cache': compiled[index]['cache'],
+            'samples_ms': runs['samples'][index],
+            'metrics': summarize_measurements(runs['measurements'][index]),
+            **summary
+        })
+        logs.append({
+            'runtime_ms': summary['median_ms'],
+            'input_size': input_spec['n'] if input_spec else None,
+            'profile': name,
+            'samples_ms': runs['samples'][index],
+            'metrics': results[-1]['metrics'],
+            'output': runs['output']
+        })
     
-    print("Falling back to local execution...")
-    return execute_code_local(code, language)
+    for item, check in zip(results, check_performance(user_id, algorithm_name, logs)):
+        item['regression'] = check
+    
+    # One execution_logs row per profile
+    algorithm_id = store_execution(user_id, algorithm_name, language, logs)
+    
+    baseline = results[0]['median_ms']
+    for item in results:
+        item['speedup_vs_first'] = baseline / item['median_ms'] if item['median_ms'] else None
+    
+    return {
+        'success': True,
+        'mode': 'profiles',
+        'warmup': matrix['warmup'],
+        'trials': matrix['trials'],
+        'input': input_spec,
+        'profiles': results,
+        'failed': failed,
+        'algorithm_id': algorithm_id
+    }, 200
 
-def get_user_id_from_request(request):
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return None
-    token = auth_header.split(' ')[1]
+def parse_comparison_request(data):
+    """Validate a comparison request body, returning (options, error)"""
+    candidates = data.get('candidates')
+    if not isinstance(candidates, list) or not 2 <= len(candidates) <= BATCH_MAX_ENTRIES:
+        return None, f'candidates must be a list of 2 to {BATCH_MAX_ENTRIES} submissions'
+    
+    normalized = []
+    for index, entry in enumerate(candidates):
+        if not isinstance(entry, dict):
+            return None, f'Candidate {index}: must be an object with name, language and code'
+        language = entry.get('language', 'c')
+        error = validate_submission(entry.get('code'), entry.get('name'), language)
+        if error:
+            return None, f'Candidate {index}: {error}'
+        normalized.append({'name': entry['name'], 'language': language, 'code': entry['code']})
+    
+    trials = data.get('trials', COMPARE_DEFAULT_TRIALS)
+    warmup = data.get('warmup', 1)
+    seed = data.get('seed')
+    if not isinstance(trials, int) or not 2 <= trials <= BENCHMARK_MAX_TRIALS:
+        return None, f'trials must be between 2 and {BENCHMARK_MAX_TRIALS}'
+    if not isinstance(warmup, int) or not 0 <= warmup <= BENCHMARK_MAX_WARMUP:
+        return None, f'warmup must be between 0 and {BENCHMARK_MAX_WARMUP}'
+    if seed is not None and (not isinstance(seed, int) or seed < 0):
+        return None, 'seed must be a non-negative integer'
+    
+    input_spec, input_error = parse_input_spec(data, None)
+    if input_error:
+        return None, input_error
+    
+    return {
+        'candidates': normalized,
+        'trials': trials,
+        'warmup': warmup,
+        'input_spec': input_spec,
+        'seed': seed
+    }, None
+
+@algorithms_bp.route('/compare', methods=['POST'])
+def compare_algorithms():
     try:
-        decoded = jwt.decode(token, options={"verify_signature": False})
-        return decoded.get('sub')
+        data = request.json
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': 'No JSON data provided'
+            }), 400
+        
+        if not g.user_id:
+            return jsonify({
+                'success': False,
+                'error': 'User not authenticated'
+            }), 401
+        
+        options, error = parse_comparison_request(data)
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
+        
+        result = run_comparison(**options)
+        return jsonify(result), 200 if result['success'] else 400
+
     except Exception as e:
-        print("JWT decode error:", e)
-        return None
+        print(f"Unexpected error: {e}")
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
 
 @algorithms_bp.route('/run', methods=['POST'])
 def run_algorithm():
@@ -231,7 +1788,7 @@ def run_algorithm():
         code = data.get('code')
         algorithm_name = data.get('name')
         language = data.get('language', 'c')
-        user_id = get_user_id_from_request(request)
+        user_id = g.user_id
 
         # Validation
         if not user_id:
@@ -240,85 +1797,205 @@ def run_algorithm():
                 'error': 'User not authenticated'
             }), 401
 
-        if not code or not code.strip():
+        submission_error = validate_submission(code, algorithm_name, language)
+        if submission_error:
             return jsonify({
                 'success': False,
-                'error': 'No code provided'
+                'error': submission_error
             }), 400
 
-        if not algorithm_name or not algorithm_name.strip():
+        benchmark, benchmark_error = parse_benchmark_options(data)
+        if benchmark_error:
             return jsonify({
                 'success': False,
-                'error': 'No algorithm name provided'
+                'error': benchmark_error
             }), 400
-            
-        if language not in ['c', 'cpp']:
+
+        matrix, matrix_error = parse_profile_options(data, language)
+        if matrix_error or (matrix and benchmark):
             return jsonify({
                 'success': False,
-                'error': 'Invalid language. Must be "c" or "cpp"'
+                'error': matrix_error or 'profiles and sizes cannot be combined'
             }), 400
 
-        # Execute code
-        print(f"Executing {language} code for algorithm: {algorithm_name}")
-        result = execute_code(code, language)
-        
-        if not result['success']:
-            return jsonify(result), 400
+        input_spec, input_error = parse_input_spec(data, benchmark)
+        if input_error:
+            return jsonify({
+                'success': False,
+                'error': input_error
+            }), 400
 
-        try:
-            # Store in database
-            algorithm_query = supabase.table('algorithms').select('id').eq('name', algorithm_name).eq('user_id', user_id).execute()
-            
-            if not algorithm_query.data:
-                # Create new algorithm entry
-                algorithm_insert = supabase.table('algorithms').insert({
-                    'name': algorithm_name,
-                    'description': f'Algorithm: {algorithm_name}',
-                    'user_id': user_id,
-                    'language': language
-                }).execute()
-                
-                if algorithm_insert.data:
-                    algorithm_id = algorithm_insert.data[0]['id']
-                else:
-                    print("Failed to create algorithm entry")
-                    algorithm_id = None
-            else:
-                algorithm_id = algorithm_query.data[0]['id']
-
-            # Log execution if we have an algorithm_id
-            if algorithm_id:
-                execution_log = supabase.table('execution_logs').insert({
-                    'algorithm_id': algorithm_id,
-                    'runtime_ms': result['runtime_ms'],
-                    'output': result['output'][:1000]  # Limit output length
-                }).execute()
-                
-                if not execution_log.data:
-                    print("Failed to log execution")
-            
-        except Exception as db_error:
-            print(f"Database error: {db_error}")
-            # Continue execution even if database logging fails
+        if data.get('async'):
+            # Job-submission mode: hand the work to the queue and return right away
+            try:
+                job_id = job_queue.submit(
+                    user_id, process_run, user_id, algorithm_name, code, language, benchmark, input_spec, matrix
+                )
+            except QueueFullError as e:
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 429
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued'
+            }), 202
+
+        payload, status_code = process_run(user_id, algorithm_name, code, language, benchmark, input_spec, matrix)
+        return jsonify(payload), status_code
+
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        return jsonify({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500
+
+@algorithms_bp.route('/run/stream', methods=['POST'])
+def run_algorithm_stream():
+    """Compile and run one submission, streaming its output as Server-Sent Events.
+
+    Events: `status` (compiling / running), `stdout` and `stderr` chunks as
+    the program writes them, then one `result` (same fields as /run) or
+    `error`. Output beyond STREAM_MAX_BYTES stops the program.
+    """
+    data = request.json
+    if not data:
+        return jsonify({
+            'success': False,
+            'error': 'No JSON data provided'
+        }), 400
+
+    code = data.get('code')
+    algorithm_name = data.get('name')
+    language = data.get('language', 'c')
+    user_id = g.user_id
+    if not user_id:
+        return jsonify({
+            'success': False,
+            'error': 'User not authenticated'
+        }), 401
 
+    submission_error = validate_submission(code, algorithm_name, language)
+    if not submission_error and (data.get('sizes') or data.get('profiles')):
+        submission_error = 'Streaming supports single runs only'
+    input_spec, input_error = parse_input_spec(data, None)
+    if submission_error or input_error:
         return jsonify({
+            'success': False,
+            'error': submission_error or input_error
+        }), 400
+
+    def events():
+        yield sse_event('status', {'phase': 'compiling'})
+        compiled = compile_code(code, language)
+        if not compiled['success']:
+            yield sse_event('error', compiled)
+            return
+        output = BoundedOutput()
+        result = None
+        try:
+            yield sse_event('status', {'phase': 'running', 'backend': compiled['backend'], 'compile_cache': compiled['cache']})
+            # closing() stops the program if the client disconnects mid-stream
+            with input_run_kwargs(input_spec) as run_kwargs, \
+                    closing(stream_binary(compiled, output, **run_kwargs)) as chunks:
+                for stream, payload in chunks:
+                    if stream == 'result':
+                        result = payload
+                    else:
+                        yield sse_event(stream, {'data': payload})
+        finally:
+            release_binary(compiled)
+
+        if not result['success']:
+            yield sse_event('error', result)
+            return
+        if input_spec:
+            result['input_size'] = input_spec['n']
+        [regression] = check_performance(user_id, algorithm_name, [result])
+        algorithm_id = store_execution(user_id, algorithm_name, language, [result])
+        yield sse_event('result', {
             'success': True,
             'runtime_ms': result['runtime_ms'],
-            'output': result['output'],
+            'regression': regression,
+            'input': input_spec,
+            'metrics': result.get('metrics'),
+            'timings': result.get('timings'),
+            'output_bytes': result['output_bytes'],
+            'output_sha256': result['output_sha256'],
+            'compile_cache': compiled['cache'],
             'algorithm_id': algorithm_id
         })
 
-    except Exception as e:
-        print(f"Unexpected error: {e}")
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        # Keep proxies from buffering the stream
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _get_user_job(job_id):
+    """Look up a job and make sure it belongs to the requesting user"""
+    user_id = g.user_id
+    if not user_id:
+        return None, (jsonify({
+            'success': False,
+            'error': 'User not authenticated'
+        }), 401)
+
+    job = job_queue.get(job_id)
+    if not job or job['user_id'] != user_id:
+        return None, (jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404)
+    return job, None
+
+@algorithms_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    job, error_response = _get_user_job(job_id)
+    if error_response:
+        return error_response
+
+    started_at = job['started_at']
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'submitted_at': job['submitted_at'],
+        'started_at': started_at,
+        'finished_at': job['finished_at'],
+        'wait_ms': (started_at - job['submitted_at']) * 1000 if started_at else None
+    })
+
+@algorithms_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    job, error_response = _get_user_job(job_id)
+    if error_response:
+        return error_response
+
+    if job['status'] in ('queued', 'running'):
         return jsonify({
             'success': False,
-            'error': f'Internal server error: {str(e)}'
-        }), 500
+            'job_id': job['id'],
+            'status': job['status'],
+            'error': 'Job has not finished yet'
+        }), 202
+
+    return jsonify(job['result']), job['status_code']
+
+@algorithms_bp.route('/jobs/metrics', methods=['GET'])
+def get_job_metrics():
+    return jsonify({
+        'success': True,
+        'job_queue': job_queue.metrics()
+    })
 
 @algorithms_bp.route('/list', methods=['GET'])
 def list_algorithms():
     try:
-        user_id = get_user_id_from_request(request)
+        user_id = g.user_id
         
         if not user_id:
             return jsonify({
@@ -326,15 +2003,14 @@ def list_algorithms():
                 'error': 'User not authenticated'
             }), 401
 
-        algorithms = supabase.table('algorithms')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .order('created_at', desc=True)\
-            .execute()
+        algorithms = get_storage().list_algorithms(user_id)
+        stats = load_algorithm_stats([algorithm['id'] for algorithm in algorithms])
+        for algorithm in algorithms:
+            algorithm['stats'] = stats_cache.summary(stats[algorithm['id']])
 
         return jsonify({
             'success': True,
-            'algorithms': algorithms.data or []
+            'algorithms': algorithms
         })
 
     except Exception as e:
@@ -344,11 +2020,55 @@ def list_algorithms():
             'error': f'Error retrieving algorithms: {str(e)}'
         }), 500
 
+# Queue and pool gauges, read whenever /metrics is scraped
+registry.gauge('daalab_job_queue_jobs', 'Background jobs by state',
+               lambda: {(state,): job_queue.metrics()[state] for state in ('queued', 'running')}, ('state',))
+registry.gauge('daalab_sandbox_containers', 'Pooled sandbox containers by state',
+               lambda: {(state,): sandbox_pool.stats()[state] for state in ('idle', 'busy')} if sandbox_pool else {}, ('state',))
+registry.gauge('daalab_write_behind_pending_rows', 'Rows waiting in the write-behind buffer',
+               lambda: write_buffer.stats()['pending'])
+registry.gauge('daalab_compile_cache_hit_ratio', 'Compile cache hit rate since startup',
+               lambda: compile_cache.stats()['hit_rate'])
+registry.gauge('daalab_circuit_open', "Whether an execution backend's circuit breaker is open",
+               lambda: {(backend,): int(breaker.state == OPEN) for backend, breaker in breakers.items()}, ('backend',))
+registry.gauge('daalab_workspace_bytes', 'Bytes held by in-flight job workspaces',
+               lambda: workspaces.stats()['active_bytes'])
+
 @algorithms_bp.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint.
+
+    Only reports: the sandbox pool is not started from here, and a section
+    that cannot be read shows up as degraded rather than failing the check.
+    """
+    degraded = []
+    try:
+        storage = get_storage().name
+    except Exception as e:
+        storage = {'status': 'unavailable', 'error': str(e)}
+        degraded.append('storage')
+    if not _docker_probed:
+        docker, pool = 'not probed', 'not started'
+    else:
+        docker, pool = docker_available, sandbox_pool.stats() if sandbox_pool else 'not started'
+        if not docker_available:
+            degraded.append('docker')
     return jsonify({
         'success': True,
-        'docker_available': docker_available,
+        'status': 'degraded' if degraded else 'ok',
+        'degraded': degraded,
+        'docker_available': docker,
+        'storage': storage,
+        'sandbox_pool': pool,
+        'executors': {backend: breaker.stats() for backend, breaker in breakers.items()},
+        'compile_cache': compile_cache.stats(),
+        'workspaces': workspaces.stats(),
+        'job_queue': job_queue.metrics(),
+        'datasets': dataset_stats(),
+        'isolation': CORES,
+        'write_behind': write_buffer.stats(),
+        'algorithm_id_cache': algorithm_id_cache.stats(),
+        'clients': client_stats(),
+        'auth': auth_stats(),
         'message': 'Algorithms service is running'
     })
\ No newline at end of file
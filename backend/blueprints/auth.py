@@ -1,27 +1,17 @@
 from flask import Blueprint, request, jsonify
-from supabase import create_client
-import os
 from dotenv import load_dotenv
 import json
-import jwt
+
+from services.clients import get_client
 
 load_dotenv()
 
 auth_bp = Blueprint('auth', __name__)
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
 
-def get_user_id_from_request(request):
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return None
-    token = auth_header.split(' ')[1]
-    try:
-        # Supabase JWTs are signed with RS256, bu\t for user_id extraction, you can decode without verification
-        decoded = jwt.decode(token, options={"verify_signature": False})
-        return decoded.get('sub')  # 'sub' is the user id in Supabase JWTs
-    except Exception as e:
-        print("JWT decode error:", e)
-        return None
+def get_auth_client():
+    """Supabase client for the auth endpoints, created on first use so the
+    rest of the backend can run without Supabase configured"""
+    return get_client('supabase_auth')
 
 @auth_bp.route('/signup', methods=['POST'])
 def signup():
@@ -32,14 +22,14 @@ def signup():
         username = data.get('username')
 
         # Create user in Supabase Auth
-        auth_response = supabase.auth.sign_up({
+        auth_response = get_auth_client().auth.sign_up({
             "email": email,
             "password": password
         })
 
         if auth_response.user:
             # Create user profile
-            supabase.table('user_profiles').insert({
+            get_auth_client().table('user_profiles').insert({
                 'id': auth_response.user.id,
                 'username': username
             }).execute()
@@ -68,7 +58,7 @@ def login():
         password = data.get('password')
 
         # Sign in user
-        auth_response = supabase.auth.sign_in_with_password({
+        auth_response = get_auth_client().auth.sign_in_with_password({
             "email": email,
             "password": password
         })
@@ -98,7 +88,7 @@ def login():
 @auth_bp.route('/logout', methods=['POST'])
 def logout():
     try:
-        supabase.auth.sign_out()
+        get_auth_client().auth.sign_out()
         return jsonify({
             'success': True,
             'message': 'Logged out successfully'
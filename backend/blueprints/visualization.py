@@ -1,36 +1,77 @@
-from flask import Blueprint, request, jsonify
-from supabase import create_client
+from flask import Blueprint, Response, g, request, jsonify
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
-import io
+import json
 import base64
+import uuid
+from datetime import datetime
 from dotenv import load_dotenv
-import jwt
+
+from services.storage import get_storage, iter_execution_logs
+from services.downsample import lttb
+from services.metrics import registry, PHASE_SECONDS
+from services.plots import PLOT_FORMATS, plot_cache, render_runtime_plot, runtime_series
+from blueprints.algorithms import load_algorithm_stats, lookup_algorithm_id, stats_cache, parse_comparison_request, run_comparison
 
 load_dotenv()
 
 
 visualization_bp = Blueprint('visualization', __name__)
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
 
-def get_user_id_from_request(request):
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return None
-    token = auth_header.split(' ')[1]
+# Page sizes for the history endpoints (keyset-paginated with `cursor`)
+RUNTIMES_PAGE_SIZE = int(os.getenv('RUNTIMES_PAGE_SIZE', '1000'))
+RUNTIMES_MAX_PAGE_SIZE = 10000
+RUNTIMES_MAX_POINTS = 10000
+EXECUTIONS_PAGE_SIZE = 10
+EXECUTIONS_MAX_PAGE_SIZE = 100
+MARKERS_PAGE_SIZE = 100
+# Columns needed to draw a runtime chart
+SERIES_COLUMNS = ('id', 'created_at', 'runtime_ms', 'input_size')
+# Points drawn by /plot; longer histories are reduced with LTTB
+PLOT_MAX_POINTS = int(os.getenv('PLOT_MAX_POINTS', '2000'))
+
+registry.gauge('daalab_plot_cache_hit_ratio', 'Plot render cache hit rate since startup',
+               lambda: plot_cache.stats()['hit_rate'])
+
+def parse_cursor(cursor):
+    """Decode a keyset cursor into (created_at, id), returning (after, error).
+
+    The values end up in a PostgREST filter expression, so only an ISO
+    timestamp and a UUID (in canonical form) are accepted.
+    """
+    if not cursor:
+        return None, None
     try:
-        decoded = jwt.decode(token, options={"verify_signature": False})
-        return decoded.get('sub')
-    except Exception as e:
-        print("JWT decode error:", e)
+        created_at, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not isinstance(created_at, str) or not isinstance(log_id, str):
+            raise ValueError('cursor values must be strings')
+        datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        return (created_at, str(uuid.UUID(log_id))), None
+    except (ValueError, TypeError, UnicodeError):
+        return None, 'Invalid cursor'
+
+def next_cursor(rows, limit):
+    """Cursor for the page after `rows`, or None when this was the last page"""
+    if len(rows) < limit:
         return None
+    last = rows[-1]
+    return base64.urlsafe_b64encode(json.dumps([last['created_at'], last['id']]).encode('utf-8')).decode('ascii')
+
+def parse_limit(value, default, maximum):
+    if value is None:
+        return default, None
+    try:
+        limit = int(value)
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= maximum:
+        return None, f'limit must be an integer between 1 and {maximum}'
+    return limit, None
 
 @visualization_bp.route('/runtimes', methods=['GET'])
 def get_runtimes():
     try:
         algorithm_name = request.args.get('algorithm_name')
-        user_id = get_user_id_from_request(request)
+        user_id = g.user_id
         
         if not user_id:
             return jsonify({
@@ -38,28 +79,118 @@ def get_runtimes():
                 'error': 'User not authenticated'
             }), 401
         
-        # Get algorithm ID
-        algorithm = supabase.table('algorithms')\
-            .select('id')\
-            .eq('name', algorithm_name)\
-            .eq('user_id', user_id)\
-            .execute()
-        
-        if not algorithm.data:
+        # Get algorithm ID (cached across requests)
+        algorithm_id = lookup_algorithm_id(user_id, algorithm_name)
+        if not algorithm_id:
             return jsonify({'success': False, 'error': 'Algorithm not found'}), 404
-            
-        algorithm_id = algorithm.data[0]['id']
         
-        # Get runtime logs
-        runtimes = supabase.table('runtime_logs')\
-            .select('*')\
-            .eq('algorithm_id', algorithm_id)\
-            .order('created_at')\
-            .execute()
+        after, error = parse_cursor(request.args.get('cursor'))
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+        
+        storage = get_storage()
+        max_points = request.args.get('max_points')
+        if max_points is not None:
+            # Whole history (from the cursor on), reduced to its visual shape
+            try:
+                max_points = int(max_points)
+            except ValueError:
+                max_points = 0
+            if not 3 <= max_points <= RUNTIMES_MAX_POINTS:
+                return jsonify({
+                    'success': False,
+                    'error': f'max_points must be an integer between 3 and {RUNTIMES_MAX_POINTS}'
+                }), 400
+            with PHASE_SECONDS.time(phase='db_read', backend=storage.name):
+                rows = list(iter_execution_logs(storage, algorithm_id, after=after, columns=SERIES_COLUMNS))
+            keep = lttb(range(len(rows)), [row['runtime_ms'] for row in rows], max_points)
+            return jsonify({
+                'success': True,
+                # `run` is the 1-based position in the full history
+                'runtimes': [{**rows[i], 'run': int(i) + 1} for i in keep],
+                'total': len(rows),
+                'downsampled': len(keep) < len(rows)
+            })
+        
+        limit, error = parse_limit(request.args.get('limit'), RUNTIMES_PAGE_SIZE, RUNTIMES_MAX_PAGE_SIZE)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+        with PHASE_SECONDS.time(phase='db_read', backend=storage.name):
+            runtimes = storage.execution_logs(algorithm_id, limit=limit, after=after)
             
         return jsonify({
             'success': True,
-            'runtimes': runtimes.data
+            'runtimes': runtimes,
+            'next_cursor': next_cursor(runtimes, limit)
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@visualization_bp.route('/stats', methods=['GET'])
+def get_stats():
+    """Rolling runtime statistics of one algorithm (by algorithm_name or algorithm_id)"""
+    try:
+        user_id = g.user_id
+        if not user_id:
+            return jsonify({
+                'success': False,
+                'error': 'User not authenticated'
+            }), 401
+
+        algorithm_id = request.args.get('algorithm_id')
+        if algorithm_id:
+            storage = get_storage()
+            with PHASE_SECONDS.time(phase='db_read', backend=storage.name):
+                owned = storage.get_algorithm(user_id, algorithm_id)
+            if not owned:
+                algorithm_id = None
+        else:
+            algorithm_id = lookup_algorithm_id(user_id, request.args.get('algorithm_name'))
+        if not algorithm_id:
+            return jsonify({'success': False, 'error': 'Algorithm not found'}), 404
+
+        stats = load_algorithm_stats([algorithm_id])[algorithm_id]
+        return jsonify({
+            'success': True,
+            'algorithm_id': algorithm_id,
+            'stats': stats_cache.summary(stats)
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@visualization_bp.route('/markers', methods=['GET'])
+def get_markers():
+    """Regression and improvement markers to overlay on the runtime chart"""
+    try:
+        user_id = g.user_id
+        if not user_id:
+            return jsonify({
+                'success': False,
+                'error': 'User not authenticated'
+            }), 401
+
+        algorithm_id = lookup_algorithm_id(user_id, request.args.get('algorithm_name'))
+        if not algorithm_id:
+            return jsonify({'success': False, 'error': 'Algorithm not found'}), 404
+
+        limit, error = parse_limit(request.args.get('limit'), MARKERS_PAGE_SIZE, MARKERS_PAGE_SIZE)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+
+        storage = get_storage()
+        with PHASE_SECONDS.time(phase='db_read', backend=storage.name):
+            markers = storage.performance_markers(algorithm_id, limit=limit)
+        return jsonify({
+            'success': True,
+            'markers': markers
         })
 
     except Exception as e:
@@ -70,9 +201,19 @@ def get_runtimes():
 
 @visualization_bp.route('/plot', methods=['GET'])
 def generate_plot():
+    """Runtime chart for one algorithm.
+
+    `format` selects the output: `png` or `svg` (the image itself), `json`
+    (the series, for drawing the chart in the browser) or, by default, the
+    original JSON body with a base64 PNG data URI. Renders are cached per
+    newest execution log and carry an ETag, so an unchanged chart costs one
+    indexed query and a 304. The whole history is read in pages and reduced
+    to PLOT_MAX_POINTS; regression and improvement markers are drawn on top
+    (and included in `json`).
+    """
     try:
         algorithm_name = request.args.get('algorithm_name')
-        user_id = get_user_id_from_request(request)
+        user_id = g.user_id
         
         if not user_id:
             return jsonify({
@@ -80,39 +221,65 @@ def generate_plot():
                 'error': 'User not authenticated'
             }), 401
 
-        # Get runtime data
-        response = get_runtimes()
-        if not response.json['success']:
+        fmt = request.args.get('format', 'base64')
+        if fmt not in ('base64', 'json', *PLOT_FORMATS):
+            return jsonify({
+                'success': False,
+                'error': f"Unknown format. Must be one of: base64, json, {', '.join(PLOT_FORMATS)}"
+            }), 400
+
+        algorithm_id = lookup_algorithm_id(user_id, algorithm_name)
+        if not algorithm_id:
+            return jsonify({'success': False, 'error': 'Algorithm not found'}), 404
+
+        storage = get_storage()
+        with PHASE_SECONDS.time(phase='db_read', backend=storage.name):
+            latest = storage.execution_logs(algorithm_id, limit=1, newest_first=True)
+            latest_marker = storage.performance_markers(algorithm_id, limit=1)
+        if not latest:
+            return jsonify({'success': False, 'error': 'No executions recorded for this algorithm'}), 404
+
+        # Markers are written separately from the logs: a new one changes the render too
+        newest = f"{latest[0]['id']}:{latest_marker[0]['id'] if latest_marker else ''}"
+        etag = plot_cache.etag(algorithm_id, newest, fmt)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
             return response
 
-        runtimes = response.json['runtimes']
-        
-        # Create plot
-        plt.figure(figsize=(10, 6))
-        df = pd.DataFrame(runtimes)
-        
-        plt.plot(df['created_at'], df['runtime_ms'], marker='o')
-        plt.title(f'Runtime Performance: {algorithm_name}')
-        plt.xlabel('Time')
-        plt.ylabel('Runtime (ms)')
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        # Convert plot to base64
-        buffer = io.BytesIO()
-        plt.savefig(buffer, format='png')
-        buffer.seek(0)
-        image_png = buffer.getvalue()
-        buffer.close()
-        plt.close()
-        
-        # Encode to base64
-        encoded = base64.b64encode(image_png).decode('utf-8')
-        
-        return jsonify({
-            'success': True,
-            'plot': f'data:image/png;base64,{encoded}'
-        })
+        body = plot_cache.get(etag)
+        if body is None:
+            with PHASE_SECONDS.time(phase='db_read', backend=storage.name):
+                rows = list(iter_execution_logs(storage, algorithm_id, columns=SERIES_COLUMNS))
+                markers = storage.performance_markers(algorithm_id, limit=MARKERS_PAGE_SIZE) if latest_marker else []
+            runtimes = [rows[i] for i in lttb(range(len(rows)), [row['runtime_ms'] for row in rows], PLOT_MAX_POINTS)]
+            if fmt == 'json':
+                body = json.dumps({
+                    'success': True,
+                    'algorithm_id': algorithm_id,
+                    **runtime_series(runtimes, markers),
+                    'total': len(rows),
+                    'downsampled': len(runtimes) < len(rows)
+                }).encode('utf-8')
+            else:
+                with PHASE_SECONDS.time(phase='render', backend='matplotlib'):
+                    image = render_runtime_plot(f'Runtime Performance: {algorithm_name}', runtimes,
+                                                'png' if fmt == 'base64' else fmt, markers)
+                if fmt == 'base64':
+                    encoded = base64.b64encode(image).decode('utf-8')
+                    body = json.dumps({
+                        'success': True,
+                        'plot': f'data:image/png;base64,{encoded}'
+                    }).encode('utf-8')
+                else:
+                    body = image
+            plot_cache.put(etag, body)
+
+        response = Response(body, content_type=PLOT_FORMATS.get(fmt, 'application/json'))
+        response.set_etag(etag)
+        # Per-user data: browsers may keep it but must revalidate
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
 
     except Exception as e:
         return jsonify({
@@ -123,7 +290,7 @@ def generate_plot():
 @visualization_bp.route('/executions', methods=['GET'])
 def get_executions():
     try:
-        user_id = get_user_id_from_request(request)
+        user_id = g.user_id
         if not user_id:
             return jsonify({
                 'success': False,
@@ -138,33 +305,91 @@ def get_executions():
             }), 400
 
         # Verify algorithm belongs to user
-        algorithm = supabase.table('algorithms')\
-            .select('id')\
-            .eq('id', algorithm_id)\
-            .eq('user_id', user_id)\
-            .execute()
-
-        if not algorithm.data:
+        storage = get_storage()
+        with PHASE_SECONDS.time(phase='db_read', backend=storage.name):
+            algorithm = storage.get_algorithm(user_id, algorithm_id)
+        if not algorithm:
             return jsonify({
                 'success': False,
                 'error': 'Algorithm not found or access denied'
             }), 404
 
-        # Get execution history
-        executions = supabase.table('execution_logs')\
-            .select('*')\
-            .eq('algorithm_id', algorithm_id)\
-            .order('created_at', desc=True)\
-            .limit(10)\
-            .execute()
+        after, error = parse_cursor(request.args.get('cursor'))
+        if not error:
+            limit, error = parse_limit(request.args.get('limit'), EXECUTIONS_PAGE_SIZE, EXECUTIONS_MAX_PAGE_SIZE)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
+
+        # Get execution history, newest first, one page at a time
+        with PHASE_SECONDS.time(phase='db_read', backend=storage.name):
+            executions = storage.execution_logs(algorithm_id, limit=limit, newest_first=True, after=after)
 
         return jsonify({
             'success': True,
-            'executions': executions.data
+            'executions': executions,
+            'next_cursor': next_cursor(executions, limit)
         })
 
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 400 
\ No newline at end of file
+        }), 400
+
+@visualization_bp.route('/comparison', methods=['POST'])
+def comparison_chart():
+    """Run an interleaved comparison and return it as chart-ready series"""
+    try:
+        user_id = g.user_id
+        if not user_id:
+            return jsonify({
+                'success': False,
+                'error': 'User not authenticated'
+            }), 401
+
+        options, error = parse_comparison_request(request.json or {})
+        if error:
+            return jsonify({
+                'success': False,
+                'error': error
+            }), 400
+
+        comparison = run_comparison(**options)
+        if not comparison['success']:
+            return jsonify(comparison), 400
+
+        candidates = comparison['candidates']
+        names = [candidate['name'] for candidate in candidates]
+        speedups = [candidate.get('vs_baseline') for candidate in candidates]
+
+        return jsonify({
+            'success': True,
+            'baseline': comparison['baseline'],
+            'labels': names,
+            # Bar chart: median runtime with min/p95 whiskers
+            'runtime': {
+                'median_ms': [candidate['median_ms'] for candidate in candidates],
+                'min_ms': [candidate['min_ms'] for candidate in candidates],
+                'p95_ms': [candidate['p95_ms'] for candidate in candidates]
+            },
+            # Speedup vs baseline with confidence interval (baseline is 1 by definition)
+            'speedup': {
+                'value': [s['speedup'] if s else 1.0 for s in speedups],
+                'ci_low': [s['ci_low'] if s else 1.0 for s in speedups],
+                'ci_high': [s['ci_high'] if s else 1.0 for s in speedups],
+                'significant': [s['significant'] if s else None for s in speedups],
+                'p_value': [s['p_value'] if s else None for s in speedups]
+            },
+            # Line chart: every trial in the order it was measured
+            'trials': [
+                {'label': candidate['name'], 'data': candidate['samples_ms']}
+                for candidate in candidates
+            ],
+            'seed': comparison['seed']
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
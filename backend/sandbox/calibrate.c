@@ -0,0 +1,29 @@
+/*
+ * calibrate: fixed CPU and memory workload used to estimate measurement
+ * noise. It always does the same work, so the spread of its runtimes over a
+ * few runs is a direct figure for how noisy the machine is right now.
+ */
+#include <stdint.h>
+#include <stdio.h>
+
+#define N (1 << 16)
+#define ROUNDS 96
+
+static uint32_t data[N];
+
+int main(void)
+{
+    uint32_t x = 12345;
+    uint64_t sum = 0;
+    for (int round = 0; round < ROUNDS; round++) {
+        for (int i = 0; i < N; i++) {
+            x = x * 1664525u + 1013904223u;
+            data[i] ^= x;
+        }
+        /* Strided reads so the cache hierarchy is part of the measurement */
+        for (int i = 0; i < N; i++)
+            sum += data[(i * 7919) & (N - 1)];
+    }
+    printf("%llu\n", (unsigned long long)sum);
+    return 0;
+}
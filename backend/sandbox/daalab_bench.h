@@ -0,0 +1,119 @@
+/*
+ * daalab_bench.h: timing harness for programs submitted to DAALAB.
+ *
+ * The backend puts this header on the include path (precompiled for gcc and
+ * g++), so submissions only need:
+ *
+ *   #include <daalab_bench.h>
+ *
+ *   int main(int argc, char **argv) {
+ *       long n = daalab_input_size(argc, argv, 1000);
+ *       ...build input...
+ *       DAALAB_SECTION_BEGIN(sort);
+ *       sort(data, n);
+ *       DAALAB_SECTION_END(sort);
+ *       DAALAB_DO_NOT_OPTIMIZE(data[0]);
+ *   }
+ *
+ * Section timings are buffered in memory and written at exit to the file
+ * named by DAALAB_TIMINGS_FILE as "name<TAB>nanoseconds" lines. The backend
+ * returns them as named timing series next to runtime_ms.
+ */
+#ifndef DAALAB_BENCH_H
+#define DAALAB_BENCH_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+#define DAALAB_MAX_RECORDS 4096
+
+struct daalab_record {
+    const char *name;
+    long long ns;
+};
+
+static struct daalab_record daalab_records[DAALAB_MAX_RECORDS];
+static int daalab_record_count = 0;
+static int daalab_flush_registered = 0;
+
+static inline long long daalab_now_ns(void)
+{
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (long long)ts.tv_sec * 1000000000LL + ts.tv_nsec;
+}
+
+static inline void daalab_flush(void)
+{
+    const char *path = getenv("DAALAB_TIMINGS_FILE");
+    FILE *out;
+    int i;
+
+    if (!path || !daalab_record_count)
+        return;
+    out = fopen(path, "w");
+    if (!out)
+        return;
+    for (i = 0; i < daalab_record_count; i++)
+        fprintf(out, "%s\t%lld\n", daalab_records[i].name, daalab_records[i].ns);
+    fclose(out);
+}
+
+/* Record one finished section; `name` must outlive the program (a literal) */
+static inline void daalab_record(const char *name, long long ns)
+{
+    if (!daalab_flush_registered) {
+        atexit(daalab_flush);
+        daalab_flush_registered = 1;
+    }
+    if (daalab_record_count < DAALAB_MAX_RECORDS) {
+        daalab_records[daalab_record_count].name = name;
+        daalab_records[daalab_record_count].ns = ns;
+        daalab_record_count++;
+    }
+}
+
+/*
+ * Input size chosen by the backend: argv[1] if present, else DAALAB_N,
+ * else `fallback`.
+ */
+static inline long daalab_input_size(int argc, char **argv, long fallback)
+{
+    const char *value = NULL;
+
+    if (argc > 1 && argv[1][0])
+        value = argv[1];
+    else
+        value = getenv("DAALAB_N");
+    if (!value)
+        return fallback;
+    return strtol(value, NULL, 10);
+}
+
+/* Section timers: BEGIN/END must appear in the same scope */
+#define DAALAB_SECTION_BEGIN(name) \
+    long long daalab_section_start_##name = daalab_now_ns()
+#define DAALAB_SECTION_END(name) \
+    daalab_record(#name, daalab_now_ns() - daalab_section_start_##name)
+
+/* Keep the compiler from optimizing away a computed value */
+#if defined(__GNUC__) || defined(__clang__)
+#define DAALAB_DO_NOT_OPTIMIZE(value) __asm__ __volatile__("" : : "r,m"(value) : "memory")
+#define DAALAB_CLOBBER_MEMORY() __asm__ __volatile__("" : : : "memory")
+#else
+static volatile long long daalab_sink;
+#define DAALAB_DO_NOT_OPTIMIZE(value) (daalab_sink = (long long)(value))
+#define DAALAB_CLOBBER_MEMORY() ((void)0)
+#endif
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif /* DAALAB_BENCH_H */
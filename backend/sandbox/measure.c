@@ -0,0 +1,156 @@
+/*
+ * measure: tiny launcher that runs a program and reports how it ran.
+ *
+ *   measure [-i <stdin-file>] [-c <cpu-list>] <report-file> <program> [args...]
+ *
+ * The program inherits stdout/stderr, and stdin unless -i names a file to
+ * read it from (the kernel feeds the file directly, nothing is copied
+ * through the backend). -c pins the program to the given CPUs
+ * (comma-separated numbers) before it starts. When the program exits, a single JSON
+ * object is written to <report-file>:
+ *
+ *   {"wall_ms": .., "user_ms": .., "sys_ms": .., "max_rss_kb": ..,
+ *    "exit_code": .., "signal": ..}
+ *
+ * Wall time comes from CLOCK_MONOTONIC around fork/wait, CPU time and peak
+ * RSS from the child's rusage, so none of the backend's own overhead
+ * (container exec, Python process spawn) ends up in the numbers.
+ * The launcher exits with the program's exit code (128 + signal if killed).
+ */
+#define _GNU_SOURCE
+#include <errno.h>
+#include <fcntl.h>
+#include <sched.h>
+#include <signal.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/resource.h>
+#include <sys/time.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+#include <time.h>
+#include <unistd.h>
+
+static volatile pid_t child_pid = 0;
+
+/* Forward termination requests (e.g. from `timeout`) to the program */
+static void forward_signal(int sig)
+{
+    (void)sig;
+    if (child_pid > 0)
+        kill(child_pid, SIGKILL);
+}
+
+static double timespec_ms(const struct timespec *start, const struct timespec *end)
+{
+    return (end->tv_sec - start->tv_sec) * 1e3 + (end->tv_nsec - start->tv_nsec) / 1e6;
+}
+
+static double timeval_ms(const struct timeval *tv)
+{
+    return tv->tv_sec * 1e3 + tv->tv_usec / 1e3;
+}
+
+/* Parse "2,3" into a CPU set; -1 if malformed or empty */
+static int parse_cpus(const char *list, cpu_set_t *set)
+{
+    CPU_ZERO(set);
+    const char *p = list;
+    while (*p) {
+        char *end;
+        long cpu = strtol(p, &end, 10);
+        if (end == p || cpu < 0 || cpu >= CPU_SETSIZE || (*end && *end != ','))
+            return -1;
+        CPU_SET(cpu, set);
+        p = *end ? end + 1 : end;
+    }
+    return CPU_COUNT(set) ? 0 : -1;
+}
+
+int main(int argc, char **argv)
+{
+    const char *stdin_path = NULL;
+    const char *cpu_list = NULL;
+    int arg = 1;
+    while (arg + 1 < argc && argv[arg][0] == '-') {
+        if (strcmp(argv[arg], "-i") == 0)
+            stdin_path = argv[arg + 1];
+        else if (strcmp(argv[arg], "-c") == 0)
+            cpu_list = argv[arg + 1];
+        else
+            break;
+        arg += 2;
+    }
+    cpu_set_t cpus;
+    if (argc - arg < 2 || (cpu_list && parse_cpus(cpu_list, &cpus) < 0)) {
+        fprintf(stderr, "usage: %s [-i <stdin-file>] [-c <cpu-list>] <report-file> <program> [args...]\n", argv[0]);
+        return 2;
+    }
+    const char *report_path = argv[arg];
+    char **program = &argv[arg + 1];
+
+    struct sigaction sa;
+    memset(&sa, 0, sizeof(sa));
+    sa.sa_handler = forward_signal;
+    sigaction(SIGTERM, &sa, NULL);
+    sigaction(SIGINT, &sa, NULL);
+
+    struct timespec start, end;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+
+    pid_t pid = fork();
+    if (pid < 0) {
+        perror("measure: fork");
+        return 2;
+    }
+    if (pid == 0) {
+        if (stdin_path) {
+            int fd = open(stdin_path, O_RDONLY);
+            if (fd < 0 || dup2(fd, STDIN_FILENO) < 0) {
+                perror("measure: stdin");
+                _exit(127);
+            }
+            close(fd);
+        }
+        if (cpu_list && sched_setaffinity(0, sizeof(cpus), &cpus) < 0) {
+            perror("measure: affinity");
+            _exit(127);
+        }
+        execv(program[0], program);
+        perror("measure: exec");
+        _exit(127);
+    }
+    child_pid = pid;
+
+    int status = 0;
+    struct rusage usage;
+    while (wait4(pid, &status, 0, &usage) < 0) {
+        if (errno != EINTR) {
+            perror("measure: wait4");
+            return 2;
+        }
+    }
+    clock_gettime(CLOCK_MONOTONIC, &end);
+
+    int exit_code = WIFEXITED(status) ? WEXITSTATUS(status) : -1;
+    int sig = WIFSIGNALED(status) ? WTERMSIG(status) : 0;
+
+    FILE *report = fopen(report_path, "w");
+    if (report) {
+        fprintf(report,
+                "{\"wall_ms\": %.6f, \"user_ms\": %.6f, \"sys_ms\": %.6f, "
+                "\"max_rss_kb\": %ld, \"exit_code\": %d, \"signal\": %d}\n",
+                timespec_ms(&start, &end),
+                timeval_ms(&usage.ru_utime),
+                timeval_ms(&usage.ru_stime),
+                usage.ru_maxrss,
+                exit_code,
+                sig);
+        fclose(report);
+    } else {
+        perror("measure: report");
+    }
+
+    return sig ? 128 + sig : exit_code;
+}
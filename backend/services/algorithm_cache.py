@@ -0,0 +1,69 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+ALGORITHM_CACHE_SIZE = int(os.getenv('ALGORITHM_CACHE_SIZE', '10000'))
+ALGORITHM_CACHE_TTL = float(os.getenv('ALGORITHM_CACHE_TTL', '300'))
+
+
+class AlgorithmIdCache:
+    """Bounded LRU cache of (user_id, algorithm name) -> algorithm_id.
+
+    The API never deletes or renames algorithms, so entries are filled on
+    insert and on lookup, removed when the insert of a new algorithm is
+    given up (write-behind drop), and expire after `ttl` seconds to pick up
+    deletes and renames made outside this process.
+    """
+
+    def __init__(self, max_entries=ALGORITHM_CACHE_SIZE, ttl=ALGORITHM_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (user_id, name) -> (algorithm_id, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id, name):
+        key = (user_id, name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, name, algorithm_id):
+        key = (user_id, name)
+        with self._lock:
+            self._entries[key] = (algorithm_id, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id, name):
+        with self._lock:
+            self._entries.pop((user_id, name), None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_s': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None
+            }
+
+
+# Shared by every blueprint
+algorithm_id_cache = AlgorithmIdCache()
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from collections import deque
+
+# Consecutive infrastructure failures that open a backend's circuit
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '3'))
+# Seconds an open circuit waits before letting one probe request through
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', '30'))
+
+# Recent call latencies kept per operation for the health report
+LATENCY_SAMPLE_SIZE = 200
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Per-backend circuit breaker.
+
+    Closed: calls go through. After `failure_threshold` consecutive
+    infrastructure failures it opens and calls are refused. Once
+    `reset_timeout` seconds have passed it is half-open: a single probe call
+    is let through, which closes the circuit on success or reopens it (for
+    another `reset_timeout`) on failure. Errors in the user's code count as
+    successes: the backend did its job.
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._successes = 0
+        self._failures = 0
+        self._rejected = 0
+        self._trips = 0
+        self._last_error = None
+        self._latencies = {}
+
+    def allow(self):
+        """True if a call may go to this backend now"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self, operation, seconds):
+        with self._lock:
+            self._successes += 1
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            self.state = CLOSED
+            self._latencies.setdefault(operation, deque(maxlen=LATENCY_SAMPLE_SIZE)).append(seconds)
+
+    def record_failure(self, error):
+        with self._lock:
+            self._failures += 1
+            self._consecutive_failures += 1
+            self._last_error = error
+            if self.state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self._trips += 1
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def abandon(self):
+        """A call that ended without an outcome (e.g. the client went away)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            latency = {}
+            for operation, samples in self._latencies.items():
+                ordered = sorted(samples)
+                latency[operation] = {
+                    'samples': len(ordered),
+                    'p50_ms': ordered[len(ordered) // 2] * 1000,
+                    'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000
+                }
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return {
+                'state': self.state,
+                'consecutive_failures': self._consecutive_failures,
+                'successes': self._successes,
+                'failures': self._failures,
+                'rejected': self._rejected,
+                'trips': self._trips,
+                'retry_in_seconds': retry_in,
+                'last_error': self._last_error,
+                'latency': latency
+            }
@@ -0,0 +1,72 @@
+import os
+import threading
+import time
+
+# Heavy SDKs are imported inside the factories, so importing this module (and
+# the blueprints) costs nothing until a client is actually needed.
+
+
+def _supabase():
+    from supabase import create_client
+    return create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+
+
+def _docker():
+    import docker
+    return docker.from_env()
+
+
+# name -> factory. 'supabase' is the shared data client; the auth endpoints get
+# their own because signing in rewrites the client's Authorization header.
+_factories = {
+    'supabase': _supabase,
+    'supabase_auth': _supabase,
+    'docker': _docker,
+}
+_clients = {}
+_init_seconds = {}
+_locks = {name: threading.Lock() for name in _factories}
+
+
+def register(name, factory):
+    """Add or replace a client factory (drops an already created client)"""
+    _locks.setdefault(name, threading.Lock())
+    with _locks[name]:
+        _factories[name] = factory
+        _clients.pop(name, None)
+        _init_seconds.pop(name, None)
+
+
+def get_client(name):
+    """The shared client `name`, created on first use.
+
+    A failed creation is not cached: the exception propagates and the next
+    call tries again.
+    """
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _locks[name]:
+        if name not in _clients:
+            start = time.perf_counter()
+            _clients[name] = _factories[name]()
+            _init_seconds[name] = time.perf_counter() - start
+        return _clients[name]
+
+
+def set_client(name, client):
+    """Use `client` as `name` (e.g. a fake in load tests)"""
+    _locks.setdefault(name, threading.Lock())
+    with _locks[name]:
+        _clients[name] = client
+        _init_seconds[name] = 0.0
+
+
+def stats():
+    return {
+        name: {
+            'created': name in _clients,
+            'init_ms': _init_seconds[name] * 1000 if name in _init_seconds else None
+        }
+        for name in _factories
+    }
@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+
+BOOTSTRAP_ITERATIONS = 2000
+
+
+def speedup_interval(baseline, candidate, confidence=0.95, iterations=BOOTSTRAP_ITERATIONS, seed=0):
+    """Speedup of `candidate` over `baseline` (ratio of medians) with a bootstrap CI.
+
+    A speedup above 1 means the candidate is faster. Both sample sets are
+    resampled independently; the interval is the percentile interval of the
+    resampled ratios.
+    """
+    base = np.asarray(baseline, dtype=float)
+    cand = np.asarray(candidate, dtype=float)
+    point = float(np.median(base) / max(np.median(cand), 1e-9))
+
+    rng = np.random.default_rng(seed)
+    base_medians = np.median(rng.choice(base, size=(iterations, base.size)), axis=1)
+    cand_medians = np.median(rng.choice(cand, size=(iterations, cand.size)), axis=1)
+    ratios = base_medians / np.maximum(cand_medians, 1e-9)
+
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(ratios, [tail, 100 - tail])
+    return {
+        'speedup': point,
+        'ci_low': float(low),
+        'ci_high': float(high),
+        'confidence': confidence
+    }
+
+
+def mann_whitney_u(a, b):
+    """Two-sided Mann-Whitney U test using the tie-corrected normal approximation.
+
+    Makes no normality assumption, which suits skewed runtime samples.
+    Returns {'u', 'z', 'p_value'}.
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    n1, n2 = a.size, b.size
+    combined = np.concatenate([a, b])
+
+    # Average ranks for ties
+    order = combined.argsort(kind='mergesort')
+    ranks = np.empty(combined.size, dtype=float)
+    sorted_values = combined[order]
+    i = 0
+    tie_term = 0.0
+    while i < combined.size:
+        j = i
+        while j + 1 < combined.size and sorted_values[j + 1] == sorted_values[i]:
+            j += 1
+        ranks[order[i:j + 1]] = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+
+    u1 = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    u = min(u1, n1 * n2 - u1)
+    mean_u = n1 * n2 / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0.0
+    if variance <= 0:
+        return {'u': float(u), 'z': 0.0, 'p_value': 1.0}
+
+    # Continuity correction
+    z = (abs(u1 - mean_u) - 0.5) / math.sqrt(variance)
+    z = max(z, 0.0)
+    return {
+        'u': float(u),
+        'z': float(z),
+        'p_value': float(math.erfc(z / math.sqrt(2)))
+    }
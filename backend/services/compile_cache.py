@@ -0,0 +1,155 @@
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+
+from services.container_pool import SANDBOX_WORK_ROOT
+
+# The cache lives below the sandbox work root, on the same filesystem as the
+# job directories, so a finished build is renamed into it. Pooled containers
+# run cached binaries through their own mount of it at COMPILE_CACHE_MOUNT.
+COMPILE_CACHE_DIR = os.getenv('COMPILE_CACHE_DIR', os.path.join(SANDBOX_WORK_ROOT, 'compile-cache'))
+COMPILE_CACHE_MOUNT = '/cache'
+COMPILE_CACHE_MAX_BYTES = int(os.getenv('COMPILE_CACHE_MAX_MB', '256')) * 1024 * 1024
+
+
+class CompileCache:
+    """Content-addressed store of compiled binaries with LRU eviction.
+
+    Binaries are keyed by a hash of everything that affects the build output
+    (source, language, compiler version and flags), so an identical
+    resubmission can skip the compiler entirely.
+
+    lookup() and store() pin the entry they return; eviction never removes a
+    pinned binary, so it stays on disk until every holder has called release().
+    """
+
+    def __init__(self, root=COMPILE_CACHE_DIR, max_bytes=COMPILE_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+        self._pins = {}  # key -> number of holders
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.root, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(code, language, compiler_version, flags=()):
+        digest = hashlib.sha256()
+        for part in (code, language, compiler_version, '\0'.join(flags)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def _load_index(self):
+        """Rebuild the LRU order from what is already on disk (oldest mtime first)"""
+        found = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if '.tmp-' in name:
+                # Leftover from an interrupted store
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            found.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self._total_bytes += size
+        self._evict()
+
+    def lookup(self, key):
+        """Return the cached binary path for `key` pinned, or None on a miss"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            if not os.path.exists(path):
+                # Removed behind our back
+                self._total_bytes -= self._entries.pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._pins[key] = self._pins.get(key, 0) + 1
+            self.hits += 1
+        try:
+            # Keep mtime in LRU order so the index survives restarts
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def store(self, key, binary_path):
+        """Move a freshly built binary into the cache and return its new path, pinned"""
+        path = self._path(key)
+        tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+        # Stage next to the final path so the last step is an atomic rename
+        shutil.move(binary_path, tmp_path)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+            self._entries[key] = size
+            self._total_bytes += size
+            self._pins[key] = self._pins.get(key, 0) + 1
+            self._evict()
+        return path
+
+    def release(self, key):
+        """Drop one pin taken by lookup() or store()"""
+        with self._lock:
+            count = self._pins.get(key, 0) - 1
+            if count > 0:
+                self._pins[key] = count
+                return
+            self._pins.pop(key, None)
+            # Whatever was kept only because it was in use can go now
+            self._evict()
+
+    def _evict(self):
+        # Caller holds the lock (or is still constructing the cache).
+        # Least recently used first, skipping binaries someone is about to run
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key in [key for key in self._entries if key not in self._pins]:
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._total_bytes -= self._entries.pop(key)
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'pinned': len(self._pins),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / lookups) if lookups else None
+            }
+
@@ -0,0 +1,76 @@
+import numpy as np
+
+# Candidate growth functions for empirical complexity fitting
+COMPLEXITY_MODELS = {
+    'O(1)': lambda n: np.ones_like(n),
+    'O(log n)': lambda n: np.log2(n),
+    'O(n)': lambda n: n,
+    'O(n log n)': lambda n: n * np.log2(n),
+    'O(n^2)': lambda n: n ** 2,
+    'O(n^3)': lambda n: n ** 3,
+}
+
+
+def summarize_samples(samples):
+    """Summary statistics for one set of runtime samples (milliseconds)"""
+    values = np.asarray(samples, dtype=float)
+    return {
+        'trials': int(values.size),
+        'min_ms': float(values.min()),
+        'median_ms': float(np.median(values)),
+        'mean_ms': float(values.mean()),
+        'p95_ms': float(np.percentile(values, 95)),
+        'stddev_ms': float(values.std(ddof=1)) if values.size > 1 else 0.0
+    }
+
+
+def fit_complexity(sizes, runtimes):
+    """Fit runtimes against the candidate complexity classes.
+
+    Returns the log-log regression slope (the empirical exponent) together
+    with a least-squares fit of `t = a * f(n) + b` for every candidate model.
+    The best fit is the model with the highest R^2 among those with a
+    non-negative growth coefficient. Returns None with fewer than three
+    distinct sizes, where any fit would be meaningless.
+    """
+    n = np.asarray(sizes, dtype=float)
+    t = np.asarray(runtimes, dtype=float)
+    if np.unique(n).size < 3 or np.any(n < 1):
+        return None
+
+    # Log-log regression; clamp so zero timings don't produce -inf
+    slope, intercept = np.polyfit(np.log(n), np.log(np.maximum(t, 1e-6)), 1)
+
+    total_ss = float(np.sum((t - t.mean()) ** 2))
+    models = {}
+    for name, growth in COMPLEXITY_MODELS.items():
+        if name == 'O(1)':
+            coefficient, offset = 0.0, float(t.mean())
+            predicted = np.full_like(t, offset)
+        else:
+            # Scale the regressor so large n**3 values stay well conditioned
+            x = growth(n)
+            scale = x.max() or 1.0
+            design = np.column_stack([x / scale, np.ones_like(x)])
+            (a, offset), *_ = np.linalg.lstsq(design, t, rcond=None)
+            coefficient = float(a / scale)
+            predicted = design @ np.array([a, offset])
+        residual_ss = float(np.sum((t - predicted) ** 2))
+        models[name] = {
+            'coefficient': coefficient,
+            'intercept_ms': float(offset),
+            'r_squared': (1.0 - residual_ss / total_ss) if total_ss > 0 else 1.0
+        }
+
+    candidates = [
+        name for name, model in models.items()
+        if name == 'O(1)' or model['coefficient'] >= 0
+    ]
+    best_fit = max(candidates, key=lambda name: models[name]['r_squared'])
+
+    return {
+        'loglog_slope': float(slope),
+        'loglog_intercept': float(intercept),
+        'best_fit': best_fit,
+        'models': models
+    }
@@ -0,0 +1,438 @@
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from services.lifecycle import on_exit, process_alive
+
+
+# Pool configuration (overridable through the environment)
+SANDBOX_IMAGE = os.getenv('SANDBOX_IMAGE', 'gcc:latest')
+SANDBOX_POOL_SIZE = int(os.getenv('SANDBOX_POOL_SIZE', '2'))
+SANDBOX_MAX_JOBS = int(os.getenv('SANDBOX_MAX_JOBS', '50'))
+SANDBOX_MEM_LIMIT = os.getenv('SANDBOX_MEM_LIMIT', '256m')
+SANDBOX_PIDS_LIMIT = int(os.getenv('SANDBOX_PIDS_LIMIT', '64'))
+SANDBOX_ACQUIRE_TIMEOUT = float(os.getenv('SANDBOX_ACQUIRE_TIMEOUT', '30'))
+# Seconds between attempts to replace containers that could not be recreated
+SANDBOX_REFILL_INTERVAL = float(os.getenv('SANDBOX_REFILL_INTERVAL', '5'))
+# Unprivileged uid:gid that pooled containers (and so every submission) run as
+SANDBOX_USER = os.getenv('SANDBOX_USER', '65534:65534')
+
+def _ram_backed_dir():
+    """/dev/shm when it is writable and allows executing binaries, else the temp dir"""
+    try:
+        if os.access('/dev/shm', os.W_OK) and not os.statvfs('/dev/shm').f_flag & os.ST_NOEXEC:
+            return '/dev/shm'
+    except (OSError, AttributeError):
+        pass
+    return tempfile.gettempdir()
+
+
+# Host directory holding the job directories, compile cache and harness.
+# RAM-backed where possible, so sources, binaries and reports never touch the disk.
+# It is never mounted whole: each container only gets its own job directory
+# (at SANDBOX_MOUNT) plus the shared directories it needs.
+SANDBOX_WORK_ROOT = os.getenv(
+    'SANDBOX_WORK_ROOT',
+    os.path.join(_ram_backed_dir(), 'daalab-sandbox')
+)
+SANDBOX_MOUNT = '/work'
+
+# Exit status used by coreutils `timeout` when the command ran too long
+TIMEOUT_EXIT_CODE = 124
+# ...and when the command could not be executed (126) or was not found (127)
+COMMAND_NOT_RUN_EXIT_CODES = (126, 127)
+
+# Labels on every container we start; the owner (host and pid) tells which
+# containers a dead server process left behind
+SANDBOX_LABEL = 'daalab.sandbox'
+OWNER_LABEL = 'daalab.owner'
+
+# Kills whatever a job left running (as the sandbox user: every process but
+# PID 1 and the shell itself) before the container serves the next job
+REAP_COMMAND = ['sh', '-c', 'kill -9 -1 2>/dev/null; exit 0']
+
+
+class SandboxError(Exception):
+    """Raised when the pool cannot provide a usable container"""
+
+
+def _grant_sandbox_user(path):
+    """Make a job directory writable by SANDBOX_USER (and only by it, when we can chown)"""
+    uid, _, gid = SANDBOX_USER.partition(':')
+    try:
+        os.chown(path, int(uid), int(gid or uid))
+    except (ValueError, PermissionError):
+        # A user name, or not running as root: fall back to world-writable.
+        # The directory is only mounted into this one container.
+        os.chmod(path, 0o777)
+
+
+class SandboxContainer:
+    """A pre-started sandbox container plus its bookkeeping.
+
+    `workdir` is the host side of the container's private job directory,
+    mounted at SANDBOX_MOUNT and emptied between jobs.
+    """
+
+    def __init__(self, container, workdir, volumes):
+        self.container = container
+        self.workdir = workdir
+        # Set once user code has run, until its leftover processes are killed
+        self.dirty = False
+        # Longest host path first, so nested mounts translate correctly
+        self.mounts = sorted(
+            ((host, spec['bind']) for host, spec in volumes.items()),
+            key=lambda mount: -len(mount[0])
+        )
+        self.jobs = 0
+        self.failed = False
+        self.started_at = time.time()
+
+    @property
+    def short_id(self):
+        return self.container.short_id
+
+    def path(self, host_path):
+        """Where a host path below one of the container's mounts appears inside it"""
+        host_path = os.path.abspath(host_path)
+        for host, bind in self.mounts:
+            if host_path == host or host_path.startswith(host + os.sep):
+                return bind + host_path[len(host):]
+        raise SandboxError(f'{host_path} is not mounted in the sandbox')
+
+    def exec(self, cmd, timeout, workdir=SANDBOX_MOUNT, environment=None, user_code=True):
+        """Run a command inside the container, returning (exit_code, stdout, stderr).
+
+        Pass user_code=False for commands that run only the toolchain.
+        """
+        self.dirty = self.dirty or user_code
+        # exec has no timeout of its own, so wrap the command with coreutils `timeout`
+        wrapped = ['timeout', '-k', '1', str(int(timeout))] + list(cmd)
+        exit_code, (stdout, stderr) = self.container.exec_run(
+            wrapped,
+            workdir=workdir,
+            environment=environment,
+            demux=True
+        )
+        # Timed out or SIGKILLed (usually the memory limit): don't reuse this container
+        if exit_code in (TIMEOUT_EXIT_CODE, 137):
+            self.failed = True
+        return exit_code, stdout or b'', stderr or b''
+
+    @contextmanager
+    def pinned(self, cpus, restore):
+        """Restrict the container to the `cpus` cpuset for the duration of a job"""
+        self.container.update(cpuset_cpus=cpus)
+        try:
+            yield
+        finally:
+            self.container.update(cpuset_cpus=restore)
+
+    def exec_stream(self, cmd, timeout, workdir=SANDBOX_MOUNT, environment=None, user_code=True):
+        """Run a command, yielding ('stdout' | 'stderr', bytes) chunks as they arrive.
+
+        The generator's return value is the exit code. If the caller stops
+        early the command may still be running, so the container is marked
+        failed and replaced rather than reused.
+        """
+        self.dirty = self.dirty or user_code
+        wrapped = ['timeout', '-k', '1', str(int(timeout))] + list(cmd)
+        api = self.container.client.api
+        exec_id = api.exec_create(
+            self.container.id, wrapped, workdir=workdir, environment=environment
+        )['Id']
+        finished = False
+        try:
+            for stdout, stderr in api.exec_start(exec_id, stream=True, demux=True):
+                if stdout:
+                    yield 'stdout', stdout
+                if stderr:
+                    yield 'stderr', stderr
+            finished = True
+        finally:
+            if not finished:
+                self.failed = True
+        exit_code = api.exec_inspect(exec_id)['ExitCode']
+        if exit_code in (TIMEOUT_EXIT_CODE, 137):
+            self.failed = True
+        return exit_code
+
+
+class ContainerPool:
+    """Fixed-size pool of warm, network-disabled gcc containers.
+
+    Jobs borrow a container with `acquire()`, run their commands through
+    `exec`, and hand it back. Every container has its own job directory,
+    taken from `workspaces` and emptied when a job hands the container back,
+    so a job only ever sees its own files. Pooled containers run as
+    SANDBOX_USER without capabilities, and the processes a job leaves behind
+    are killed before the next job. Containers are replaced after
+    SANDBOX_MAX_JOBS jobs or as soon as a job fails or times out inside them.
+    A replacement that cannot be created is retried by later `acquire()`
+    calls (at most every SANDBOX_REFILL_INTERVAL seconds) until the pool is
+    back to `size`.
+
+    Trusted builds (the precompiled harness header, the measuring launcher)
+    use a separate toolchain container from `builder()`, which never runs
+    user code and is the only one with `builder_volumes` mounted writable.
+
+    Containers are removed when the process exits, and `start()` removes
+    the ones a previous process on this host did not get to.
+    """
+
+    def __init__(self, client, workspaces, size=SANDBOX_POOL_SIZE, max_jobs=SANDBOX_MAX_JOBS,
+                 image=SANDBOX_IMAGE, extra_volumes=None, builder_volumes=None, cpuset=None):
+        self.client = client
+        self.workspaces = workspaces
+        # CPUs the containers normally run on (None: all of them)
+        self.cpuset = cpuset
+        # Mounts shared by every container (compile cache, harness, datasets)
+        self.extra_volumes = {os.path.abspath(host): spec for host, spec in (extra_volumes or {}).items()}
+        # Overrides for the toolchain container (typically the same directories, writable)
+        self.builder_volumes = {os.path.abspath(host): spec for host, spec in (builder_volumes or {}).items()}
+        self.size = max(1, size)
+        self.max_jobs = max(1, max_jobs)
+        self.image = image
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._jobs_served = 0
+        self._recycled = 0
+        self._failures = 0
+        # Containers the pool is short of, and when to next try to create them
+        self._missing = 0
+        self._refill_at = 0.0
+        self._refill_lock = threading.Lock()
+        self._started = False
+        self._closed = False
+        # Every live container, idle or busy, for shutdown()
+        self._containers = set()
+        self._builder = None
+        self._builder_lock = threading.Lock()
+        self.owner = f'{socket.gethostname()}:{os.getpid()}'
+
+    def start(self):
+        """Start all containers up front so the first request does not pay for it"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        on_exit(self.shutdown)
+        self._remove_stale_containers()
+        for _ in range(self.size):
+            self._idle.put(self._create_container())
+        print(f"Sandbox pool started with {self.size} containers")
+
+    def _remove_stale_containers(self):
+        """Remove labelled containers whose owning process on this host is gone"""
+        host = socket.gethostname()
+        try:
+            containers = self.client.containers.list(all=True, filters={'label': SANDBOX_LABEL})
+        except Exception as e:
+            print(f"Could not list old sandbox containers: {e}")
+            return
+        for container in containers:
+            owner_host, _, pid = (container.labels or {}).get(OWNER_LABEL, '').rpartition(':')
+            if owner_host and owner_host != host:
+                continue
+            if pid.isdigit() and process_alive(int(pid)):
+                continue
+            try:
+                container.remove(force=True)
+                print(f"Removed stale sandbox container {container.short_id}")
+            except Exception as e:
+                print(f"Sandbox cleanup warning: {e}")
+
+    def _create_container(self, builder=False):
+        workdir = self.workspaces.take()
+        volumes = {workdir: {'bind': SANDBOX_MOUNT, 'mode': 'rw'}, **self.extra_volumes}
+        if builder:
+            volumes.update(self.builder_volumes)
+            hardening = {}
+        else:
+            _grant_sandbox_user(workdir)
+            hardening = {'user': SANDBOX_USER, 'cap_drop': ['ALL'], 'security_opt': ['no-new-privileges']}
+        try:
+            container = self.client.containers.run(
+                self.image,
+                ['sleep', 'infinity'],
+                detach=True,
+                auto_remove=False,
+                network_disabled=True,
+                mem_limit=SANDBOX_MEM_LIMIT,
+                memswap_limit=SANDBOX_MEM_LIMIT,
+                pids_limit=SANDBOX_PIDS_LIMIT,
+                cpuset_cpus=self.cpuset,
+                volumes=volumes,
+                working_dir=SANDBOX_MOUNT,
+                labels={SANDBOX_LABEL: 'true', OWNER_LABEL: self.owner},
+                name=f"daalab-{'builder' if builder else 'sandbox'}-{uuid.uuid4().hex[:8]}",
+                **hardening
+            )
+        except Exception:
+            self.workspaces.release(workdir)
+            raise
+        sandbox = SandboxContainer(container, workdir, volumes)
+        with self._lock:
+            self._containers.add(sandbox)
+        return sandbox
+
+    def _destroy_container(self, sandbox):
+        with self._lock:
+            if sandbox not in self._containers:
+                return
+            self._containers.discard(sandbox)
+        try:
+            sandbox.container.remove(force=True)
+        except Exception as e:
+            print(f"Sandbox cleanup warning: {e}")
+        self.workspaces.release(sandbox.workdir)
+
+    def _reset(self, sandbox):
+        """Kill what the last job left running and empty its job directory; False if that failed"""
+        if sandbox.dirty:
+            try:
+                sandbox.container.exec_run(REAP_COMMAND)
+            except Exception as e:
+                print(f"Sandbox reset warning: {e}")
+                return False
+            sandbox.dirty = False
+        return self.workspaces.reset(sandbox.workdir)
+
+    def _release(self, sandbox):
+        with self._lock:
+            self._busy -= 1
+            self._jobs_served += 1
+            if sandbox.failed:
+                self._failures += 1
+            closed = self._closed
+
+        if closed:
+            self._destroy_container(sandbox)
+            return
+        if not sandbox.failed and sandbox.jobs < self.max_jobs and not self._reset(sandbox):
+            sandbox.failed = True
+        if sandbox.failed or sandbox.jobs >= self.max_jobs:
+            # Recycle: throw the container away and put a fresh one in its place
+            self._destroy_container(sandbox)
+            with self._lock:
+                self._recycled += 1
+            try:
+                sandbox = self._create_container()
+            except Exception as e:
+                print(f"Failed to replace sandbox container: {e}")
+                with self._lock:
+                    self._missing += 1
+                return
+        self._idle.put(sandbox)
+
+    def _refill(self):
+        """Try to create the containers the pool is short of (one thread at a time, rate limited)"""
+        if not self._missing or time.monotonic() < self._refill_at:
+            return
+        if not self._refill_lock.acquire(blocking=False):
+            return
+        try:
+            while self._missing and not self._closed:
+                try:
+                    sandbox = self._create_container()
+                except Exception as e:
+                    print(f"Sandbox pool still short of {self._missing} containers: {e}")
+                    self._refill_at = time.monotonic() + SANDBOX_REFILL_INTERVAL
+                    return
+                with self._lock:
+                    self._missing -= 1
+                self._idle.put(sandbox)
+        finally:
+            self._refill_lock.release()
+
+    @contextmanager
+    def acquire(self, timeout=SANDBOX_ACQUIRE_TIMEOUT):
+        """Borrow a container for the duration of one job"""
+        if self._closed:
+            raise SandboxError('Sandbox pool is shut down')
+        if not self._started:
+            self.start()
+        deadline = time.monotonic() + timeout
+        while True:
+            self._refill()
+            remaining = deadline - time.monotonic()
+            try:
+                # Wake up to retry missing containers while waiting
+                sandbox = self._idle.get(timeout=max(0, min(remaining, SANDBOX_REFILL_INTERVAL)))
+                break
+            except queue.Empty:
+                if remaining <= SANDBOX_REFILL_INTERVAL:
+                    raise SandboxError('No sandbox container available')
+
+        import docker  # already loaded by whoever created self.client
+
+        with self._lock:
+            self._busy += 1
+        sandbox.jobs += 1
+        try:
+            yield sandbox
+        except docker.errors.APIError:
+            sandbox.failed = True
+            raise
+        finally:
+            self._release(sandbox)
+
+    @contextmanager
+    def builder(self, timeout=SANDBOX_ACQUIRE_TIMEOUT):
+        """Borrow the toolchain container (one user at a time), creating it on first use"""
+        if not self._builder_lock.acquire(timeout=timeout):
+            raise SandboxError('Toolchain container busy')
+
+        import docker  # already loaded by whoever created self.client
+
+        try:
+            if self._closed:
+                raise SandboxError('Sandbox pool is shut down')
+            if self._builder is None:
+                self._builder = self._create_container(builder=True)
+            sandbox = self._builder
+            try:
+                yield sandbox
+            except docker.errors.APIError:
+                sandbox.failed = True
+                raise
+            finally:
+                if sandbox.failed or not self.workspaces.reset(sandbox.workdir):
+                    self._destroy_container(sandbox)
+                    self._builder = None
+        finally:
+            self._builder_lock.release()
+
+    def default_cpuset(self):
+        """The cpuset a container returns to after a pinned job"""
+        if self.cpuset:
+            return self.cpuset
+        return f"0-{self.client.info()['NCPU'] - 1}"
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'missing': self._missing,
+                'idle': self._idle.qsize(),
+                'busy': self._busy,
+                'max_jobs_per_container': self.max_jobs,
+                'jobs_served': self._jobs_served,
+                'recycled': self._recycled,
+                'failures': self._failures
+            }
+
+    def shutdown(self):
+        """Remove every container, including ones still running a job"""
+        with self._lock:
+            self._closed = True
+            containers = list(self._containers)
+        for sandbox in containers:
+            self._destroy_container(sandbox)
+        self._builder = None
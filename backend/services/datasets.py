@@ -0,0 +1,223 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+# Generated inputs are shared by every run and every sandbox container; the
+# containers mount this directory read-only.
+DATASET_ROOT = os.getenv('DATASET_ROOT', os.path.join(tempfile.gettempdir(), 'daalab-datasets'))
+DATASET_MOUNT = '/data'
+DATASET_MAX_SIZE = int(os.getenv('DATASET_MAX_SIZE', '1000000'))
+GRAPH_MAX_VERTICES = int(os.getenv('GRAPH_MAX_VERTICES', '250000'))
+# Seeds are 32-bit so every (kind, n, seed) maps to a short file name
+DATASET_MAX_SEED = 2 ** 32 - 1
+# Least recently used datasets are deleted beyond this size, except ones a run
+# is still reading (pinned by dataset_path until release_dataset)
+DATASET_CACHE_MAX_BYTES = int(os.getenv('DATASET_CACHE_MAX_MB', '1024')) * 1024 * 1024
+
+DATASET_KINDS = ('random', 'sorted', 'reversed', 'nearly_sorted', 'duplicates', 'graph')
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+# File name -> (size in bytes, last used), least recently used first; loaded
+# from the directory on first use
+_entries = None
+_total_bytes = 0
+_pins = {}  # file name -> number of runs reading it
+_entries_lock = threading.Lock()
+_evictions = 0
+
+
+class DatasetError(ValueError):
+    """Raised for an invalid dataset specification"""
+
+
+def _generate(kind, n, seed, f):
+    """Write the dataset for (kind, n, seed) to the open file `f`.
+
+    Arrays are written as `n` on the first line followed by the values.
+    Graphs are written as `n m` followed by `m` lines of `u v` (0-based,
+    no self-loops, on average four edges per vertex).
+    """
+    rng = np.random.default_rng(seed)
+
+    if kind == 'graph':
+        m = min(4 * n, n * (n - 1) // 2) if n > 1 else 0
+        f.write(f"{n} {m}\n")
+        if m:
+            u = rng.integers(0, n, size=m)
+            # Shift v by 1..n-1 so it never equals u
+            v = (u + rng.integers(1, n, size=m)) % n
+            np.savetxt(f, np.column_stack([u, v]), fmt='%d')
+        return
+
+    if kind == 'duplicates':
+        # Only ~sqrt(n) distinct values
+        values = rng.integers(0, max(1, int(np.sqrt(n))), size=n)
+    else:
+        values = rng.integers(0, 2 ** 31 - 1, size=n)
+
+    if kind == 'sorted':
+        values.sort()
+    elif kind == 'reversed':
+        values = np.sort(values)[::-1]
+    elif kind == 'nearly_sorted':
+        values.sort()
+        # Swap ~1% of positions with a random partner
+        swaps = max(1, n // 100)
+        a = rng.integers(0, n, size=swaps)
+        b = rng.integers(0, n, size=swaps)
+        values[a], values[b] = values[b], values[a].copy()
+
+    f.write(f"{n}\n")
+    np.savetxt(f, values[np.newaxis, :], fmt='%d')
+
+
+def validate_spec(spec):
+    """Normalize a dataset spec from a request body, returning (kind, n, seed)"""
+    if not isinstance(spec, dict):
+        raise DatasetError('input must be an object with kind, n and seed')
+    kind = spec.get('kind', 'random')
+    n = spec.get('n')
+    seed = spec.get('seed', 0)
+    if kind not in DATASET_KINDS:
+        raise DatasetError(f"Unknown dataset kind. Must be one of: {', '.join(DATASET_KINDS)}")
+    if not isinstance(n, int) or isinstance(n, bool) or not 0 < n <= DATASET_MAX_SIZE:
+        raise DatasetError(f'n must be an integer between 1 and {DATASET_MAX_SIZE}')
+    if kind == 'graph' and n > GRAPH_MAX_VERTICES:
+        raise DatasetError(f'Graphs are limited to {GRAPH_MAX_VERTICES} vertices')
+    if not isinstance(seed, int) or isinstance(seed, bool) or not 0 <= seed <= DATASET_MAX_SEED:
+        raise DatasetError(f'seed must be an integer between 0 and {DATASET_MAX_SEED}')
+    return kind, n, seed
+
+
+def _load_index():
+    """Rebuild the LRU order from what is already on disk (oldest mtime first)"""
+    global _entries, _total_bytes
+    # Caller holds _entries_lock
+    if _entries is not None:
+        return
+    found = []
+    try:
+        names = os.listdir(DATASET_ROOT)
+    except OSError:
+        names = []
+    for name in names:
+        path = os.path.join(DATASET_ROOT, name)
+        try:
+            if '.tmp-' in name:
+                # Leftover from an interrupted generation
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+        except OSError:
+            continue
+        found.append((stat.st_mtime, name, stat.st_size))
+    _entries = OrderedDict()
+    for mtime, name, size in sorted(found):
+        _entries[name] = (size, mtime)
+        _total_bytes += size
+
+
+def _touch(name, size=None):
+    """Mark a dataset as just used and pin it, adding it with `size` if it is new; returns False if it is unknown"""
+    global _total_bytes
+    with _entries_lock:
+        _load_index()
+        if name in _entries:
+            size = _entries.pop(name)[0]
+        elif size is None:
+            return False
+        else:
+            _total_bytes += size
+        _entries[name] = (size, time.time())
+        _pins[name] = _pins.get(name, 0) + 1
+        _evict()
+    return True
+
+
+def _evict():
+    global _total_bytes, _evictions
+    # Caller holds _entries_lock. Least recently used first, skipping datasets
+    # that are being read; those are evicted once released if still over the cap
+    if _total_bytes <= DATASET_CACHE_MAX_BYTES:
+        return
+    for name in [name for name in _entries if name not in _pins]:
+        if _total_bytes <= DATASET_CACHE_MAX_BYTES:
+            break
+        size, _ = _entries.pop(name)
+        _total_bytes -= size
+        _evictions += 1
+        try:
+            os.remove(os.path.join(DATASET_ROOT, name))
+        except OSError:
+            pass
+
+
+def dataset_path(kind, n, seed):
+    """Path of the cached dataset, generating it on first use.
+
+    Generation happens at most once per (kind, n, seed) even with concurrent
+    requests; the file is written under a temporary name and renamed into
+    place so readers never see a partial dataset. The cache is bounded by
+    DATASET_CACHE_MAX_MB, least recently used first. The returned dataset is
+    pinned until release_dataset(path).
+    """
+    name = f"{kind}-{n}-{seed}.txt"
+    path = os.path.join(DATASET_ROOT, name)
+    if os.path.exists(path) and _touch(name):
+        try:
+            # Keep mtime in LRU order so the index survives restarts
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    with _locks_guard:
+        lock = _locks.setdefault((kind, n, seed), threading.Lock())
+    with lock:
+        if not os.path.exists(path):
+            os.makedirs(DATASET_ROOT, exist_ok=True)
+            tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+            with open(tmp_path, 'w') as f:
+                _generate(kind, n, seed, f)
+            os.chmod(tmp_path, 0o444)
+            os.replace(tmp_path, path)
+        _touch(name, os.path.getsize(path))
+    with _locks_guard:
+        _locks.pop((kind, n, seed), None)
+    return path
+
+
+def release_dataset(path):
+    """Unpin a dataset returned by dataset_path once the run has read it"""
+    name = os.path.basename(path)
+    with _entries_lock:
+        count = _pins.get(name, 0) - 1
+        if count > 0:
+            _pins[name] = count
+            return
+        _pins.pop(name, None)
+        _evict()
+
+
+def container_dataset_path(path):
+    """Location of a cached dataset inside the sandbox containers"""
+    return f"{DATASET_MOUNT}/{os.path.basename(path)}"
+
+
+def dataset_stats():
+    with _entries_lock:
+        _load_index()
+        return {
+            'datasets': len(_entries),
+            'bytes': _total_bytes,
+            'max_bytes': DATASET_CACHE_MAX_BYTES,
+            'pinned': len(_pins),
+            'evictions': _evictions
+        }
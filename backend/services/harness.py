@@ -0,0 +1,89 @@
+import hashlib
+import os
+import shutil
+import threading
+
+from services.container_pool import SANDBOX_WORK_ROOT
+
+HARNESS_HEADER_NAME = 'daalab_bench.h'
+HARNESS_SOURCE = os.path.join(os.path.dirname(__file__), '..', 'sandbox', HARNESS_HEADER_NAME)
+
+# Include directories (one per backend) live below the sandbox work root;
+# pooled containers see them through their own mount at HARNESS_MOUNT.
+HARNESS_ROOT = os.getenv('HARNESS_ROOT', os.path.join(SANDBOX_WORK_ROOT, 'harness'))
+HARNESS_MOUNT = '/harness'
+
+with open(HARNESS_SOURCE, 'rb') as _f:
+    HARNESS_HASH = hashlib.sha256(_f.read()).hexdigest()[:16]
+
+_lock = threading.Lock()
+_built = set()
+
+
+def uses_harness(code):
+    """Only submissions that include the header pay for the precompiled header"""
+    return HARNESS_HEADER_NAME in code
+
+
+def harness_dir(backend):
+    """Include directory for `backend`, holding the header and its .gch directory.
+
+    GCC treats `daalab_bench.h.gch` as a directory of candidate precompiled
+    headers and silently picks the one matching the current language and
+    flags, so gcc and g++ builds (and every flag profile) share one -I path.
+    """
+    include_dir = os.path.join(HARNESS_ROOT, backend, HARNESS_HASH)
+    header_path = os.path.join(include_dir, HARNESS_HEADER_NAME)
+    if not os.path.exists(header_path):
+        os.makedirs(os.path.join(include_dir, HARNESS_HEADER_NAME + '.gch'), exist_ok=True)
+        tmp_path = f"{header_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        shutil.copyfile(HARNESS_SOURCE, tmp_path)
+        os.replace(tmp_path, header_path)
+    return include_dir
+
+
+def pch_path(backend, language, flags):
+    """Where the precompiled header for this language and flag set is stored"""
+    flags_hash = hashlib.sha256('\0'.join(flags).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(harness_dir(backend), HARNESS_HEADER_NAME + '.gch', f"{language}-{flags_hash}.gch")
+
+
+def ensure_pch(backend, language, flags, build):
+    """Build the precompiled header once per (backend, language, flags).
+
+    `build(header_path, output_path)` runs the compiler on the right backend
+    and returns True on success. Failures are not fatal: GCC falls back to
+    parsing the plain header.
+    """
+    key = (backend, language, tuple(flags))
+    if key in _built:
+        return
+    with _lock:
+        if key in _built:
+            return
+        output_path = pch_path(backend, language, flags)
+        if not os.path.exists(output_path):
+            # GCC considers every file in the .gch directory, so build next to
+            # it and only move the finished file in
+            include_dir = harness_dir(backend)
+            tmp_path = os.path.join(include_dir, f"building-{os.path.basename(output_path)}")
+            if not build(os.path.join(include_dir, HARNESS_HEADER_NAME), tmp_path):
+                return
+            os.replace(tmp_path, output_path)
+        _built.add(key)
+
+
+def parse_timings(path):
+    """Read section timings written by the harness into {name: [ms, ...]}"""
+    timings = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, ns = line.rstrip('\n').partition('\t')
+                try:
+                    timings.setdefault(name, []).append(int(ns) / 1e6)
+                except ValueError:
+                    continue
+    except OSError:
+        return None
+    return timings or None
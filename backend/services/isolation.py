@@ -0,0 +1,118 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+# CPUs reserved for isolated benchmarks, e.g. "2,3" or "2-3". When set,
+# everything else (the backend itself, unpinned runs, the sandbox pool) is
+# kept off them. When unset, isolated runs are pinned to the last available
+# CPU without reserving it.
+ISOLATED_CPUS = os.getenv('ISOLATED_CPUS', '')
+
+# Calibration: runs of a fixed workload before every isolated benchmark
+CALIBRATION_RUNS = int(os.getenv('CALIBRATION_RUNS', '5'))
+# Robust coefficient of variation of the calibration runs above which the host counts as noisy
+NOISE_MAX_CV = float(os.getenv('NOISE_MAX_CV', '0.05'))
+# A noisy host is re-calibrated this many times, NOISE_DEFER_SECONDS apart, before running anyway
+NOISE_MAX_DEFERRALS = int(os.getenv('NOISE_MAX_DEFERRALS', '2'))
+NOISE_DEFER_SECONDS = float(os.getenv('NOISE_DEFER_SECONDS', '2'))
+# Seconds an isolated benchmark waits for the isolated cores to be free
+ISOLATION_WAIT = float(os.getenv('ISOLATION_WAIT', '60'))
+
+CALIBRATION_SOURCE = os.path.join(os.path.dirname(__file__), '..', 'sandbox', 'calibrate.c')
+
+# Scales the median absolute deviation to a standard deviation for normal data
+MAD_SCALE = 1.4826
+
+
+class IsolationError(Exception):
+    """Raised when the isolated cores stay busy for too long"""
+
+
+def parse_cpu_list(spec):
+    """'0,2-3' -> [0, 2, 3]"""
+    cpus = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.update(range(int(first), int(last or first) + 1))
+    return sorted(cpus)
+
+
+def cpu_list(cpus):
+    """[0, 2, 3] -> '0,2,3' (the form taken by the launcher and by Docker's cpuset)"""
+    return ','.join(str(cpu) for cpu in cpus)
+
+
+def available_cpus():
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def plan_cores(spec=ISOLATED_CPUS, available=None):
+    """Split the machine into isolated and shared CPUs.
+
+    Returns {'isolated': [...] or None, 'shared': [...] or None, 'reserved': bool}.
+    `isolated` is None when there is nothing to pin to (a single CPU).
+    """
+    available = available if available is not None else available_cpus()
+    if spec:
+        isolated = parse_cpu_list(spec)
+        shared = [cpu for cpu in available if cpu not in isolated]
+        # Reserving every CPU would leave nothing for the backend itself
+        return {'isolated': isolated, 'shared': shared or None, 'reserved': bool(shared)}
+    if len(available) >= 2:
+        return {'isolated': available[-1:], 'shared': None, 'reserved': False}
+    return {'isolated': None, 'shared': None, 'reserved': False}
+
+
+CORES = plan_cores()
+
+# One isolated benchmark at a time: the isolated cores are dedicated to it
+_isolated_lock = threading.Lock()
+
+
+def reserve_host_cores():
+    """Keep the backend, and everything it starts unpinned, off the reserved CPUs"""
+    if CORES['reserved']:
+        try:
+            os.sched_setaffinity(0, CORES['shared'])
+        except (AttributeError, OSError) as e:
+            print(f"Could not reserve isolated CPUs: {e}")
+
+
+@contextmanager
+def isolated_cores(timeout=ISOLATION_WAIT):
+    """Hold the isolated CPUs for one benchmark, yielding their list (or None)"""
+    if not _isolated_lock.acquire(timeout=timeout):
+        raise IsolationError('Isolated cores are busy, try again later')
+    try:
+        yield CORES['isolated']
+    finally:
+        _isolated_lock.release()
+
+
+def robust_cv(samples):
+    """Scaled MAD over the median: spread that a single outlier can't dominate"""
+    values = np.asarray(samples, dtype=float)
+    median = float(np.median(values))
+    if values.size < 2 or median <= 0:
+        return 0.0
+    return MAD_SCALE * float(np.median(np.abs(values - median))) / median
+
+
+def noise_figure(samples, max_cv=NOISE_MAX_CV):
+    """Noise report for the calibration runtimes `samples`"""
+    cv = robust_cv(samples)
+    return {
+        'calibration_runs': len(samples),
+        'calibration_median_ms': float(np.median(samples)),
+        'cv': cv,
+        'max_cv': max_cv,
+        'status': 'ok' if cv <= max_cv else 'noisy'
+    }
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Queue configuration (overridable through the environment)
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+JOB_MAX_QUEUE = int(os.getenv('JOB_MAX_QUEUE', '100'))
+JOB_MAX_PER_USER = int(os.getenv('JOB_MAX_PER_USER', '5'))
+JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', '600'))
+
+# How many recent wait times are kept for the queue metrics
+WAIT_SAMPLE_SIZE = 500
+
+
+class QueueFullError(Exception):
+    """Raised when a job cannot be accepted (global or per-user limit reached)"""
+
+
+class JobQueue:
+    """Bounded background worker pool for compile-and-run jobs.
+
+    Jobs are plain callables returning `(payload, status_code)`, the same
+    pair a Flask handler would send back. Finished jobs are kept for
+    JOB_RESULT_TTL seconds so clients can poll for them.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_queue=JOB_MAX_QUEUE,
+                 max_per_user=JOB_MAX_PER_USER, result_ttl=JOB_RESULT_TTL):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.max_per_user = max_per_user
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job-worker')
+        self._jobs = {}
+        self._pending_by_user = {}
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_times = deque(maxlen=WAIT_SAMPLE_SIZE)
+
+    def submit(self, user_id, fn, *args, **kwargs):
+        """Queue `fn(*args, **kwargs)` for `user_id` and return the new job id"""
+        with self._lock:
+            self._expire_results()
+            if self._queued + self._running >= self.max_queue:
+                self._rejected += 1
+                raise QueueFullError('Job queue is full, try again later')
+            if self._pending_by_user.get(user_id, 0) >= self.max_per_user:
+                self._rejected += 1
+                raise QueueFullError(f'Too many pending jobs (limit {self.max_per_user})')
+
+            job_id = str(uuid.uuid4())
+            self._jobs[job_id] = {
+                'id': job_id,
+                'user_id': user_id,
+                'status': 'queued',
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'status_code': None
+            }
+            self._queued += 1
+            self._pending_by_user[user_id] = self._pending_by_user.get(user_id, 0) + 1
+
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        with self._lock:
+            job = self._jobs[job_id]
+            job['status'] = 'running'
+            job['started_at'] = time.time()
+            self._queued -= 1
+            self._running += 1
+            self._wait_times.append(job['started_at'] - job['submitted_at'])
+
+        try:
+            payload, status_code = fn(*args, **kwargs)
+            status = 'finished'
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            payload, status_code = {'success': False, 'error': f'Internal server error: {str(e)}'}, 500
+            status = 'failed'
+
+        with self._lock:
+            job['status'] = status
+            job['result'] = payload
+            job['status_code'] = status_code
+            job['finished_at'] = time.time()
+            self._running -= 1
+            self._completed += 1
+            user_id = job['user_id']
+            self._pending_by_user[user_id] -= 1
+            if not self._pending_by_user[user_id]:
+                del self._pending_by_user[user_id]
+
+    def _expire_results(self):
+        # Caller holds the lock
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job['finished_at'] is not None and job['finished_at'] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Return a snapshot of the job, or None if it is unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def metrics(self):
+        with self._lock:
+            waits = sorted(self._wait_times)
+            return {
+                'workers': self.workers,
+                'queued': self._queued,
+                'running': self._running,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'max_queue': self.max_queue,
+                'max_per_user': self.max_per_user,
+                'wait_ms_avg': (sum(waits) / len(waits) * 1000) if waits else None,
+                'wait_ms_p95': waits[int(0.95 * (len(waits) - 1))] * 1000 if waits else None,
+                'wait_ms_max': waits[-1] * 1000 if waits else None
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
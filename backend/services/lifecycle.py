@@ -0,0 +1,51 @@
+import atexit
+import os
+import signal
+import threading
+
+_sigterm_installed = False
+_sigterm_lock = threading.Lock()
+
+
+def _exit_on_sigterm():
+    """Turn SIGTERM (container stop, process managers) into a normal exit so atexit handlers run.
+
+    A handler installed earlier (a server's graceful shutdown) is called
+    instead, since it ends the process normally too. Only the main thread
+    can install signal handlers; elsewhere this is a no-op.
+    """
+    global _sigterm_installed
+    with _sigterm_lock:
+        if _sigterm_installed:
+            return
+        try:
+            previous = signal.getsignal(signal.SIGTERM)
+
+            def handler(signum, frame):
+                if callable(previous):
+                    previous(signum, frame)
+                else:
+                    raise SystemExit(128 + signum)
+
+            signal.signal(signal.SIGTERM, handler)
+        except ValueError:
+            return
+        _sigterm_installed = True
+
+
+def on_exit(callback):
+    """Run `callback` when the process exits, including on SIGTERM"""
+    atexit.register(callback)
+    _exit_on_sigterm()
+
+
+def process_alive(pid):
+    """True if a process with this pid exists on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, owned by someone else
+        return True
+    return True
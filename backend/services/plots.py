@@ -0,0 +1,148 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+PLOT_CACHE_SIZE = int(os.getenv('PLOT_CACHE_SIZE', '256'))
+
+PLOT_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+MARKER_COLORS = {
+    'regression': 'tab:red',
+    'improvement': 'tab:green',
+}
+# Marker fields sent to the browser
+MARKER_FIELDS = ('id', 'created_at', 'kind', 'input_size', 'profile', 'change', 'p_value')
+
+
+def _parse_time(value):
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+
+def runtime_series(runtimes, markers=()):
+    """Columnar form of execution logs (plus the performance markers to
+    overlay): what the browser needs to draw the chart"""
+    return {
+        'created_at': [runtime.get('created_at') for runtime in runtimes],
+        'runtime_ms': [runtime.get('runtime_ms') for runtime in runtimes],
+        'input_size': [runtime.get('input_size') for runtime in runtimes],
+        'markers': [{field: marker.get(field) for field in MARKER_FIELDS} for marker in markers],
+    }
+
+
+def load_matplotlib():
+    """Figure and Agg canvas classes, imported on first use.
+
+    matplotlib dominates the backend's import time, so it is only loaded once
+    a plot is actually rendered. Object-oriented Figures only: no pyplot
+    global state, safe in threaded workers.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    return Figure, FigureCanvasAgg
+
+
+def render_runtime_plot(title, runtimes, fmt='png', markers=()):
+    """Render runtime over time as PNG or SVG bytes.
+
+    Each regression/improvement marker is drawn as a vertical line at the
+    run that produced it (the first run logged at or after the marker),
+    labelled with the relative change of the median.
+    """
+    Figure, FigureCanvasAgg = load_matplotlib()
+    figure = Figure(figsize=(10, 6))
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+
+    times = [_parse_time(runtime.get('created_at')) for runtime in runtimes]
+    values = [runtime['runtime_ms'] for runtime in runtimes]
+    if all(times):
+        ax.plot(times, values, marker='o')
+        ax.set_xlabel('Time')
+        figure.autofmt_xdate(rotation=45)
+    else:
+        ax.plot(range(1, len(values) + 1), values, marker='o')
+        ax.set_xlabel('Run')
+
+    stamps = [str(runtime.get('created_at')) for runtime in runtimes]
+    labelled = set()
+    for marker in markers:
+        position = next((i for i, stamp in enumerate(stamps) if stamp >= str(marker.get('created_at'))), None)
+        if position is None:
+            continue
+        x = times[position] if all(times) else position + 1
+        kind = marker.get('kind')
+        color = MARKER_COLORS.get(kind, 'tab:gray')
+        ax.axvline(x, color=color, linestyle='--', alpha=0.6, label=None if kind in labelled else kind)
+        labelled.add(kind)
+        if marker.get('change') is not None:
+            ax.annotate(f"{marker['change']:+.0%}", (x, values[position]), textcoords='offset points',
+                        xytext=(4, 8), color=color, fontsize=8)
+    if labelled:
+        ax.legend()
+    ax.set_title(title)
+    ax.set_ylabel('Runtime (ms)')
+    figure.tight_layout()
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class PlotCache:
+    """LRU cache of rendered plots.
+
+    Keys include the ids of the newest execution log and performance marker,
+    so a new run changes the key (and the ETag) and stale renders simply age
+    out.
+    """
+
+    def __init__(self, max_entries=PLOT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def etag(algorithm_id, latest_log_id, fmt):
+        digest = hashlib.sha256(f"{algorithm_id}\0{latest_log_id}\0{fmt}".encode('utf-8'))
+        return digest.hexdigest()[:32]
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else None
+            }
+
+
+plot_cache = PlotCache()
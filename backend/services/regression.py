@@ -0,0 +1,67 @@
+import math
+import os
+
+import numpy as np
+
+from services.comparison import mann_whitney_u
+
+# A change is reported when it is both significant and at least this large
+REGRESSION_THRESHOLD = float(os.getenv('REGRESSION_THRESHOLD', '0.10'))  # relative change of the median
+REGRESSION_ALPHA = float(os.getenv('REGRESSION_ALPHA', '0.01'))
+REGRESSION_MIN_HISTORY = int(os.getenv('REGRESSION_MIN_HISTORY', '5'))
+REGRESSION_HISTORY = int(os.getenv('REGRESSION_HISTORY', '50'))  # most recent runs compared against
+
+# Scales the median absolute deviation to a standard deviation for normal data
+MAD_SCALE = 1.4826
+
+
+def detect_change(history, samples, threshold=REGRESSION_THRESHOLD, alpha=REGRESSION_ALPHA,
+                  min_history=REGRESSION_MIN_HISTORY):
+    """Compare new runtime samples with an algorithm's historical runtimes.
+
+    Uses the Mann-Whitney U test when there are at least three new samples,
+    otherwise a robust z-score (median and MAD of the history), so a single
+    outlier in the history doesn't mask or fake a change. Returns the status
+    ('regression', 'improvement', 'unchanged' or 'insufficient_history'),
+    the relative change of the median and the p-value.
+    """
+    result = {
+        'status': 'insufficient_history',
+        'history_runs': len(history),
+        'threshold': threshold,
+        'alpha': alpha
+    }
+    if len(history) < min_history or not samples:
+        return result
+
+    history = np.asarray(history, dtype=float)
+    samples = np.asarray(samples, dtype=float)
+    baseline = float(np.median(history))
+    current = float(np.median(samples))
+    change = current / baseline - 1 if baseline > 0 else 0.0
+
+    if samples.size >= 3:
+        test = 'mann_whitney_u'
+        p_value = mann_whitney_u(history, samples)['p_value']
+    else:
+        test = 'robust_z'
+        spread = MAD_SCALE * float(np.median(np.abs(history - baseline)))
+        if spread > 0:
+            z = abs(current - baseline) / spread
+            p_value = math.erfc(z / math.sqrt(2))
+        else:
+            p_value = 1.0 if current == baseline else 0.0
+
+    status = 'unchanged'
+    if p_value < alpha and abs(change) >= threshold:
+        status = 'regression' if change > 0 else 'improvement'
+
+    result.update({
+        'status': status,
+        'test': test,
+        'baseline_median_ms': baseline,
+        'median_ms': current,
+        'change': change,
+        'p_value': p_value
+    })
+    return result
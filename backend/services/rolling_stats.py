@@ -0,0 +1,160 @@
+import math
+import os
+import threading
+from bisect import insort
+from collections import OrderedDict
+
+STATS_CACHE_SIZE = int(os.getenv('STATS_CACHE_SIZE', '10000'))
+
+# Quantiles tracked for every algorithm
+TRACKED_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class P2Quantile:
+    """Streaming quantile estimate with the P-square algorithm (Jain & Chlamtac).
+
+    Keeps five markers whatever the number of observations; the middle one
+    converges to the `p` quantile. The first five values are kept exactly.
+    """
+
+    def __init__(self, p, state=None):
+        self.p = p
+        self.dn = [0, p / 2, p, (1 + p) / 2, 1]
+        if state:
+            self.q = list(state['q'])
+            self.n = list(state['n'])
+            self.np = list(state['np'])
+        else:
+            self.q = []
+            self.n = [0, 1, 2, 3, 4]
+            self.np = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+
+    def add(self, x):
+        q, n = self.q, self.n
+        if len(q) < 5:
+            insort(q, x)
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.np[i] += self.dn[i]
+
+        # Move the inner markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self.np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < candidate < q[i + 1]:
+                    # Parabolic step would break marker order: fall back to linear
+                    candidate = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = candidate
+                n[i] += d
+
+    def value(self):
+        if not self.q:
+            return None
+        if len(self.q) < 5:
+            return self.q[min(len(self.q) - 1, int(round(self.p * (len(self.q) - 1))))]
+        return self.q[2]
+
+    def state(self):
+        return {'q': list(self.q), 'n': list(self.n), 'np': list(self.np)}
+
+
+class RunningStats:
+    """Count, mean, variance (Welford), min/max and P-square quantiles of a stream"""
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.count = state.get('count') or 0
+        self.mean = state.get('mean') or 0.0
+        self.m2 = state.get('m2') or 0.0
+        self.min = state.get('min_ms')
+        self.max = state.get('max_ms')
+        saved = state.get('quantiles') or {}
+        self.quantiles = {p: P2Quantile(p, saved.get(str(p))) for p in TRACKED_QUANTILES}
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+        for estimator in self.quantiles.values():
+            estimator.add(x)
+
+    def summary(self):
+        variance = self.m2 / (self.count - 1) if self.count > 1 else 0.0
+        summary = {
+            'count': self.count,
+            'mean_ms': self.mean if self.count else None,
+            'stddev_ms': math.sqrt(variance) if self.count else None,
+            'min_ms': self.min,
+            'max_ms': self.max,
+        }
+        for p, estimator in self.quantiles.items():
+            summary[f'p{int(round(p * 100))}_ms'] = estimator.value()
+        return summary
+
+    def state(self):
+        """Everything needed to resume the stream, as stored in algorithm_stats"""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'min_ms': self.min,
+            'max_ms': self.max,
+            'quantiles': {str(p): estimator.state() for p, estimator in self.quantiles.items()}
+        }
+
+
+class StatsCache:
+    """Bounded LRU of RunningStats by algorithm id, updated under one lock"""
+
+    def __init__(self, max_entries=STATS_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, algorithm_id):
+        with self._lock:
+            stats = self._entries.get(algorithm_id)
+            if stats is not None:
+                self._entries.move_to_end(algorithm_id)
+            return stats
+
+    def add(self, algorithm_id, stats):
+        """Cache `stats` unless another thread got there first; returns the cached one"""
+        with self._lock:
+            stats = self._entries.setdefault(algorithm_id, stats)
+            self._entries.move_to_end(algorithm_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return stats
+
+    def summary(self, stats):
+        """Summary of `stats`, taken under the update lock"""
+        with self._lock:
+            return stats.summary()
+
+    def update(self, algorithm_id, stats, values):
+        """Add `values` to the cached stream and return its state and summary"""
+        with self._lock:
+            stats = self._entries.setdefault(algorithm_id, stats)
+            for value in values:
+                stats.add(value)
+            return stats.state(), stats.summary()
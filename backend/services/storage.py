@@ -0,0 +1,407 @@
+import json
+import os
+import sqlite3
+import threading
+
+from services.clients import get_client
+
+# 'supabase' (default) or 'sqlite' for running without any external service
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'supabase')
+SQLITE_PATH = os.getenv('SQLITE_PATH', os.path.join(os.path.dirname(__file__), '..', 'daalab.sqlite3'))
+
+# Columns the application writes, per table (mirrors schema.sql)
+TABLE_COLUMNS = {
+    'algorithms': ('id', 'name', 'description', 'user_id', 'language', 'created_at'),
+    'execution_logs': (
+        'id', 'algorithm_id', 'runtime_ms', 'input_size', 'wall_ms', 'cpu_user_ms',
+        'cpu_sys_ms', 'peak_rss_kb', 'exit_status', 'profile', 'output', 'output_bytes',
+        'output_sha256', 'created_at'
+    ),
+    'algorithm_stats': ('algorithm_id', 'count', 'mean', 'm2', 'min_ms', 'max_ms', 'quantiles', 'updated_at'),
+    'performance_markers': (
+        'id', 'algorithm_id', 'kind', 'input_size', 'profile', 'change', 'p_value',
+        'baseline_median_ms', 'median_ms', 'created_at'
+    ),
+}
+
+# Rows of these tables are upserted on this key instead of inserted
+UPSERT_KEYS = {
+    'algorithm_stats': 'algorithm_id',
+}
+
+# Unique columns of these tables; rows that collide on them are skipped
+# (first writer wins, e.g. two processes registering the same name)
+UNIQUE_KEYS = {
+    'algorithms': ('user_id', 'name'),
+}
+
+# Folds duplicate (user_id, name) registrations made before the unique index
+# existed into the oldest one, then creates the index (mirrored in schema.sql)
+_DUPLICATE_ALGORITHMS = (
+    "SELECT a.id FROM algorithms a WHERE EXISTS (SELECT 1 FROM algorithms b "
+    "WHERE b.user_id = a.user_id AND b.name = a.name AND b.id <> a.id)"
+)
+_KEPT_ALGORITHM = (
+    "(SELECT k.id FROM algorithms k, algorithms d WHERE d.id = {column} "
+    "AND k.user_id = d.user_id AND k.name = d.name ORDER BY k.created_at, k.id LIMIT 1)"
+)
+MERGE_DUPLICATE_ALGORITHMS = (
+    f"DELETE FROM algorithm_stats WHERE algorithm_id IN ({_DUPLICATE_ALGORITHMS})",
+    f"UPDATE execution_logs SET algorithm_id = {_KEPT_ALGORITHM.format(column='execution_logs.algorithm_id')} "
+    f"WHERE algorithm_id IN ({_DUPLICATE_ALGORITHMS})",
+    f"UPDATE performance_markers SET algorithm_id = {_KEPT_ALGORITHM.format(column='performance_markers.algorithm_id')} "
+    f"WHERE algorithm_id IN ({_DUPLICATE_ALGORITHMS})",
+    f"DELETE FROM algorithms WHERE id IN ({_DUPLICATE_ALGORITHMS}) "
+    f"AND id <> {_KEPT_ALGORITHM.format(column='algorithms.id')}",
+    "DROP INDEX IF EXISTS idx_algorithms_user_name",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_algorithms_user_name_key ON algorithms(user_id, name)",
+)
+
+# Columns holding JSON documents (JSONB in Postgres, TEXT in SQLite)
+JSON_COLUMNS = {'quantiles'}
+
+
+class StorageError(Exception):
+    """Raised for writes the storage layer does not know how to perform"""
+
+
+def _check_columns(table, columns):
+    """Columns to select (validated), or '*' for all of them"""
+    if not columns:
+        return '*'
+    unknown = set(columns) - set(TABLE_COLUMNS[table])
+    if unknown:
+        raise StorageError(f"Unknown {table} columns: {', '.join(sorted(unknown))}")
+    return ', '.join(columns)
+
+
+def _check_table(table, rows):
+    columns = TABLE_COLUMNS.get(table)
+    if columns is None:
+        raise StorageError(f'Unknown table: {table}')
+    for row in rows:
+        unknown = set(row) - set(columns)
+        if unknown:
+            raise StorageError(f"Unknown {table} columns: {', '.join(sorted(unknown))}")
+
+
+def _full_rows(table, rows):
+    """Rows with every column of `table`, missing ones as None.
+
+    PostgREST bulk inserts require all objects to have the same keys, and a
+    batch can mix rows with and without optional columns (run metrics).
+    """
+    columns = TABLE_COLUMNS[table]
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+
+class SupabaseStorage:
+    """Algorithms and execution logs in the hosted Supabase database"""
+
+    name = 'supabase'
+
+    def __init__(self, client):
+        self.client = client
+
+    def insert(self, table, rows):
+        _check_table(table, rows)
+        if rows:
+            self.client.table(table).insert(_full_rows(table, rows)).execute()
+
+    def upsert(self, table, rows):
+        _check_table(table, rows)
+        if rows:
+            self.client.table(table).upsert(_full_rows(table, rows), on_conflict=UPSERT_KEYS[table]).execute()
+
+    def insert_new(self, table, rows):
+        """Insert rows, skipping those whose UNIQUE_KEYS columns already exist"""
+        _check_table(table, rows)
+        if rows:
+            self.client.table(table).upsert(
+                _full_rows(table, rows), on_conflict=','.join(UNIQUE_KEYS[table]), ignore_duplicates=True
+            ).execute()
+
+    def recent_runtimes(self, algorithm_id, input_size=None, profile=None, limit=50):
+        """runtime_ms of the newest logs run with the same input size and profile"""
+        query = self.client.table('execution_logs').select('runtime_ms').eq('algorithm_id', algorithm_id)
+        query = query.is_('input_size', 'null') if input_size is None else query.eq('input_size', input_size)
+        query = query.is_('profile', 'null') if profile is None else query.eq('profile', profile)
+        result = query.order('created_at', desc=True).limit(limit).execute()
+        return [row['runtime_ms'] for row in result.data or []]
+
+    def performance_markers(self, algorithm_id, limit=100):
+        """Regression/improvement markers of one algorithm, newest first"""
+        result = self.client.table('performance_markers')\
+            .select('*')\
+            .eq('algorithm_id', algorithm_id)\
+            .order('created_at', desc=True)\
+            .limit(limit)\
+            .execute()
+        return result.data or []
+
+    def get_algorithm_stats(self, algorithm_ids):
+        """{algorithm_id: stats row} for the ids that have stored statistics"""
+        result = self.client.table('algorithm_stats').select('*').in_('algorithm_id', list(algorithm_ids)).execute()
+        return {row['algorithm_id']: row for row in result.data or []}
+
+    def find_algorithm_ids(self, user_id, names):
+        """{name: id} for the names of `user_id` that exist"""
+        result = self.client.table('algorithms').select('id, name').in_('name', list(names)).eq('user_id', user_id).execute()
+        return {row['name']: row['id'] for row in result.data or []}
+
+    def get_algorithm(self, user_id, algorithm_id):
+        result = self.client.table('algorithms')\
+            .select('*')\
+            .eq('id', algorithm_id)\
+            .eq('user_id', user_id)\
+            .execute()
+        return result.data[0] if result.data else None
+
+    def list_algorithms(self, user_id):
+        """Algorithms of `user_id`, newest first"""
+        result = self.client.table('algorithms')\
+            .select('*')\
+            .eq('user_id', user_id)\
+            .order('created_at', desc=True)\
+            .execute()
+        return result.data or []
+
+    def execution_logs(self, algorithm_id, limit=None, newest_first=False, after=None, columns=None):
+        """Logs of one algorithm ordered by (created_at, id).
+
+        `after` is a (created_at, id) keyset cursor: only rows past it in the
+        requested direction are returned.
+        """
+        query = self.client.table('execution_logs')\
+            .select(_check_columns('execution_logs', columns))\
+            .eq('algorithm_id', algorithm_id)
+        if after:
+            created_at, log_id = after
+            op = 'lt' if newest_first else 'gt'
+            query = query.or_(f'created_at.{op}."{created_at}",and(created_at.eq."{created_at}",id.{op}.{log_id})')
+        query = query.order('created_at', desc=newest_first).order('id', desc=newest_first)
+        if limit:
+            query = query.limit(limit)
+        return query.execute().data or []
+
+
+class SQLiteStorage:
+    """Local SQLite database with the same tables as schema.sql.
+
+    One connection is opened per process and reused by every request
+    (SQLite serializes writers anyway); file databases use WAL so reads do
+    not block on the write-behind flushes.
+    """
+
+    name = 'sqlite'
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS algorithms (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            description TEXT,
+            user_id TEXT NOT NULL,
+            language TEXT DEFAULT 'c',
+            created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+        );
+        CREATE TABLE IF NOT EXISTS execution_logs (
+            id TEXT PRIMARY KEY,
+            algorithm_id TEXT REFERENCES algorithms(id),
+            runtime_ms REAL NOT NULL,
+            input_size INTEGER,
+            wall_ms REAL,
+            cpu_user_ms REAL,
+            cpu_sys_ms REAL,
+            peak_rss_kb INTEGER,
+            exit_status INTEGER,
+            profile TEXT,
+            output TEXT,
+            output_bytes INTEGER,
+            output_sha256 TEXT,
+            created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+        );
+        CREATE TABLE IF NOT EXISTS algorithm_stats (
+            algorithm_id TEXT PRIMARY KEY REFERENCES algorithms(id),
+            count INTEGER NOT NULL,
+            mean REAL,
+            m2 REAL,
+            min_ms REAL,
+            max_ms REAL,
+            quantiles TEXT,
+            updated_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS performance_markers (
+            id TEXT PRIMARY KEY,
+            algorithm_id TEXT REFERENCES algorithms(id),
+            kind TEXT NOT NULL,
+            input_size INTEGER,
+            profile TEXT,
+            change REAL,
+            p_value REAL,
+            baseline_median_ms REAL,
+            median_ms REAL,
+            created_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%f', 'now'))
+        );
+        CREATE INDEX IF NOT EXISTS idx_performance_markers_algorithm_created ON performance_markers(algorithm_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_execution_logs_algorithm_created ON execution_logs(algorithm_id, created_at);
+    '''
+    # Columns added after the first release: (table, column, type)
+    MIGRATIONS = (
+        ('execution_logs', 'output_bytes', 'INTEGER'),
+        ('execution_logs', 'output_sha256', 'TEXT'),
+    )
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(self.SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        with self._conn:
+            for table, column, kind in self.MIGRATIONS:
+                existing = {row['name'] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {kind}")
+            unique = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_algorithms_user_name_key'"
+            ).fetchone()
+            if not unique:
+                for sql in MERGE_DUPLICATE_ALGORITHMS:
+                    self._conn.execute(sql)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            rows = [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+        for row in rows:
+            for column in JSON_COLUMNS & row.keys():
+                if row[column] is not None:
+                    row[column] = json.loads(row[column])
+        return rows
+
+    def _write(self, table, rows, conflict='', ignore=False):
+        # Rows in one batch may carry different columns; group them
+        groups = {}
+        for row in rows:
+            values = tuple(json.dumps(v) if k in JSON_COLUMNS and v is not None else v for k, v in row.items())
+            groups.setdefault(tuple(row), []).append(values)
+        with self._lock, self._conn:
+            for columns, values in groups.items():
+                placeholders = ', '.join('?' for _ in columns)
+                sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+                if ignore:
+                    sql += f" ON CONFLICT({conflict}) DO NOTHING"
+                elif conflict:
+                    updates = ', '.join(f"{column} = excluded.{column}" for column in columns if column != conflict)
+                    sql += f" ON CONFLICT({conflict}) DO UPDATE SET {updates}"
+                self._conn.executemany(sql, values)
+
+    def insert(self, table, rows):
+        _check_table(table, rows)
+        if rows:
+            self._write(table, rows)
+
+    def upsert(self, table, rows):
+        _check_table(table, rows)
+        if rows:
+            self._write(table, rows, UPSERT_KEYS[table])
+
+    def insert_new(self, table, rows):
+        _check_table(table, rows)
+        if rows:
+            self._write(table, rows, ', '.join(UNIQUE_KEYS[table]), ignore=True)
+
+    def recent_runtimes(self, algorithm_id, input_size=None, profile=None, limit=50):
+        rows = self._query(
+            "SELECT runtime_ms FROM execution_logs WHERE algorithm_id = ? AND input_size IS ? AND profile IS ? "
+            "ORDER BY created_at DESC LIMIT ?",
+            (algorithm_id, input_size, profile, limit)
+        )
+        return [row['runtime_ms'] for row in rows]
+
+    def performance_markers(self, algorithm_id, limit=100):
+        return self._query(
+            'SELECT * FROM performance_markers WHERE algorithm_id = ? ORDER BY created_at DESC LIMIT ?',
+            (algorithm_id, limit)
+        )
+
+    def get_algorithm_stats(self, algorithm_ids):
+        algorithm_ids = list(algorithm_ids)
+        if not algorithm_ids:
+            return {}
+        placeholders = ', '.join('?' for _ in algorithm_ids)
+        rows = self._query(f"SELECT * FROM algorithm_stats WHERE algorithm_id IN ({placeholders})", algorithm_ids)
+        return {row['algorithm_id']: row for row in rows}
+
+    def find_algorithm_ids(self, user_id, names):
+        names = list(names)
+        if not names:
+            return {}
+        placeholders = ', '.join('?' for _ in names)
+        rows = self._query(
+            f"SELECT id, name FROM algorithms WHERE user_id = ? AND name IN ({placeholders})",
+            [user_id, *names]
+        )
+        return {row['name']: row['id'] for row in rows}
+
+    def get_algorithm(self, user_id, algorithm_id):
+        rows = self._query('SELECT * FROM algorithms WHERE id = ? AND user_id = ?', (algorithm_id, user_id))
+        return rows[0] if rows else None
+
+    def list_algorithms(self, user_id):
+        return self._query('SELECT * FROM algorithms WHERE user_id = ? ORDER BY created_at DESC', (user_id,))
+
+    def execution_logs(self, algorithm_id, limit=None, newest_first=False, after=None, columns=None):
+        direction = 'DESC' if newest_first else 'ASC'
+        sql = f"SELECT {_check_columns('execution_logs', columns)} FROM execution_logs WHERE algorithm_id = ?"
+        params = [algorithm_id]
+        if after:
+            # Row-value comparison walks the (algorithm_id, created_at) index
+            sql += f" AND (created_at, id) {'<' if newest_first else '>'} (?, ?)"
+            params.extend(after)
+        sql += f" ORDER BY created_at {direction}, id {direction}"
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return self._query(sql, params)
+
+
+def iter_execution_logs(storage, algorithm_id, after=None, columns=None, batch_size=5000):
+    """Every log of an algorithm (past `after`), oldest first, read in keyset-paginated batches"""
+    while True:
+        rows = storage.execution_logs(algorithm_id, limit=batch_size, after=after, columns=columns)
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1]['created_at'], rows[-1]['id'])
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """The configured storage backend, created on first use"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if STORAGE_BACKEND == 'sqlite':
+                    _storage = SQLiteStorage()
+                elif STORAGE_BACKEND == 'supabase':
+                    _storage = SupabaseStorage(get_client('supabase'))
+                else:
+                    raise StorageError(f'Unknown STORAGE_BACKEND: {STORAGE_BACKEND}')
+    return _storage
+
+
+def set_storage(storage):
+    """Replace the storage backend (used to plug in a different implementation)"""
+    global _storage
+    with _storage_lock:
+        _storage = storage
@@ -0,0 +1,81 @@
+import codecs
+import hashlib
+import json
+import os
+
+# Streamed runs are stopped once stdout + stderr exceed this many bytes
+STREAM_MAX_BYTES = int(os.getenv('STREAM_MAX_BYTES', str(1024 * 1024)))
+# Only this much of stdout is kept (and stored in execution_logs)
+OUTPUT_PREFIX_BYTES = 1000
+STDERR_KEEP_BYTES = 64 * 1024
+
+
+class BoundedOutput:
+    """Accounting for streamed program output.
+
+    Enforces the byte cap, keeps a bounded stdout prefix (for the database)
+    and the start of stderr (for error messages), hashes everything the
+    program wrote to stdout, and turns raw chunks into text without splitting
+    multi-byte characters.
+    """
+
+    def __init__(self, max_bytes=STREAM_MAX_BYTES, prefix_bytes=OUTPUT_PREFIX_BYTES):
+        self.max_bytes = max_bytes
+        self.prefix_bytes = prefix_bytes
+        self.total_bytes = 0
+        self.stdout_bytes = 0
+        self.truncated = False
+        self._digest = hashlib.sha256()
+        self._prefix = bytearray()
+        self._stderr = bytearray()
+        self._decoders = {
+            'stdout': codecs.getincrementaldecoder('utf-8')(errors='replace'),
+            'stderr': codecs.getincrementaldecoder('utf-8')(errors='replace'),
+        }
+
+    def feed(self, stream, chunk):
+        """Account for a chunk from `stream`, returning the text to forward.
+
+        Once output goes past the cap the chunk is cut short and `truncated` is set;
+        the caller should stop the program.
+        """
+        room = self.max_bytes - self.total_bytes
+        if len(chunk) > room:
+            chunk = chunk[:max(room, 0)]
+            self.truncated = True
+        self.total_bytes += len(chunk)
+
+        if stream == 'stdout':
+            self.stdout_bytes += len(chunk)
+            self._digest.update(chunk)
+            if len(self._prefix) < self.prefix_bytes:
+                self._prefix.extend(chunk[:self.prefix_bytes - len(self._prefix)])
+        elif len(self._stderr) < STDERR_KEEP_BYTES:
+            self._stderr.extend(chunk[:STDERR_KEEP_BYTES - len(self._stderr)])
+        return self._decoders[stream].decode(chunk)
+
+    @property
+    def stderr(self):
+        return self._stderr.decode('utf-8', errors='replace')
+
+    def summary(self):
+        """What gets stored in execution_logs for this run's output"""
+        return {
+            'output': self._prefix.decode('utf-8', errors='ignore').strip(),
+            'output_bytes': self.stdout_bytes,
+            'output_sha256': self._digest.hexdigest(),
+            'output_truncated': self.truncated
+        }
+
+
+def output_digest(stdout):
+    """Size and hash of a complete stdout, matching BoundedOutput.summary()"""
+    return {
+        'output_bytes': len(stdout),
+        'output_sha256': hashlib.sha256(stdout).hexdigest()
+    }
+
+
+def sse_event(event, data):
+    """One Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
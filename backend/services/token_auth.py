@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+
+import jwt
+
+# Legacy Supabase projects sign access tokens with HS256 and this secret
+# (Settings > API > JWT secret). When unset, tokens are verified against the
+# project's published signing keys (JWKS) instead.
+SUPABASE_JWT_SECRET = os.getenv('SUPABASE_JWT_SECRET', '')
+# Defaults to <SUPABASE_URL>/auth/v1/.well-known/jwks.json
+SUPABASE_JWKS_URL = os.getenv('SUPABASE_JWKS_URL', '')
+# Expected `aud` claim; empty disables the check
+JWT_AUDIENCE = os.getenv('JWT_AUDIENCE', 'authenticated')
+# Seconds of clock skew tolerated on exp/nbf/iat
+JWT_LEEWAY = float(os.getenv('JWT_LEEWAY', '30'))
+# Verified tokens remembered until they expire
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '4096'))
+# Signing keys are re-fetched this often, and on an unknown key id (at most every JWKS_MIN_REFRESH seconds)
+JWKS_REFRESH = float(os.getenv('JWKS_REFRESH', '3600'))
+JWKS_MIN_REFRESH = 30
+
+ASYMMETRIC_ALGORITHMS = ['RS256', 'ES256', 'EdDSA']
+
+
+class SigningKeys:
+    """Verification keys, loaded once and cached.
+
+    Either the HS256 secret or the JWKS key set (by key id). The key set is
+    refreshed every `refresh` seconds, and early when a token names a key we
+    don't have (key rotation), but never more than once per JWKS_MIN_REFRESH.
+    """
+
+    def __init__(self, secret=SUPABASE_JWT_SECRET, jwks_url=SUPABASE_JWKS_URL, refresh=JWKS_REFRESH):
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.refresh = refresh
+        self._keys = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def url(self):
+        if self.jwks_url:
+            return self.jwks_url
+        supabase_url = os.getenv('SUPABASE_URL')
+        if supabase_url:
+            return f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+        return None
+
+    def _fetch(self):
+        url = self.url()
+        if not url:
+            raise jwt.InvalidKeyError('No JWT secret or JWKS URL configured')
+        # Counted as a fetch even if it fails, so an unreachable endpoint is retried at the refresh pace
+        self._fetched_at = time.monotonic()
+        self.fetches += 1
+        with urllib.request.urlopen(url, timeout=5) as response:
+            jwks = json.load(response)
+        keys = {}
+        for data in jwks.get('keys', []):
+            try:
+                keys[data.get('kid')] = jwt.PyJWK(data)
+            except jwt.PyJWTError as e:
+                print(f"Skipping unusable signing key {data.get('kid')}: {e}")
+        self._keys = keys
+
+    def check(self):
+        """Raise RuntimeError unless tokens can be verified: a secret, or a JWKS with a usable key"""
+        if self.secret:
+            return
+        if not jwt.algorithms.has_crypto:
+            raise RuntimeError("Verifying tokens against the JWKS needs the 'cryptography' package "
+                               "(pip install 'pyjwt[crypto]'), or set SUPABASE_JWT_SECRET")
+        if not self.url():
+            raise RuntimeError('Set SUPABASE_JWT_SECRET, SUPABASE_JWKS_URL or SUPABASE_URL to verify tokens')
+        with self._lock:
+            try:
+                self._fetch()
+            except (OSError, ValueError) as e:
+                raise RuntimeError(f"Could not load the signing keys from {self.url()}: {e}")
+            if not self._keys:
+                raise RuntimeError(f"No usable signing keys at {self.url()}")
+
+    def key_for(self, token):
+        """(key, algorithms) to verify `token` with"""
+        if self.secret:
+            return self.secret, ['HS256']
+        kid = jwt.get_unverified_header(token).get('kid')
+        with self._lock:
+            age = time.monotonic() - self._fetched_at if self._fetched_at is not None else None
+            if age is None or age >= self.refresh or (kid not in self._keys and age >= JWKS_MIN_REFRESH):
+                self._fetch()
+            key = self._keys.get(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f"Unknown signing key '{kid}'")
+        return key.key, ASYMMETRIC_ALGORITHMS
+
+    def stats(self):
+        with self._lock:
+            return {
+                'source': 'secret' if self.secret else 'jwks',
+                'keys': 1 if self.secret else len(self._keys),
+                'fetches': self.fetches
+            }
+
+
+class TokenCache:
+    """Bounded LRU cache of verified token -> (user_id, expires_at).
+
+    A hit skips signature verification, so entries must never outlive the
+    token: each one expires with the token's own `exp`. Tokens are keyed by
+    their SHA-256 rather than kept in memory as-is.
+    """
+
+    def __init__(self, max_entries=TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(token):
+        return hashlib.sha256(token.encode('utf-8')).digest()
+
+    def get(self, token):
+        key = self.key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token, user_id, expires_at):
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = (user_id, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+signing_keys = SigningKeys()
+token_cache = TokenCache()
+
+
+def verify_token(token):
+    """User id of a validly signed, unexpired access token, else None"""
+    user_id = token_cache.get(token)
+    if user_id:
+        return user_id
+    try:
+        key, algorithms = signing_keys.key_for(token)
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=algorithms,
+            audience=JWT_AUDIENCE or None,
+            leeway=JWT_LEEWAY,
+            options={'require': ['exp', 'sub'], 'verify_aud': bool(JWT_AUDIENCE)}
+        )
+    except (jwt.PyJWTError, OSError, ValueError) as e:
+        print("JWT verification error:", e)
+        return None
+    token_cache.put(token, claims['sub'], claims['exp'])
+    return claims['sub']
+
+
+def user_id_from_header(auth_header):
+    """User id from an 'Authorization: Bearer <token>' header, else None"""
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return None
+    return verify_token(auth_header.split(' ', 1)[1].strip())
+
+
+def stats():
+    return {'signing_keys': signing_keys.stats(), 'token_cache': token_cache.stats()}
@@ -0,0 +1,186 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from services.container_pool import SANDBOX_WORK_ROOT
+from services.lifecycle import process_alive
+
+# Per-job directories live below the sandbox work root, on the same filesystem
+# as the compile cache, so finished binaries can be renamed (not copied) into
+# it. Each sandbox container mounts one of them as its private job directory.
+# Every process keeps its directories below WORKSPACE_ROOT/<pid>.
+WORKSPACE_ROOT = os.getenv('WORKSPACE_ROOT', os.path.join(SANDBOX_WORK_ROOT, 'jobs'))
+WORKSPACE_MAX_BYTES = int(os.getenv('WORKSPACE_MAX_MB', '256')) * 1024 * 1024
+WORKSPACE_IDLE = int(os.getenv('WORKSPACE_IDLE', '16'))  # emptied directories kept for reuse
+WORKSPACE_WAIT = float(os.getenv('WORKSPACE_WAIT', '10'))  # seconds to wait for space
+# Taken workspaces are re-measured at most this often (seconds)
+WORKSPACE_MEASURE_INTERVAL = float(os.getenv('WORKSPACE_MEASURE_INTERVAL', '1.0'))
+
+
+class WorkspaceError(Exception):
+    """Raised when no workspace can be handed out"""
+
+
+def _tree_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _clear(path):
+    """Empty a directory in place; False if something could not be removed"""
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+    except OSError:
+        return False
+    return True
+
+
+class WorkspaceManager:
+    """Hands out per-job directories and takes them back.
+
+    Released directories are emptied and kept for the next job (up to
+    `max_idle`), so a run costs no mkdir/rmdir. While the jobs in flight hold
+    more than `max_bytes`, new jobs wait up to `wait` seconds for space and
+    then fail with WorkspaceError instead of filling the host. Bytes are
+    tracked per workspace as a running total: a directory counts as zero once
+    emptied, and taken directories are re-measured at most every
+    `measure_interval` seconds, by one thread and outside the lock.
+
+    Directories live below `root`/<pid>, so servers, probes and load tests
+    sharing a host never touch each other's jobs; at startup only the
+    directories of processes that no longer exist are removed.
+    """
+
+    def __init__(self, root=WORKSPACE_ROOT, max_bytes=WORKSPACE_MAX_BYTES,
+                 max_idle=WORKSPACE_IDLE, wait=WORKSPACE_WAIT,
+                 measure_interval=WORKSPACE_MEASURE_INTERVAL):
+        self.base = root
+        self.max_bytes = max_bytes
+        self.max_idle = max_idle
+        self.wait = wait
+        self.measure_interval = measure_interval
+        self._idle = []
+        self._active = {}  # path -> bytes when last measured
+        self._total_bytes = 0
+        self._measured_at = 0.0
+        self._measure_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self.created = 0
+        self.reused = 0
+        self.rejected = 0
+        self._claim()
+
+    def _claim(self):
+        """Create this process's directory, removing those of dead processes"""
+        self.pid = os.getpid()
+        self.root = os.path.join(self.base, str(self.pid))
+        os.makedirs(self.base, exist_ok=True)
+        for name in os.listdir(self.base):
+            # A directory named after our own pid was left by an earlier process
+            if name.isdigit() and (int(name) == self.pid or not process_alive(int(name))):
+                shutil.rmtree(os.path.join(self.base, name), ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _set_size(self, path, size):
+        # Caller holds the lock
+        if path in self._active:
+            self._total_bytes += size - self._active[path]
+            self._active[path] = size
+
+    def _measure(self):
+        """Re-measure the taken directories if the last measurement is stale"""
+        if time.monotonic() - self._measured_at < self.measure_interval:
+            return
+        if not self._measure_lock.acquire(blocking=False):
+            # Another thread is measuring right now
+            return
+        try:
+            with self._cond:
+                paths = list(self._active)
+            sizes = {path: _tree_size(path) for path in paths}
+            with self._cond:
+                for path, size in sizes.items():
+                    self._set_size(path, size)
+                self._cond.notify_all()
+            self._measured_at = time.monotonic()
+        finally:
+            self._measure_lock.release()
+
+    def take(self):
+        """Return an empty directory for one job; pair with release()"""
+        deadline = time.monotonic() + self.wait
+        while True:
+            self._measure()
+            with self._cond:
+                if os.getpid() != self.pid:
+                    # Forked after import: the parent's directories are not ours
+                    self._idle, self._active, self._total_bytes = [], {}, 0
+                    self._claim()
+                if self._total_bytes < self.max_bytes:
+                    return self._take()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.rejected += 1
+                    raise WorkspaceError(
+                        f'Workspace area full ({self._total_bytes} of {self.max_bytes} bytes in use)'
+                    )
+                self._cond.wait(min(remaining, self.measure_interval))
+
+    def _take(self):
+        # Caller holds the lock
+        if self._idle:
+            path = self._idle.pop()
+            self.reused += 1
+        else:
+            path = os.path.join(self.root, uuid.uuid4().hex)
+            os.mkdir(path)
+            self.created += 1
+        self._active[path] = 0
+        return path
+
+    def reset(self, path):
+        """Empty a directory that stays taken (a sandbox container's job directory)"""
+        reusable = _clear(path)
+        with self._cond:
+            if reusable:
+                self._set_size(path, 0)
+            self._cond.notify_all()
+        return reusable
+
+    def release(self, path):
+        """Empty `path` and keep it for reuse, or remove it"""
+        reusable = _clear(path)
+        with self._cond:
+            self._total_bytes -= self._active.pop(path, 0)
+            if reusable and len(self._idle) < self.max_idle:
+                self._idle.append(path)
+                path = None
+            self._cond.notify_all()
+        if path:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'root': self.root,
+                'active': len(self._active),
+                'idle': len(self._idle),
+                'active_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'created': self.created,
+                'reused': self.reused,
+                'rejected': self.rejected
+            }
@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+
+from services.lifecycle import on_exit
+
+# Buffer configuration (overridable through the environment)
+WRITE_BEHIND_BATCH = int(os.getenv('WRITE_BEHIND_BATCH', '50'))
+WRITE_BEHIND_INTERVAL = float(os.getenv('WRITE_BEHIND_INTERVAL', '1.0'))
+WRITE_BEHIND_RETRIES = int(os.getenv('WRITE_BEHIND_RETRIES', '5'))
+WRITE_BEHIND_MAX_PENDING = int(os.getenv('WRITE_BEHIND_MAX_PENDING', '10000'))
+
+
+class WriteBehindBuffer:
+    """Background writer that batches rows into bulk inserts.
+
+    Rows are queued per table and flushed by a single thread when a table
+    reaches `batch_size` rows or `interval` seconds have passed. Tables are
+    flushed in the order given by `table_order`, so parent rows (algorithms)
+    are written before rows that reference them (execution_logs). A table
+    that fails keeps its rows for the next round, retried with exponential
+    backoff, and the tables after it are still flushed. After `max_retries`
+    failed rounds its batches are bisected: everything that can be written
+    is, and only rows that fail on their own are dropped (reported through
+    `on_dropped`). Everything still pending is drained at exit and on SIGTERM.
+    """
+
+    def __init__(self, writer, table_order, batch_size=WRITE_BEHIND_BATCH,
+                 interval=WRITE_BEHIND_INTERVAL, max_retries=WRITE_BEHIND_RETRIES,
+                 max_pending=WRITE_BEHIND_MAX_PENDING, on_flushed=None, on_dropped=None):
+        self.writer = writer
+        self.table_order = list(table_order)
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.max_retries = max_retries
+        self.max_pending = max_pending
+        self.on_flushed = on_flushed
+        self.on_dropped = on_dropped
+        self._pending = {table: [] for table in self.table_order}
+        # Failed rounds in a row, per table
+        self._retries = {table: 0 for table in self.table_order}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._flush_requested = False
+        self._in_flight = 0
+        self._failures_in_a_row = 0
+        self._flushed_rows = 0
+        self._flush_calls = 0
+        self._failed_flushes = 0
+        self._dropped_rows = 0
+        self._thread = threading.Thread(target=self._loop, name='write-behind', daemon=True)
+        self._thread.start()
+        on_exit(self.close)
+
+    def _pending_count(self):
+        return sum(len(rows) for rows in self._pending.values())
+
+    def enqueue(self, table, rows):
+        """Queue rows for `table`; returns immediately unless the buffer is full"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('Write-behind buffer is closed')
+            # Back-pressure: wait briefly for the writer to catch up
+            deadline = time.monotonic() + 5
+            while self._pending_count() + len(rows) > self.max_pending:
+                self._cond.notify_all()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._dropped_rows += len(rows)
+                    print(f"Write-behind buffer full, dropped {len(rows)} {table} rows")
+                    return
+                self._cond.wait(remaining)
+            self._pending[table].extend(rows)
+            if len(self._pending[table]) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                backoff = min(30, self.interval * (2 ** self._failures_in_a_row)) if self._failures_in_a_row else self.interval
+                deadline = time.monotonic() + backoff
+                while not self._closed and not self._flush_requested:
+                    full = any(len(rows) >= self.batch_size for rows in self._pending.values())
+                    remaining = deadline - time.monotonic()
+                    if (full and not self._failures_in_a_row) or remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                self._flush_requested = False
+                closing = self._closed
+            self._flush_round(final=closing)
+            if closing:
+                return
+
+    def _write(self, table, batch):
+        self.writer(table, batch)
+        with self._cond:
+            self._in_flight -= len(batch)
+            self._flush_calls += 1
+            self._flushed_rows += len(batch)
+        if self.on_flushed:
+            self.on_flushed(table, batch)
+
+    def _write_bisect(self, table, rows):
+        """Write `rows`, splitting failed batches in half; returns the rows that fail on their own"""
+        try:
+            self._write(table, rows)
+            return []
+        except Exception as e:
+            with self._cond:
+                self._failed_flushes += 1
+            if len(rows) == 1:
+                print(f"Write-behind: {table} row rejected: {e}")
+                return rows
+        middle = len(rows) // 2
+        return self._write_bisect(table, rows[:middle]) + self._write_bisect(table, rows[middle:])
+
+    def _flush_round(self, final=False):
+        """Write everything pending, table by table (see the class docstring)"""
+        failed = False
+        # Set once a table keeps rows back: the tables after it may reference
+        # those rows, so they must not drop anything this round
+        blocked = False
+        for table in self.table_order:
+            with self._cond:
+                rows = self._pending[table]
+                if not rows:
+                    continue
+                self._pending[table] = []
+                self._in_flight = len(rows)
+                last_chance = final or (self._retries[table] >= self.max_retries and not blocked)
+
+            if last_chance:
+                rejected = []
+                for start in range(0, len(rows), self.batch_size):
+                    rejected += self._write_bisect(table, rows[start:start + self.batch_size])
+                with self._cond:
+                    self._in_flight = 0
+                    self._retries[table] = 0
+                    self._dropped_rows += len(rejected)
+                    self._cond.notify_all()
+                if rejected:
+                    print(f"Dropping {len(rejected)} {table} rows that could not be written")
+                    if self.on_dropped:
+                        self.on_dropped(table, rejected)
+                continue
+
+            try:
+                while rows:
+                    batch = rows[:self.batch_size]
+                    self._write(table, batch)
+                    rows = rows[self.batch_size:]
+                with self._cond:
+                    self._retries[table] = 0
+            except Exception as e:
+                print(f"Write-behind flush of {table} failed: {e}")
+                failed = blocked = True
+                with self._cond:
+                    self._failed_flushes += 1
+                    self._retries[table] += 1
+                    # Put the unwritten rows back in front of anything queued meanwhile
+                    self._pending[table] = rows + self._pending[table]
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+
+        with self._cond:
+            self._failures_in_a_row = self._failures_in_a_row + 1 if failed else 0
+            self._cond.notify_all()
+
+    def flush(self, timeout=10):
+        """Block until everything queued so far has been written (or timeout)"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._pending_count() or self._in_flight) and time.monotonic() < deadline:
+                self._flush_requested = True
+                self._cond.notify_all()
+                self._cond.wait(0.05)
+            return not (self._pending_count() or self._in_flight)
+
+    def rewrite(self, column, mapping, drop_tables=()):
+        """Point pending rows whose `column` is a key of `mapping` at its value.
+
+        Matching rows of `drop_tables` (snapshots that would overwrite the
+        target's own) are discarded instead.
+        """
+        with self._cond:
+            for table, rows in self._pending.items():
+                if table in drop_tables:
+                    self._pending[table] = [row for row in rows if row.get(column) not in mapping]
+                    continue
+                for row in rows:
+                    if row.get(column) in mapping:
+                        row[column] = mapping[row[column]]
+
+    def close(self, timeout=10):
+        """Stop accepting rows, drain what is pending and stop the thread"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if self._pending_count() and not self._thread.is_alive():
+            # Rows queued while the writer was finishing its last round
+            self._flush_round(final=True)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'pending': self._pending_count(),
+                'flushed_rows': self._flushed_rows,
+                'flush_calls': self._flush_calls,
+                'failed_flushes': self._failed_flushes,
+                'dropped_rows': self._dropped_rows,
+                'batch_size': self.batch_size,
+                'interval_s': self.interval
+            }
@@ -115,7 +115,8 @@ document.addEventListener('DOMContentLoaded', () => {
     function updateChart(runtimes) {
         if (!chart || !runtimes || runtimes.length === 0) return;
         
-        const labels = runtimes.map((_, index) => `Run ${index + 1}`);
+        // Downsampled series carry their position in the full history as `run`
+        const labels = runtimes.map((runtime, index) => `Run ${runtime.run || index + 1}`);
         const data = runtimes.map(runtime => runtime.runtime_ms);
 
         chart.data.labels = labels;
@@ -129,7 +130,7 @@ document.addEventListener('DOMContentLoaded', () => {
         
         try {
             const response = await fetch(
-                `${API_BASE_URL}/visualization/runtimes?algorithm_name=${encodeURIComponent(algorithmName)}`,
+                `${API_BASE_URL}/visualization/runtimes?algorithm_name=${encodeURIComponent(algorithmName)}&max_points=500`,
                 {
                     headers: {
                         'Authorization': `Bearer ${localStorage.getItem('token')}`,
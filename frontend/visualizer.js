@@ -5,6 +5,12 @@ document.addEventListener('DOMContentLoaded', () => {
     
     let chart = null;
 
+    // The executions endpoint's largest page, and how many rows the history lists
+    const EXECUTIONS_PAGE_SIZE = 100;
+    const HISTORY_SIZE = 10;
+    const LINE_COLOR = '#3498db';
+    const MARKER_COLORS = { regression: '#e74c3c', improvement: '#2ecc71' };
+
     // Initialize Chart.js
     function initChart() {
         const ctx = runtimeChart.getContext('2d');
@@ -15,13 +21,24 @@ document.addEventListener('DOMContentLoaded', () => {
                 datasets: [{
                     label: 'Runtime (ms)',
                     data: [],
-                    borderColor: '#3498db',
+                    borderColor: LINE_COLOR,
                     tension: 0.1
                 }]
             },
             options: {
                 responsive: true,
                 maintainAspectRatio: false,
+                plugins: {
+                    tooltip: {
+                        callbacks: {
+                            // Points of runs that raised a marker say so
+                            afterLabel: context => {
+                                const marker = (chart.pointMarkers || [])[context.dataIndex];
+                                return marker ? `${marker.kind} (${(marker.change * 100).toFixed(0)}%)` : '';
+                            }
+                        }
+                    }
+                },
                 scales: {
                     y: {
                         beginAtZero: true,
@@ -41,13 +58,57 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    // Update chart with new data
-    function updateChart(runtimes) {
-        const labels = runtimes.map((_, index) => `Run ${index + 1}`);
-        const data = runtimes.map(runtime => runtime.runtime_ms);
+    // Marker raised by each log's run: a marker is stored just before the logs of
+    // the run that produced it, with the same input size and profile
+    function markersByLog(runtimes, markers) {
+        const chronological = [...runtimes].reverse();
+        const found = {};
+        markers.forEach(marker => {
+            const log = chronological.find(runtime => runtime.created_at >= marker.created_at
+                && runtime.input_size === marker.input_size && runtime.profile === marker.profile);
+            if (log) {
+                found[log.id] = marker;
+            }
+        });
+        return found;
+    }
 
+    // Plot `points` (logs), highlighting the ones whose run raised a marker
+    function setPoints(points, labels, markers) {
+        chart.pointMarkers = points.map(point => markers[point.id]);
+        const dataset = chart.data.datasets[0];
         chart.data.labels = labels;
-        chart.data.datasets[0].data = data;
+        dataset.data = points.map(point => point.runtime_ms);
+        dataset.pointBackgroundColor = chart.pointMarkers.map(marker => marker ? MARKER_COLORS[marker.kind] : LINE_COLOR);
+        dataset.pointRadius = chart.pointMarkers.map(marker => marker ? 6 : 3);
+    }
+
+    // Update chart with new data (executions newest first) and markers
+    function updateChart(runtimes, markers = []) {
+        if (runtimes.length === 0) {
+            setPoints([], [], {});
+            chart.update();
+            return;
+        }
+        const markerOf = markersByLog(runtimes, markers);
+
+        // Benchmark runs carry an input size: plot the newest run (its logs share
+        // one created_at) against n, for a single profile
+        const newest = runtimes[0];
+        const sized = runtimes.filter(runtime => runtime.created_at === newest.created_at
+            && runtime.input_size != null && runtime.profile === newest.profile);
+        if (sized.length > 0) {
+            sized.sort((a, b) => a.input_size - b.input_size);
+            setPoints(sized, sized.map(runtime => `n=${runtime.input_size}`), markerOf);
+            chart.options.scales.x.title.text = 'Input Size (n)';
+            chart.update();
+            return;
+        }
+
+        // Otherwise single runs, oldest first
+        const runs = runtimes.filter(runtime => runtime.input_size == null).reverse();
+        setPoints(runs, runs.map((_, index) => `Run ${index + 1}`), markerOf);
+        chart.options.scales.x.title.text = 'Run Number';
         chart.update();
     }
 
@@ -64,11 +125,12 @@ document.addEventListener('DOMContentLoaded', () => {
         `).join('');
     }
 
-    // Fetch execution history
-    async function fetchExecutionHistory(algorithmId) {
+    // Regression/improvement markers of one algorithm (newest first); none on error
+    async function fetchMarkers(algorithmName) {
         try {
+            const params = new URLSearchParams({ algorithm_name: algorithmName });
             const response = await fetch(
-                `http://localhost:5000/api/visualization/executions?algorithm_id=${algorithmId}`,
+                `http://localhost:5000/api/visualization/markers?${params}`,
                 {
                     headers: {
                         'Authorization': `Bearer ${localStorage.getItem('token')}`
@@ -76,11 +138,41 @@ document.addEventListener('DOMContentLoaded', () => {
                 }
             );
             const data = await response.json();
-            
-            if (data.success) {
-                updateChart(data.executions);
-                updateExecutionHistory(data.executions);
-            }
+            return data.success ? data.markers : [];
+        } catch (error) {
+            console.error('Error fetching markers:', error);
+            return [];
+        }
+    }
+
+    // Fetch execution history: full pages, continued while the newest run has more logs
+    async function fetchExecutionHistory(algorithmId, algorithmName) {
+        try {
+            let executions = [];
+            let cursor = null;
+            do {
+                const params = new URLSearchParams({ algorithm_id: algorithmId, limit: EXECUTIONS_PAGE_SIZE });
+                if (cursor) {
+                    params.set('cursor', cursor);
+                }
+                const response = await fetch(
+                    `http://localhost:5000/api/visualization/executions?${params}`,
+                    {
+                        headers: {
+                            'Authorization': `Bearer ${localStorage.getItem('token')}`
+                        }
+                    }
+                );
+                const data = await response.json();
+                if (!data.success) {
+                    return;
+                }
+                executions = executions.concat(data.executions);
+                cursor = data.next_cursor;
+            } while (cursor && executions[executions.length - 1].created_at === executions[0].created_at);
+
+            updateChart(executions, await fetchMarkers(algorithmName));
+            updateExecutionHistory(executions.slice(0, HISTORY_SIZE));
         } catch (error) {
             console.error('Error fetching execution history:', error);
         }
@@ -113,7 +205,7 @@ document.addEventListener('DOMContentLoaded', () => {
     // Event listeners
     algorithmSelect.addEventListener('change', () => {
         if (algorithmSelect.value) {
-            fetchExecutionHistory(algorithmSelect.value);
+            fetchExecutionHistory(algorithmSelect.value, algorithmSelect.selectedOptions[0].textContent);
         }
     });
 
@@ -13,6 +13,84 @@ CREATE TABLE execution_logs (
     id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
     algorithm_id UUID REFERENCES algorithms(id),
     runtime_ms FLOAT NOT NULL,
-    output TEXT,
+    input_size INTEGER,  -- set by benchmark runs, NULL for single runs
+    wall_ms FLOAT,       -- measured inside the sandbox by the launcher
+    cpu_user_ms FLOAT,
+    cpu_sys_ms FLOAT,
+    peak_rss_kb BIGINT,
+    exit_status INTEGER, -- exit code, or -signal if the program was killed
+    profile VARCHAR,     -- optimization profile for flag-matrix runs
+    output TEXT,         -- first 1000 bytes of stdout
+    output_bytes BIGINT, -- full stdout size
+    output_sha256 VARCHAR, -- hash of the full stdout
     created_at TIMESTAMP DEFAULT NOW()
-);
\ No newline at end of file
+);
+
+-- algorithm_stats table: rolling runtime statistics, one row per algorithm,
+-- updated by the backend on every logged run
+CREATE TABLE IF NOT EXISTS algorithm_stats (
+    algorithm_id UUID PRIMARY KEY REFERENCES algorithms(id),
+    count BIGINT NOT NULL,
+    mean FLOAT,          -- Welford running mean and sum of squared deviations
+    m2 FLOAT,
+    min_ms FLOAT,
+    max_ms FLOAT,
+    quantiles JSONB,     -- P-square marker state for p50/p95/p99
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- performance_markers table: regressions/improvements detected on new runs
+CREATE TABLE IF NOT EXISTS performance_markers (
+    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+    algorithm_id UUID REFERENCES algorithms(id),
+    kind VARCHAR NOT NULL,   -- 'regression' or 'improvement'
+    input_size INTEGER,
+    profile VARCHAR,
+    change FLOAT,            -- relative change of the median runtime
+    p_value FLOAT,
+    baseline_median_ms FLOAT,
+    median_ms FLOAT,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS idx_performance_markers_algorithm_created ON performance_markers(algorithm_id, created_at);
+
+-- Migrations for databases created before the columns above existed
+ALTER TABLE execution_logs ADD COLUMN IF NOT EXISTS input_size INTEGER;
+ALTER TABLE execution_logs ADD COLUMN IF NOT EXISTS wall_ms FLOAT;
+ALTER TABLE execution_logs ADD COLUMN IF NOT EXISTS cpu_user_ms FLOAT;
+ALTER TABLE execution_logs ADD COLUMN IF NOT EXISTS cpu_sys_ms FLOAT;
+ALTER TABLE execution_logs ADD COLUMN IF NOT EXISTS peak_rss_kb BIGINT;
+ALTER TABLE execution_logs ADD COLUMN IF NOT EXISTS exit_status INTEGER;
+ALTER TABLE execution_logs ADD COLUMN IF NOT EXISTS profile VARCHAR;
+ALTER TABLE execution_logs ADD COLUMN IF NOT EXISTS output_bytes BIGINT;
+ALTER TABLE execution_logs ADD COLUMN IF NOT EXISTS output_sha256 VARCHAR;
+
+-- Indexes for the lookups the backend makes on every request
+CREATE INDEX IF NOT EXISTS idx_execution_logs_algorithm_created ON execution_logs(algorithm_id, created_at);
+
+-- One algorithm per (user_id, name). Databases created before this index may
+-- hold duplicates from concurrent first runs: fold each group into its oldest
+-- row (its statistics are rebuilt from the merged history), then index.
+DELETE FROM algorithm_stats WHERE algorithm_id IN (
+    SELECT a.id FROM algorithms a WHERE EXISTS (SELECT 1 FROM algorithms b WHERE b.user_id = a.user_id AND b.name = a.name AND b.id <> a.id)
+);
+UPDATE execution_logs SET algorithm_id = (
+    SELECT k.id FROM algorithms k, algorithms d WHERE d.id = execution_logs.algorithm_id
+    AND k.user_id = d.user_id AND k.name = d.name ORDER BY k.created_at, k.id LIMIT 1
+) WHERE algorithm_id IN (
+    SELECT a.id FROM algorithms a WHERE EXISTS (SELECT 1 FROM algorithms b WHERE b.user_id = a.user_id AND b.name = a.name AND b.id <> a.id)
+);
+UPDATE performance_markers SET algorithm_id = (
+    SELECT k.id FROM algorithms k, algorithms d WHERE d.id = performance_markers.algorithm_id
+    AND k.user_id = d.user_id AND k.name = d.name ORDER BY k.created_at, k.id LIMIT 1
+) WHERE algorithm_id IN (
+    SELECT a.id FROM algorithms a WHERE EXISTS (SELECT 1 FROM algorithms b WHERE b.user_id = a.user_id AND b.name = a.name AND b.id <> a.id)
+);
+DELETE FROM algorithms WHERE id IN (
+    SELECT a.id FROM algorithms a WHERE EXISTS (SELECT 1 FROM algorithms b WHERE b.user_id = a.user_id AND b.name = a.name AND b.id <> a.id)
+) AND id <> (
+    SELECT k.id FROM algorithms k, algorithms d WHERE d.id = algorithms.id
+    AND k.user_id = d.user_id AND k.name = d.name ORDER BY k.created_at, k.id LIMIT 1
+);
+DROP INDEX IF EXISTS idx_algorithms_user_name;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_algorithms_user_name_key ON algorithms(user_id, name);